@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import asyncio
+import carb
+from .utils import Utils
+from .export_job import ExportJob
+from .pipeline import ExportPipeline
+from .tracing import get_tracer
+from .progress_tracker import ProgressTracker
+
+
+class BatchJobStatus:
+    PENDING = "pending"
+    CONVERTING = "converting"
+    CONVERTED = "converted"
+    UPLOADING = "uploading"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class BatchJob(ExportJob):
+    """One USD file of a batch export.
+
+    Args:
+        relative_path (str): Path of the file relative to the batch folder.
+    """
+
+    def __init__(self, job_folder, target_name, context, source_path, relative_path=None):
+        super().__init__(job_folder, target_name, context, source_path)
+        self.relative_path = relative_path
+        self.status = BatchJobStatus.PENDING
+        self.progress = 0.0
+        self.attempts = 0
+        self.upload_attempts = 0
+        self.error = None
+        self.start_time = None
+        self.end_time = None
+        self.peak_rss = None
+
+    @property
+    def duration(self):
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time.time()) - self.start_time
+
+    def to_dict(self):
+        job = {
+            "job_id": self.job_id,
+            "source_path": self.source_path,
+            "target_name": self.target_name,
+            "status": self.status,
+            "attempts": self.attempts,
+            "upload_attempts": self.upload_attempts,
+            "error": self.error,
+            "duration": round(self.duration, 3),
+            "peak_rss": self.peak_rss,
+        }
+        tracer = get_tracer()
+        if tracer.enabled:
+            # Time, bytes and counts of each phase, e.g. how long the uploads of this file took.
+            job["phases"] = tracer.job_summary(self.job_id)
+        return job
+
+
+class BatchExporter:
+    """Converts every USD file under a folder and uploads the results to Daystar World.
+
+    Jobs go through an ExportPipeline, so converted files upload while the next files convert.
+    A conversion or upload that fails is retried up to `max_retries` times before the job is
+    marked as failed.
+
+    Args:
+        exporter (Exporter): Exporter used to convert the files.
+        dw_tool (DWTool): Logged in DWTool used to upload the converted files.
+        workspace (StagingWorkspace): Workspace of the job staging folders.
+        max_workers (int): Number of concurrent conversions.
+        max_retries (int): Number of retries of a failed conversion or upload.
+        status_fn (function): Called with the job every time its status changes.
+        upload_workers (int): Number of concurrent uploads.
+        queue_size (int): Maximum number of converted jobs waiting for upload.
+        progress_tracker (ProgressTracker): Tracker the jobs are reported to, usually the one of the exporter,
+            which also cancels their conversions.
+    """
+
+    def __init__(
+        self, exporter, dw_tool, workspace, max_workers=1, max_retries=2, status_fn=None, upload_workers=2, queue_size=2,
+        progress_tracker=None,
+    ):
+        self._exporter = exporter
+        self._dw_tool = dw_tool
+        self._workspace = workspace
+        self.max_workers = max(1, max_workers)
+        self.upload_workers = max(1, upload_workers)
+        self.queue_size = queue_size
+        self.max_retries = max(0, max_retries)
+        self._status_fn = status_fn
+        self.progress = progress_tracker or ProgressTracker()
+        self.retry_delay = 2.0
+        self._cancelled = False
+        self.jobs = []
+
+    def cancel(self):
+        self._cancelled = True
+        for job in self.jobs:
+            self.progress.cancel(job.output_path)
+
+    async def walk_jobs_async(self, folder_path, asset_converter_context):
+        """Yields a job for each USD file under folder_path while the folder is being listed."""
+        async for absolute_path, relative_path in Utils.walk_folder_async(folder_path, include_fn=Utils.is_usd):
+            # walk_folder_async returns paths relative to the parent of the folder.
+            relative_path = relative_path.split("/", 1)[-1]
+            yield self._workspace.create_job(
+                self.target_name(relative_path), asset_converter_context, absolute_path,
+                job_type=BatchJob, relative_path=relative_path,
+            )
+
+    @staticmethod
+    def target_name(relative_path):
+        """Returns the asset name of the file at relative_path in the batch folder, e.g. sub_b for sub/b.usda."""
+        name, _ = os.path.splitext(relative_path)
+        return name.replace("\\", "/").replace("/", "_")
+
+    async def run_async(self, folder_path, asset_converter_context, report_folder=None):
+        """Exports all USD files under folder_path and returns the summary report."""
+        report_folder = report_folder or self._workspace.root
+        report_path = os.path.join(report_folder, f"batch_report_{time.strftime('%Y%m%d%H%M%S')}.json")
+        # The pipeline starts on the first files while the rest of the folder is still being listed.
+        return await self.run_jobs_async(
+            self.walk_jobs_async(folder_path, asset_converter_context), folder_path, report_path
+        )
+
+    async def run_jobs_async(self, jobs, label, report_path):
+        """Exports the BatchJobs of an async iterable and returns the summary report, also written to report_path.
+
+        Args:
+            jobs: Async iterable of the jobs, e.g. walk_jobs_async.
+            label (str): What the jobs export, e.g. a folder, used in the report and the log.
+            report_path (str): Path of the JSON report.
+        """
+        self._cancelled = False
+        start_time = time.time()
+        trace_start = get_tracer().now()
+        self.jobs = []
+
+        async def track_jobs():
+            async for job in jobs:
+                self.jobs.append(job)
+                self.progress.add_job(job.output_path, job.target_name)
+                if self._status_fn:
+                    self._status_fn(job)
+                yield job
+
+        pipeline = ExportPipeline(
+            self._convert_job, self._upload_job, self.max_workers, self.upload_workers, self.queue_size
+        )
+        stage_metrics = await pipeline.run_async(track_jobs())
+        carb.log_info(f"Batch export of {label}: {len(self.jobs)} USD file(s)")
+
+        report = self.summary(label, time.time() - start_time)
+        report["stages"] = stage_metrics
+        report_folder = os.path.dirname(report_path)
+        if report_folder:
+            os.makedirs(report_folder, exist_ok=True)
+        if get_tracer().enabled:
+            report["trace"] = os.path.splitext(report_path)[0] + ".trace.json"
+            get_tracer().write(report["trace"], since=trace_start)
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        carb.log_info(
+            f"Batch export of {label} finished: {report['succeeded']} succeeded, "
+            f"{report['failed']} failed, report written to {report_path}"
+        )
+        return report
+
+    def summary(self, folder_path, duration):
+        counts = {}
+        for job in self.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "folder": folder_path,
+            "total": len(self.jobs),
+            "succeeded": counts.get(BatchJobStatus.SUCCEEDED, 0),
+            "failed": counts.get(BatchJobStatus.FAILED, 0),
+            "cancelled": counts.get(BatchJobStatus.CANCELLED, 0),
+            "duration": round(duration, 3),
+            "jobs": [job.to_dict() for job in self.jobs],
+        }
+
+    def _set_status(self, job, status, error=None):
+        job.status = status
+        if error:
+            job.error = error
+        if self._status_fn:
+            self._status_fn(job)
+
+    async def _with_retries(self, job, attempts_attr, stage_fn):
+        while getattr(job, attempts_attr) <= self.max_retries and not self._is_cancelled(job):
+            setattr(job, attempts_attr, getattr(job, attempts_attr) + 1)
+            try:
+                await stage_fn()
+                return True
+            except Exception as e:
+                carb.log_warn(f"Batch job {job.relative_path} {attempts_attr} {getattr(job, attempts_attr)} failed: {e}")
+                job.error = str(e)
+                if getattr(job, attempts_attr) <= self.max_retries and not self._is_cancelled(job):
+                    await asyncio.sleep(min(self.retry_delay * 2 ** (getattr(job, attempts_attr) - 1), 30))
+        return False
+
+    def _is_cancelled(self, job):
+        return self._cancelled or self.progress.is_cancelled(job.output_path)
+
+    def _finish_job(self, job, success):
+        job.end_time = time.time()
+        self.progress.finish(job.output_path, success)
+        progress = self.progress.get(job.output_path)
+        if progress:
+            job.peak_rss = progress.peak_rss
+        if success:
+            self._set_status(job, BatchJobStatus.SUCCEEDED)
+        elif self._is_cancelled(job):
+            self._set_status(job, BatchJobStatus.CANCELLED)
+        else:
+            self._set_status(job, BatchJobStatus.FAILED)
+        self._workspace.finish_job(job, success)
+
+    async def _convert_job(self, job):
+        if self._is_cancelled(job):
+            self._finish_job(job, False)
+            return False
+
+        async def convert():
+            self._set_status(job, BatchJobStatus.CONVERTING)
+
+            def progress_fn(progress):
+                job.progress = progress
+
+            if os.path.exists(job.output_path):
+                os.remove(job.output_path)
+            success = await self._exporter.export_file_async(
+                job.source_path, job.output_path, job.context, progress_fn
+            )
+            if not success:
+                raise RuntimeError(f"conversion of {job.source_path} failed")
+
+        job.start_time = time.time()
+        if not await self._with_retries(job, "attempts", convert):
+            self._finish_job(job, False)
+            return False
+        self._set_status(job, BatchJobStatus.CONVERTED)
+        return True
+
+    async def _upload_job(self, job):
+        async def upload():
+            self._set_status(job, BatchJobStatus.UPLOADING)
+            assets = [(job.target_name, job.output_path)] + [
+                (f"{job.target_name}_lod{level}", path) for level, path in self._exporter.lod_assets(job.output_path)
+            ]
+            if not await self.progress.upload_async(job.output_path, self._dw_tool, assets):
+                raise RuntimeError(f"upload of {job.target_name} failed")
+
+        success = await self._with_retries(job, "upload_attempts", upload)
+        self._finish_job(job, success)
+        return success
@@ -0,0 +1,42 @@
+import threading
+from pxr import Tf, Usd
+
+
+class ChangeTracker:
+    """Records the prims edited on a stage until they are taken by the next publish.
+
+    Args:
+        stage (Usd.Stage): Stage to listen to.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._listener = Tf.Notice.Register(Usd.Notice.ObjectsChanged, self._on_objects_changed, stage)
+
+    def stop(self):
+        if self._listener:
+            self._listener.Revoke()
+            self._listener = None
+        self.stage = None
+
+    def has_changes(self):
+        with self._lock:
+            return bool(self._dirty)
+
+    def take_dirty(self):
+        """Returns the paths of the prims edited since the last call and forgets them."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def restore_dirty(self, paths):
+        """Puts back paths whose publish failed, so the next publish picks them up again."""
+        with self._lock:
+            self._dirty.update(paths)
+
+    def _on_objects_changed(self, notice, sender):
+        paths = list(notice.GetResyncedPaths()) + list(notice.GetChangedInfoOnlyPaths())
+        with self._lock:
+            self._dirty.update(path.GetAbsoluteRootOrPrimPath() for path in paths)
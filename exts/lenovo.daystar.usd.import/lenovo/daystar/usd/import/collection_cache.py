@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import shutil
+import asyncio
+import hashlib
+import threading
+import carb
+import omni.client
+from pxr import Sdf, UsdUtils
+
+MANIFEST = "manifest.json"
+
+
+def mirror_path(path):
+    """Returns the path of a dependency inside a collection workspace.
+
+    The folders of the source are kept, under a folder per scheme and server or drive, so relative
+    references between collected files, e.g. MDL imports, still resolve.
+    """
+    path = path.replace("\\", "/")
+    scheme, separator, rest = path.partition("://")
+    if not separator:
+        scheme, rest = "file", path
+    rest = rest.split("?", 1)[0]
+    parts = [part.replace(":", "") for part in rest.split("/") if part not in ("", ".", "..")]
+    return "/".join(["files", scheme] + parts)
+
+
+class CollectionCache:
+    """Persistent collected copies of source stages, updated incrementally.
+
+    Each source stage gets a workspace folder with a copy of its layers and assets. The manifest of
+    the workspace records the stamp of every source file and of its copy, so a collect only copies
+    the dependencies that changed since the last one, on either side. Asset paths of the copied
+    layers that point to other collected files are made relative. Workspaces are evicted least
+    recently used first once the cache grows over `max_size` bytes.
+
+    Args:
+        cache_dir (str): Folder of the workspaces.
+        max_size (int): Maximum total size of the workspaces in bytes.
+    """
+
+    def __init__(self, cache_dir, max_size):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._workspace_locks = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def workspace_path(self, usd_path):
+        key = hashlib.sha1(usd_path.replace("\\", "/").encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, key).replace("\\", "/")
+
+    def lock(self, usd_path):
+        """Returns the lock to hold while the workspace of usd_path is collected and used."""
+        workspace = self.workspace_path(usd_path)
+        with self._lock:
+            if workspace not in self._workspace_locks:
+                self._workspace_locks[workspace] = asyncio.Lock()
+            return self._workspace_locks[workspace]
+
+    async def collect_async(self, usd_path):
+        """Brings the workspace of usd_path up to date and returns the path of its collected root layer.
+
+        Layers are only read on the calling thread, the main thread, which may be editing them: their
+        dependencies are computed and the changed ones are copied to anonymous layers there. The
+        stamps, the copies of the files and the manifest are handled in the background. Dirty layers
+        are collected as they are in memory.
+        """
+        loop = asyncio.get_event_loop()
+        start_time = time.time()
+        root_layer = Sdf.Layer.FindOrOpen(usd_path)
+        if not root_layer:
+            raise RuntimeError(f"failed to open {usd_path}")
+        layers, assets, _ = UsdUtils.ComputeAllDependencies(usd_path)
+        layers = {self._normalize(layer.identifier): layer for layer in layers}
+        dirty = {source for source, layer in layers.items() if layer.dirty}
+        root = self._normalize(root_layer.identifier)
+        plan = await loop.run_in_executor(None, self._plan, usd_path, root, set(layers.keys()), dirty, assets)
+
+        workspace, mapping = plan["workspace"], plan["mapping"]
+        snapshots = {}
+        for source in plan["changed"]:
+            if source in layers:
+                target = os.path.join(workspace, mapping[source]).replace("\\", "/")
+                snapshots[source] = self._snapshot_layer(layers[source], target, workspace, mapping)
+        collected_file, copied_layers = await loop.run_in_executor(None, self._write, plan, snapshots, start_time)
+        # Layers of the previous collect that are still open would hide the new copies.
+        for path in copied_layers:
+            layer = Sdf.Layer.Find(path)
+            if layer:
+                layer.Reload(True)
+        return collected_file
+
+    def _plan(self, usd_path, root, layer_sources, dirty, assets):
+        """Returns the sources of usd_path, their paths in the workspace and the ones changed since the last collect."""
+        workspace = self.workspace_path(usd_path)
+        manifest = self._load_manifest(workspace)
+        sources = set(layer_sources)
+        for asset in assets:
+            sources.add(self._normalize(asset))
+            if asset.lower().endswith(".mdl"):
+                sources.update(self._sibling_modules(asset))
+        mapping = {source: mirror_path(source) for source in sources}
+
+        files = manifest["files"]
+        stamps = {}
+        changed = []
+        for source in sorted(sources):
+            target = os.path.join(workspace, mapping[source]).replace("\\", "/")
+            stamps[source] = self._source_stamp(source)
+            entry = files.get(source)
+            if (
+                entry
+                and entry["source"] == stamps[source]
+                and entry["copy"] == self._copy_stamp(target)
+                and source not in dirty
+            ):
+                continue
+            changed.append(source)
+        return {
+            "source": usd_path,
+            "root": root,
+            "workspace": workspace,
+            "manifest": manifest,
+            "sources": sources,
+            "mapping": mapping,
+            "stamps": stamps,
+            "changed": changed,
+        }
+
+    def _write(self, plan, snapshots, start_time):
+        """Writes the changed files of plan to its workspace, returns (collected root layer, copied layer paths).
+
+        Layers are written from their snapshots, the other files are copied from their source.
+        """
+        workspace, mapping, manifest = plan["workspace"], plan["mapping"], plan["manifest"]
+        files = manifest["files"]
+        copied = []
+        copied_layers = []
+        copied_size = 0
+        for source in plan["changed"]:
+            target = os.path.join(workspace, mapping[source]).replace("\\", "/")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if source in snapshots:
+                if not snapshots[source].Export(target):
+                    raise RuntimeError(f"failed to write {target}")
+                copied_layers.append(target)
+            elif omni.client.copy(source, target, behavior=omni.client.CopyBehavior.OVERWRITE) != omni.client.Result.OK:
+                carb.log_warn(f"Failed to collect {source}")
+                files.pop(source, None)
+                continue
+            files[source] = {"path": mapping[source], "source": plan["stamps"][source], "copy": self._copy_stamp(target)}
+            copied.append(source)
+            copied_size += os.path.getsize(target)
+
+        for source in list(files.keys()):
+            if source not in plan["sources"]:
+                stale = os.path.join(workspace, files.pop(source)["path"])
+                if os.path.isfile(stale):
+                    os.remove(stale)
+
+        manifest["source"] = plan["source"]
+        manifest["last_used"] = time.time()
+        self._save_manifest(workspace, manifest)
+        self.stats = {
+            "files": len(plan["sources"]),
+            "copied": len(copied),
+            "copied_size": copied_size,
+            "duration": round(time.time() - start_time, 3),
+        }
+        carb.log_info(f"Collected {plan['source']} into {workspace}: {self.stats}")
+        self._evict(workspace)
+        return os.path.join(workspace, mapping[plan["root"]]).replace("\\", "/"), copied_layers
+
+    def _normalize(self, path):
+        return path.replace("\\", "/")
+
+    def _sibling_modules(self, mdl_path):
+        """MDL modules may import the modules next to them, which are not reported as dependencies."""
+        folder = os.path.dirname(mdl_path.replace("\\", "/"))
+        result, entries = omni.client.list(folder)
+        if result != omni.client.Result.OK:
+            return []
+        return [
+            f"{folder}/{entry.relative_path}" for entry in entries if entry.relative_path.lower().endswith(".mdl")
+        ]
+
+    def _source_stamp(self, path):
+        result, entry = omni.client.stat(path)
+        if result != omni.client.Result.OK:
+            return "missing"
+        return f"{entry.size}|{entry.modified_time}|{getattr(entry, 'hash', '')}"
+
+    def _copy_stamp(self, path):
+        if not os.path.isfile(path):
+            return "missing"
+        stat = os.stat(path)
+        return f"{stat.st_size}|{stat.st_mtime_ns}"
+
+    def _snapshot_layer(self, layer, target, workspace, mapping):
+        """Returns an anonymous copy of layer to write to target, its asset paths to collected files made relative."""
+        copy = Sdf.Layer.CreateAnonymous(os.path.basename(target))
+        copy.TransferContent(layer)
+        target_folder = os.path.dirname(target)
+
+        def remap(asset_path):
+            if not asset_path:
+                return asset_path
+            source = self._normalize(layer.ComputeAbsolutePath(asset_path))
+            if source not in mapping:
+                return asset_path
+            collected = os.path.join(workspace, mapping[source])
+            return "./" + os.path.relpath(collected, target_folder).replace("\\", "/")
+
+        UsdUtils.ModifyAssetPaths(copy, remap)
+        return copy
+
+    def _load_manifest(self, workspace):
+        try:
+            with open(os.path.join(workspace, MANIFEST), "r") as f:
+                manifest = json.load(f)
+            if isinstance(manifest.get("files"), dict):
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {"files": {}}
+
+    def _save_manifest(self, workspace, manifest):
+        os.makedirs(workspace, exist_ok=True)
+        tmp_path = os.path.join(workspace, MANIFEST + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(workspace, MANIFEST))
+
+    def _evict(self, current_workspace):
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.cache_dir):
+            workspace = os.path.join(self.cache_dir, name).replace("\\", "/")
+            if not os.path.isdir(workspace):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(folder, file_name))
+                for folder, _, file_names in os.walk(workspace)
+                for file_name in file_names
+            )
+            total_size += size
+            with self._lock:
+                lock = self._workspace_locks.get(workspace)
+            if workspace == current_workspace or (lock and lock.locked()):
+                continue
+            entries.append((self._load_manifest(workspace).get("last_used", 0), size, workspace))
+        entries.sort()
+        while entries and total_size > self.max_size:
+            _, size, workspace = entries.pop(0)
+            carb.log_info(f"Collection cache evict {workspace}")
+            shutil.rmtree(workspace, ignore_errors=True)
+            total_size -= size
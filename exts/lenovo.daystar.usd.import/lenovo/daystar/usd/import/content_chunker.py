@@ -0,0 +1,84 @@
+import hashlib
+import numpy as np
+
+
+# Random 32-bit values of the gear hash. Fixed, so every client cuts a file at the same boundaries.
+_GEAR = np.random.RandomState(0x44570001).randint(0, 2 ** 32, size=256, dtype=np.uint64).astype(np.uint32)
+# The gear hash of a byte only depends on the last _WINDOW bytes, the bits of older ones are shifted out.
+_WINDOW = 32
+
+
+class ContentChunker:
+    """Cuts files in chunks at boundaries defined by their content, so an edit only changes the chunks around it.
+
+    A gear rolling hash of the last 32 bytes is computed at every byte with NumPy, a block of the
+    file at a time, and a chunk ends where its top bits are all zero. Chunks are avg_size long on
+    average, never shorter than min_size and never longer than max_size. Inserting or removing
+    bytes moves the following boundaries with the content, so the chunks after the edit keep
+    their hashes, unlike fixed size chunks.
+
+    Args:
+        min_size (int): Minimum size of a chunk, except the last one.
+        avg_size (int): Average size of a chunk, rounded down to a power of two.
+        max_size (int): Maximum size of a chunk.
+        block_size (int): Number of bytes hashed at a time.
+    """
+
+    def __init__(self, min_size=64 * 1024, avg_size=256 * 1024, max_size=1024 * 1024, block_size=8 * 1024 * 1024):
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.block_size = max(_WINDOW, block_size)
+        bits = max(1, int(avg_size).bit_length() - 1)
+        # Candidates are found every 2 ** bits bytes on average.
+        self._mask = np.uint32(((1 << bits) - 1) << (32 - bits))
+
+    def boundaries(self, path):
+        """Returns the end offsets of the chunks of the file at path."""
+        candidates = []
+        total = 0
+        history = np.zeros(_WINDOW - 1, dtype=np.uint32)
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(self.block_size)
+                if not block:
+                    break
+                gears = np.concatenate((history, _GEAR[np.frombuffer(block, dtype=np.uint8)]))
+                hashes = self._gear_hashes(gears)[_WINDOW - 1 :]
+                candidates.append(np.flatnonzero((hashes & self._mask) == 0) + total + 1)
+                history = gears[-(_WINDOW - 1) :]
+                total += len(block)
+        ends = np.concatenate(candidates) if candidates else np.zeros(0, dtype=np.int64)
+
+        boundaries = []
+        start = 0
+        while start < total:
+            i = np.searchsorted(ends, start + self.min_size)
+            if i < len(ends) and ends[i] - start <= self.max_size:
+                end = int(ends[i])
+            else:
+                end = min(start + self.max_size, total)
+            boundaries.append(end)
+            start = end
+        return boundaries
+
+    def manifest(self, path):
+        """Returns the chunk manifest of the file at path, its size, SHA-256 and [SHA-256, size] of every chunk."""
+        chunks = []
+        file_hash = hashlib.sha256()
+        start = 0
+        with open(path, "rb") as f:
+            for end in self.boundaries(path):
+                data = f.read(end - start)
+                file_hash.update(data)
+                chunks.append([hashlib.sha256(data).hexdigest(), end - start])
+                start = end
+        return {"version": 1, "size": start, "sha256": file_hash.hexdigest(), "chunks": chunks}
+
+    def _gear_hashes(self, gears):
+        """Returns hash[i] = sum(gears[i - k] << k for k < 32) for every i, by doubling the window 5 times."""
+        hashes = gears.copy()
+        width = 1
+        while width < _WINDOW:
+            hashes[width:] += hashes[:-width] << np.uint32(width)
+            width *= 2
+        return hashes
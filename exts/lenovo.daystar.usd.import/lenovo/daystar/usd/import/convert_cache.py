@@ -0,0 +1,122 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+import carb
+import omni.client
+from pxr import Usd, UsdUtils
+
+
+class ConvertCache:
+    """On-disk cache of converted files, keyed by a fingerprint of the source and the export settings.
+
+    The fingerprint covers the root layer and every layer and asset it depends on. Saved files
+    contribute their size, modification time and server hash, while dirty or anonymous layers of
+    an open stage contribute their content, so unsaved edits never hit a stale entry. Entries are
+    evicted least recently used first once the cache grows over `max_size` bytes.
+
+    Args:
+        cache_dir (str): Folder of the cached files.
+        max_size (int): Maximum total size of the cached files in bytes.
+    """
+
+    def __init__(self, cache_dir, max_size):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_stage_key(self, stage: Usd.Stage, asset_converter_context, output_path, extra_settings=None):
+        hasher = hashlib.sha1()
+        root_layer = stage.GetRootLayer()
+        layers = set(stage.GetUsedLayers())
+        layers.add(stage.GetSessionLayer())
+        if not root_layer.anonymous:
+            self._hash_dependencies(hasher, root_layer.identifier)
+        for layer in sorted(layers, key=lambda l: l.identifier):
+            if layer.dirty or layer.anonymous:
+                hasher.update(layer.identifier.encode("utf-8"))
+                hasher.update(layer.ExportToString().encode("utf-8"))
+        self._hash_settings(hasher, asset_converter_context, output_path, extra_settings)
+        return hasher.hexdigest()
+
+    def make_path_key(self, usd_path, asset_converter_context, output_path, extra_settings=None):
+        hasher = hashlib.sha1()
+        self._hash_dependencies(hasher, usd_path)
+        self._hash_settings(hasher, asset_converter_context, output_path, extra_settings)
+        return hasher.hexdigest()
+
+    def fetch(self, key, output_path):
+        """Copies the cached file of key to output_path, returns False on a cache miss.
+
+        The copy is made under the lock, so a concurrent store can't evict the entry halfway.
+        """
+        cached_path = self._cached_path(key, output_path)
+        with self._lock:
+            if not os.path.exists(cached_path):
+                return False
+            try:
+                # Touch the entry so it's the most recently used one.
+                os.utime(cached_path)
+                shutil.copyfile(cached_path, output_path)
+            except OSError as e:
+                carb.log_warn(f"Failed to restore {output_path} from the convert cache: {e}")
+                return False
+        carb.log_info(f"Convert cache hit {key} -> {output_path}")
+        return True
+
+    def store(self, key, output_path):
+        if not os.path.exists(output_path):
+            return
+        cached_path = self._cached_path(key, output_path)
+        tmp_path = cached_path + ".tmp"
+        shutil.copyfile(output_path, tmp_path)
+        with self._lock:
+            os.replace(tmp_path, cached_path)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            for name in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def _cached_path(self, key, output_path):
+        _, ext = os.path.splitext(output_path)
+        return os.path.join(self.cache_dir, key + ext.lower())
+
+    def _evict(self):
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+        entries.sort()
+        while entries and total_size > self.max_size:
+            _, size, path = entries.pop(0)
+            carb.log_info(f"Convert cache evict {path}")
+            os.remove(path)
+            total_size -= size
+
+    def _hash_dependencies(self, hasher, usd_path):
+        layers, assets, unresolved = UsdUtils.ComputeAllDependencies(usd_path)
+        paths = [layer.identifier for layer in layers] + list(assets) + list(unresolved)
+        for path in sorted(set(paths)):
+            result, entry = omni.client.stat(path)
+            if result == omni.client.Result.OK:
+                stamp = f"{path}|{entry.size}|{entry.modified_time}|{getattr(entry, 'hash', '')}"
+            else:
+                stamp = f"{path}|missing"
+            hasher.update(stamp.encode("utf-8"))
+
+    def _hash_settings(self, hasher, asset_converter_context, output_path, extra_settings):
+        settings = asset_converter_context.to_dict() if asset_converter_context else {}
+        if extra_settings:
+            settings = {"converter": settings, "extra": extra_settings}
+        _, ext = os.path.splitext(output_path)
+        hasher.update(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+        hasher.update(ext.lower().encode("utf-8"))
@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import hashlib
+import carb
+from pxr import Sdf, Usd, UsdGeom, UsdShade
+from .utils import Utils
+from .pipeline import ExportPipeline
+from .change_tracker import ChangeTracker
+
+
+class DeltaExporter:
+    """Publishes a stage as one asset per top-level prim plus an assembly manifest, re-exporting only what changed.
+
+    The parts of a stage are the children of its default prim, or its root prims, that contain
+    geometry. Each part is converted from a stage masked to the part and to what it targets, e.g.
+    its materials. From the first publish on, the edits of the stage are tracked and the next
+    publish only converts the parts they affect. Parts whose converted file didn't change are not
+    uploaded again. The manifest of the last publish is kept in `state_dir`.
+
+    Args:
+        exporter (Exporter): Exporter used to convert the parts.
+        dw_tool (DWTool): Logged in DWTool used to upload the parts and the manifest.
+        workspace (StagingWorkspace): Workspace of the part staging folders.
+        state_dir (str): Folder of the manifests of the published stages.
+    """
+
+    def __init__(self, exporter, dw_tool, workspace, state_dir):
+        self._exporter = exporter
+        self._dw_tool = dw_tool
+        self._workspace = workspace
+        self.state_dir = state_dir
+        self._trackers = {}
+        self._publishing = False
+        os.makedirs(state_dir, exist_ok=True)
+
+    def is_publishing(self):
+        return self._publishing
+
+    def stop_tracking(self):
+        for tracker in self._trackers.values():
+            tracker.stop()
+        self._trackers = {}
+
+    @staticmethod
+    def find_parts(stage):
+        """Returns the paths of the top-level prims of stage that contain geometry."""
+        parent = stage.GetDefaultPrim() or stage.GetPseudoRoot()
+        parts = []
+        for child in parent.GetChildren():
+            it = iter(Usd.PrimRange(child))
+            for prim in it:
+                if prim.IsA(UsdShade.Material):
+                    it.PruneChildren()
+                elif prim.IsA(UsdGeom.Boundable):
+                    parts.append(child.GetPath())
+                    break
+        return parts
+
+    def manifest_path(self, stage):
+        key = hashlib.sha1(stage.GetRootLayer().identifier.replace("\\", "/").encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.state_dir, f"{key}.json")
+
+    def load_manifest(self, stage):
+        try:
+            with open(self.manifest_path(stage), "r") as f:
+                manifest = json.load(f)
+            if isinstance(manifest.get("parts"), dict):
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return None
+
+    async def publish_async(self, stage, asset_name, asset_converter_context):
+        """Converts and uploads the parts of stage changed since its last publish, returns the publish report."""
+        if self._exporter.needs_collect(asset_converter_context):
+            raise RuntimeError("publishing changes doesn't support baked MDL materials or processed textures")
+        if self._publishing:
+            raise RuntimeError("a publish is already running")
+        self._publishing = True
+        try:
+            return await self._publish_async(stage, asset_name, asset_converter_context)
+        finally:
+            self._publishing = False
+
+    async def _publish_async(self, stage, asset_name, asset_converter_context):
+        start_time = time.time()
+        key = stage.GetRootLayer().identifier
+        tracker = self._trackers.get(key)
+        if tracker is None or tracker.stage != stage:
+            if tracker:
+                tracker.stop()
+            # Edits made while this publish runs are picked up by the next one.
+            tracker = self._trackers[key] = ChangeTracker(stage)
+            dirty_paths = None
+        else:
+            dirty_paths = tracker.take_dirty()
+
+        manifest = self.load_manifest(stage)
+        if manifest is None or manifest.get("asset") != asset_name:
+            manifest = {"asset": asset_name, "version": 0, "parts": {}, "uploaded": False}
+            dirty_paths = None
+        parts = self.find_parts(stage)
+        dirty_parts = self._affected_parts(parts, manifest["parts"], dirty_paths)
+        removed = [path for path in manifest["parts"] if Sdf.Path(path) not in parts]
+        carb.log_info(
+            f"Publishing {asset_name}: {len(dirty_parts)}/{len(parts)} part(s) changed, {len(removed)} removed"
+        )
+
+        jobs = []
+        for part in dirty_parts:
+            part_name = f"{asset_name}_{Utils.make_valid_identifier(part.name)}"
+            job = self._workspace.create_job(part_name, asset_converter_context, stage.GetRootLayer().identifier)
+            job.part_path = part
+            job.converted = False
+            job.uploaded = False
+            jobs.append(job)
+        report = {"asset": asset_name, "parts": len(parts), "converted": 0, "uploaded": 0, "failed": 0}
+
+        async def convert(job):
+            masked_stage = Usd.Stage.OpenMasked(
+                stage.GetRootLayer(), stage.GetSessionLayer(), Usd.StagePopulationMask([job.part_path])
+            )
+            # Brings in the materials and other prims the part targets.
+            masked_stage.ExpandPopulationMask()
+            job.mask = [str(path) for path in masked_stage.GetPopulationMask().GetPaths()]
+            job.converted = await self._exporter.export_stage_async(masked_stage, job.output_path, job.context)
+            return job.converted
+
+        async def upload(job):
+            job.file_hash = Utils.hash_file(job.output_path)
+            entry = manifest["parts"].get(str(job.part_path))
+            if entry and entry.get("hash") == job.file_hash:
+                job.uploaded = True
+                return True
+            job.uploaded = await self._dw_tool.uploadAssetToDW(job.target_name, job.output_path)
+            if job.uploaded:
+                report["uploaded"] += 1
+            return job.uploaded
+
+        pipeline = ExportPipeline(convert, upload)
+        report["stages"] = await pipeline.run_async(jobs)
+
+        failed = []
+        for job in jobs:
+            if job.converted:
+                report["converted"] += 1
+            if job.uploaded:
+                manifest["parts"][str(job.part_path)] = {
+                    "asset": job.target_name,
+                    "hash": job.file_hash,
+                    "mask": job.mask,
+                    "updated": time.time(),
+                }
+            else:
+                failed.append(job.part_path)
+            self._workspace.finish_job(job, job.uploaded)
+        report["failed"] = len(failed)
+        if failed:
+            tracker.restore_dirty(failed)
+
+        for path in removed:
+            manifest["parts"].pop(path)
+        if report["uploaded"] or removed or not manifest.get("uploaded"):
+            manifest["version"] += 1
+            manifest["uploaded"] = await self._upload_manifest(manifest)
+        with open(self.manifest_path(stage), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        report["removed"] = len(removed)
+        report["version"] = manifest["version"]
+        report["duration"] = round(time.time() - start_time, 3)
+        carb.log_info(f"Published {asset_name}: {report}")
+        return report
+
+    def _affected_parts(self, parts, published_parts, dirty_paths):
+        """Returns the parts to convert: new ones, and ones whose prims or targets are in dirty_paths.
+
+        dirty_paths is None when the edits are unknown and every part has to be converted.
+        """
+        if dirty_paths is None:
+            return list(parts)
+        affected = []
+        for part in parts:
+            entry = published_parts.get(str(part))
+            if entry is None:
+                affected.append(part)
+                continue
+            mask = [Sdf.Path(path) for path in entry.get("mask", [str(part)])]
+            for dirty_path in dirty_paths:
+                # Edits above the part, e.g. on its parent transform, or inside of what it uses.
+                if part.HasPrefix(dirty_path) or any(dirty_path.HasPrefix(path) for path in mask):
+                    affected.append(part)
+                    break
+        return affected
+
+    async def _upload_manifest(self, manifest):
+        name = f"{manifest['asset']}_assembly"
+        job = self._workspace.create_job(name)
+        manifest_file = os.path.join(job.job_folder, f"{Utils.make_valid_identifier(name)}.json")
+        with open(manifest_file, "w") as f:
+            json.dump(
+                {
+                    "asset": manifest["asset"],
+                    "version": manifest["version"],
+                    "parts": [
+                        {"path": path, "asset": entry["asset"], "hash": entry["hash"]}
+                        for path, entry in sorted(manifest["parts"].items())
+                    ],
+                },
+                f,
+                indent=2,
+            )
+        uploaded = False
+        try:
+            uploaded = await self._dw_tool.uploadAssetToDW(name, manifest_file)
+        except Exception as e:
+            carb.log_error(f"Failed to upload the assembly manifest of {manifest['asset']}: {e}")
+        self._workspace.finish_job(job, uploaded)
+        return uploaded
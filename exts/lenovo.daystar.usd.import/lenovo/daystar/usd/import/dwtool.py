@@ -1,21 +1,140 @@
 import os
 import json
-import requests
+import time
+import random
+import asyncio
+import hashlib
+import threading
+import contextvars
+import email.utils
+import concurrent.futures
 import carb
 import omni
-import omni.kit.pipapi
-
-omni.kit.pipapi.install(
-    package="requests",
-    # version="2.13.0",
-    # sometimes module is different from package name, module is used for import check
-    module="requests",
-    # ignore_import_check=False,
-    # ignore_cache=False,
-    # use_online_index=True,
-    # surpress_output=False,
-    # extra_args=[]
-)
+from urllib.parse import urlparse
+from .upload_stream import MultipartFileEncoder, UploadCancelled
+from .tracing import get_tracer, Phase
+
+_requests_module = None
+
+
+def _requests():
+    """Returns the requests module, installed and imported on the first request instead of at startup."""
+    global _requests_module
+    if _requests_module is None:
+        import omni.kit.pipapi
+
+        omni.kit.pipapi.install(
+            package="requests",
+            # sometimes module is different from package name, module is used for import check
+            module="requests",
+        )
+        import requests
+        import requests.adapters
+
+        _requests_module = requests
+    return _requests_module
+
+
+class AssetIndex:
+    """Local name -> id index of the model assets on the Daystar World platform.
+
+    The index is filled page by page from `asset/contents/page`. A lookup only streams
+    as many pages as it needs to find the requested names and remembers where it stopped,
+    so the next lookup continues from there instead of listing everything again. Once the
+    whole listing has been seen, lookups are answered locally until `ttl` seconds pass.
+    A page that fails to load raises from the lookup and leaves the index as it was.
+    """
+
+    def __init__(self, page_size=200, ttl=300.0):
+        self.page_size = page_size
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._ids = {}
+            self._seen = set()
+            self._next_page = 1
+            self._complete = False
+            self._refreshed_at = 0.0
+
+    def is_fresh(self):
+        return self._complete and time.monotonic() - self._refreshed_at < self.ttl
+
+    def put(self, name, asset_id):
+        with self._lock:
+            self._ids[name] = asset_id
+
+    def discard(self, name):
+        with self._lock:
+            self._ids.pop(name, None)
+            # Not knowing the id anymore means a full listing can no longer answer a miss,
+            # the next lookup of a missing name lists the pages again from the first one.
+            self._complete = False
+            self._next_page = 1
+            self._seen = set()
+
+    def lookup(self, name, fetch_page):
+        return self.lookup_many([name], fetch_page).get(name, '')
+
+    def lookup_many(self, names, fetch_page):
+        """Returns a dict of name -> id for the names that exist remotely.
+
+        `fetch_page(current, size)` must return the `records` list of one page, and raise if
+        the page can't be loaded.
+        """
+        with self._lock:
+            wanted = set(names)
+            if not self.is_fresh() and self._complete:
+                # TTL expired, start a new pass but keep serving the ids we already know.
+                self._next_page = 1
+                self._complete = False
+                self._seen = set()
+
+            missing = set(n for n in wanted if n not in self._ids)
+            while missing and not self._complete:
+                missing -= self._load_next_page(fetch_page)
+
+            return {n: self._ids[n] for n in wanted if n in self._ids}
+
+    def refresh(self, fetch_page):
+        """Streams the remaining pages so the index covers the full listing."""
+        with self._lock:
+            if self.is_fresh():
+                return
+            if self._complete:
+                self._next_page = 1
+                self._complete = False
+                self._seen = set()
+            while not self._complete:
+                self._load_next_page(fetch_page)
+
+    def _load_next_page(self, fetch_page):
+        # Nothing is changed before the page loaded, a failed request leaves the index as it was.
+        records = fetch_page(self._next_page, self.page_size) or []
+        names = set()
+        for item in records:
+            name = item.get('name')
+            if name is None:
+                continue
+            self._ids[name] = item.get('id')
+            names.add(name)
+        self._seen |= names
+        self._next_page += 1
+        if len(records) < self.page_size:
+            # Drop names that disappeared remotely since the last full pass.
+            for name in list(self._ids.keys()):
+                if name not in self._seen:
+                    del self._ids[name]
+            self._complete = True
+            self._refreshed_at = time.monotonic()
+        return names
+
+
+# Statuses the platform returns when it's overloaded or briefly unavailable, worth retrying.
+RETRYABLE_STATUS = (408, 425, 429, 500, 502, 503, 504)
+
 
 class DWTool:
     _instance = None  
@@ -26,16 +145,200 @@ class DWTool:
         return cls._instance 
     
     def __init__(self):
+        # DWTool is a singleton, don't wipe the login and asset index when it's looked up again.
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
         carb.log_info(f"**********init**********")
         self.captchaCode = "3$2s"
         self.is_login = False
+        self.asset_index = AssetIndex()
+        # Files bigger than one chunk are uploaded chunk by chunk so a dropped connection
+        # only resends the chunk in flight.
+        self.chunk_size = 8 * 1024 * 1024
+        self.max_resume_attempts = 5
+        self._chunk_upload_supported = True
+        # Files of at least delta_min_size bytes are cut in content-defined chunks and only the
+        # chunks the platform doesn't have yet are sent, see ContentChunker.
+        self.delta_upload = True
+        self.delta_min_size = 1024 * 1024
+        self._delta_upload_supported = True
+        # Network calls run on a small worker pool sharing one keep-alive session, so the
+        # Kit main thread never blocks on I/O and connections are reused between calls.
+        self.max_concurrency = 4
+        self._http_session = None
+        self._executor = None
+        self._pool_lock = threading.Lock()
+        # Requests that hit rate limiting or transient errors are retried with jittered exponential
+        # backoff, honoring Retry-After. At most max_requests_per_host requests are in flight per host.
+        self.max_retries = 5
+        self.backoff_base = 0.5
+        self.backoff_cap = 30.0
+        self.max_requests_per_host = 4
+        self._host_slots = {}
+        self._login_lock = threading.Lock()
         # self.domain = "https://testng-starworld.lenovo-r.cloud:30007"
+
+    def set_max_concurrency(self, max_concurrency):
+        """Changes the number of concurrent requests, the pool and host limits are rebuilt on next use."""
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.close()
+
+    def close(self):
+        with self._pool_lock:
+            if self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            if self._http_session:
+                self._http_session.close()
+                self._http_session = None
+            self._host_slots = {}
+
+    def _session(self):
+        with self._pool_lock:
+            if not self._http_session:
+                session = _requests().Session()
+                adapter = _requests().adapters.HTTPAdapter(
+                    pool_connections=self.max_concurrency, pool_maxsize=self.max_concurrency
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._http_session = session
+            return self._http_session
+
+    def _host_slot(self, url):
+        host = urlparse(url).netloc
+        with self._pool_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_requests_per_host)
+            return self._host_slots[host]
+
+    def _classify(self, response):
+        """Returns "ok", "retry", "auth" or "fatal" for a response."""
+        code = response.status_code
+        if code == 200:
+            try:
+                # The platform reports most errors in the body with HTTP 200.
+                code = int(response.json().get("code", 200))
+            except (ValueError, AttributeError, TypeError):
+                code = 200
+        if code == 200:
+            return "ok"
+        if code == 401:
+            return "auth"
+        if code in RETRYABLE_STATUS:
+            return "retry"
+        return "fatal"
+
+    def _retry_delay(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                try:
+                    retry_date = email.utils.parsedate_to_datetime(retry_after)
+                    return min(max(retry_date.timestamp() - time.time(), 0.0), self.backoff_cap)
+                except (TypeError, ValueError):
+                    pass
+        # Full jitter, so concurrent publishers don't retry in lockstep.
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _refreshToken(self, used_token):
+        with self._login_lock:
+            if getattr(self, "token", None) != used_token:
+                # Another request already logged in again.
+                return True
+            carb.log_info(f"access token expired, logging in again...")
+            return self._loginSync(self.domain, self.userName, self.password)
+
+    def _refused(self, response):
+        """Returns True if the platform turned the request down without handling it, so it can be sent again."""
+        return response.status_code == 429 or (response.status_code == 503 and "Retry-After" in response.headers)
+
+    def _request(self, method, url, auth=True, idempotent=True, **kwargs):
+        """Sends a request to the platform, retrying transient failures and refreshing an expired token.
+
+        Returns the last response, whose body the caller checks as before. A request that isn't
+        idempotent, like adding an asset, may have been handled before it failed, so it's only
+        retried when it never reached the platform or was refused with 429 or 503 and Retry-After.
+        """
+        headers = dict(kwargs.pop("headers", None) or {})
+        refreshed = False
+        attempt = 0
+        while True:
+            token = getattr(self, "token", None)
+            if auth:
+                headers["Authorization"] = "Bearer " + token
+            try:
+                with self._host_slot(url):
+                    response = self._session().request(method, url, headers=headers, **kwargs)
+            except (_requests().exceptions.ConnectionError, _requests().exceptions.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                if not idempotent and not isinstance(e, _requests().exceptions.ConnectTimeout):
+                    raise
+                delay = self._retry_delay(attempt)
+                carb.log_warn(f"{method} {url} failed ({e}), retrying in {delay:.1f}s...")
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            kind = self._classify(response)
+            if kind == "auth" and auth and not refreshed and getattr(self, "password", None) is not None:
+                refreshed = True
+                if self._refreshToken(token):
+                    continue
+            if kind != "retry" or attempt >= self.max_retries:
+                return response
+            if not idempotent and not self._refused(response):
+                return response
+            delay = self._retry_delay(attempt, response)
+            carb.log_warn(f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s...")
+            attempt += 1
+            time.sleep(delay)
+
+    async def _run(self, fn, *args):
+        with self._pool_lock:
+            if not self._executor:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_concurrency, thread_name_prefix="DWTool"
+                )
+            executor = self._executor
+        # Runs fn in the context of the caller, so its trace spans belong to the caller's export job.
+        context = contextvars.copy_context()
+        return await asyncio.get_event_loop().run_in_executor(executor, context.run, fn, *args)
     
     def check_status(self):
         return self.is_login == True
 
-    def loginToDW(self,domain,user_name,pwd):
+    async def loginToDW(self,domain,user_name,pwd):
+        with get_tracer().span(Phase.LOGIN, domain=domain) as span:
+            success = await self._run(self._loginSync, domain, user_name, pwd)
+            span.set(success=success)
+        return success
+
+    async def getAssetByName(self,file_name):
+        return await self._run(self._getAssetByNameSync, file_name)
+
+    async def getAssetsByNames(self, file_names):
+        return await self._run(self._getAssetsByNamesSync, file_names)
+
+    async def uploadAssetToDW(self,file_name, targetfile, progress_fn=None, cancel_event=None):
+        """Uploads targetfile as `[ov]-{file_name}`, progress_fn is called on the event loop thread.
+
+        Setting cancel_event, a threading.Event, aborts the upload with UploadCancelled.
+        """
+        if progress_fn:
+            loop = asyncio.get_event_loop()
+            main_thread_progress_fn = progress_fn
+            progress_fn = lambda sent, total: loop.call_soon_threadsafe(main_thread_progress_fn, sent, total)
+        return await self._run(self._uploadAssetSync, file_name, targetfile, progress_fn, cancel_event)
+
+    def _loginSync(self,domain,user_name,pwd):
         carb.log_info(f"**********login**********")
+        if getattr(self, "domain", None) != domain:
+            self.asset_index.clear()
         self.domain = domain
         self.userName = user_name
         self.password = pwd
@@ -45,7 +348,7 @@ class DWTool:
         json_data = json_str.encode('utf-8')
         headers = {"Content-type": "application/json"}
         url = self.domain + "/platform/api/v1/auth/login"
-        response = requests.post(url, headers=headers, data=json_data)
+        response = self._request("POST", url, auth=False, headers=headers, data=json_data)
         data = json.loads(response.text)
         carb.log_info(response.text)
         if data["code"] != 200:
@@ -57,42 +360,282 @@ class DWTool:
         self.is_login = True
         return True
 
-    def getAssetByName(self,file_name):
+    def _fetchAssetPage(self, current, size):
+        url = f"{self.domain}/platform/api/v1/asset/contents/page?current={current}&size={size}&type_in=model&platform=windows"
+        response = self._request("GET", url)
+        try:
+            data = json.loads(response.text)
+        except ValueError:
+            data = None
+        # An empty list would read as the end of the listing, so failures raise instead.
+        if response.status_code != 200 or not isinstance(data, dict) or data.get("code", 200) != 200 \
+                or not isinstance(data.get("data"), dict):
+            carb.log_warn(f"getAssetPage {current} failed: {response.text}")
+            raise IOError(f"listing page {current} of the assets failed: {response.status_code}")
+        return data["data"].get("records") or []
+
+    def _getAssetByNameSync(self,file_name):
         carb.log_info(f"getAssetByName:{file_name}")
-        url = f"{self.domain}/platform/api/v1/asset/contents/page?current=1&size=99999&type_in=model&platform=windows"
-        headers = {"Authorization": "Bearer " + self.token}
-        response = requests.get(url, headers=headers)
-        carb.log_info(response.text)
-        data = json.loads(response.text)
-        if data and data["data"]["records"]:
-            for item in data["data"]["records"]:
-                if file_name == item['name']:
-                    return item['id']
-        return ''           
+        with get_tracer().span(Phase.ASSET_LOOKUP, names=1, cached=self.asset_index.is_fresh()):
+            return self.asset_index.lookup(file_name, self._fetchAssetPage)
+
+    def _getAssetsByNamesSync(self, file_names):
+        carb.log_info(f"getAssetsByNames:{len(file_names)} names")
+        with get_tracer().span(Phase.ASSET_LOOKUP, names=len(file_names), cached=self.asset_index.is_fresh()):
+            return self.asset_index.lookup_many(file_names, self._fetchAssetPage)
+
+    def _updateAssetIndex(self, file_name, asset_id, response):
+        try:
+            data = json.loads(response.text)
+        except ValueError:
+            data = None
+        if not data or data.get("code") != 200:
+            self.asset_index.discard(file_name)
+            return False
+        record = data.get("data")
+        if isinstance(record, dict) and record.get("id"):
+            asset_id = record["id"]
+        if asset_id:
+            self.asset_index.put(file_name, asset_id)
+        else:
+            # The platform didn't echo the new id back, look it up again next time.
+            self.asset_index.discard(file_name)
+        return True
         
-    def uploadAssetToDW(self,file_name, targetfile):
+    def _postStream(self, url, encoder, idempotent=True):
+        return self._request(
+            "POST", url, idempotent=idempotent, headers={"Content-Type": encoder.content_type}, data=encoder
+        )
+
+    def _postAsset(self, file_name, id, form_data, post):
+        """Adds the asset, or updates it if id is set, post(url, form_data, idempotent) sends the form.
+
+        Returns the response and the id of the asset. Adding isn't idempotent: before sending it
+        again after a failure, the asset is looked up, and updated if the platform added it anyway.
+        """
+        if id:
+            return post(self.domain + "/platform/api/v1/asset/contents/update", dict(form_data, id=id), True), id
+        url = self.domain + "/platform/api/v1/asset/contents/add"
+        attempt = 0
+        while True:
+            response = post(url, form_data, False)
+            if self._classify(response) != "retry" or attempt >= self.max_retries:
+                return response, id
+            self.asset_index.discard(file_name)
+            try:
+                asset_id = self._getAssetByNameSync(file_name)
+            except (_requests().exceptions.ConnectionError, _requests().exceptions.Timeout, IOError) as e:
+                carb.log_error(f"Failed to look up {file_name} after a failed add, not adding it again: {e}")
+                return response, id
+            if asset_id:
+                carb.log_warn(f"{file_name} was added before the request failed, updating it")
+                return self._postAsset(file_name, asset_id, form_data, post)
+            delay = self._retry_delay(attempt, response)
+            carb.log_warn(f"POST {url} returned {response.status_code}, retrying in {delay:.1f}s...")
+            attempt += 1
+            time.sleep(delay)
+
+    def _getUploadedOffset(self, upload_id):
+        """Returns the offset the platform acknowledged for upload_id, None if it's unknown or not supported."""
+        url = self.domain + "/platform/api/v1/asset/contents/chunk"
+        response = self._request("GET", url, params={'uploadId': upload_id})
+        if response.status_code != 200:
+            return None
+        try:
+            data = json.loads(response.text)
+            if data["code"] != 200:
+                return None
+            return int(data["data"]["offset"])
+        except (ValueError, TypeError, KeyError):
+            # e.g. the HTML error page of a proxy.
+            carb.log_warn(f"unexpected upload offset response: {response.text[:200]}")
+            return None
+
+    def _uploadChunks(self, upload_id, file_name, targetfile, progress_fn, cancel_event=None):
+        """Sends targetfile chunk by chunk, resuming from the last offset acknowledged by the server.
+
+        Returns False when the platform doesn't support chunked uploads.
+        """
+        total = os.path.getsize(targetfile)
+        url = self.domain + "/platform/api/v1/asset/contents/chunk"
+        failures = 0
+        offset = self._getUploadedOffset(upload_id)
+        if offset is None:
+            return False
+        if offset:
+            carb.log_info(f"resume upload of {file_name} from byte {offset}/{total}")
+
+        while offset < total:
+            fields = {'uploadId': upload_id, 'name': file_name, 'offset': offset, 'total': total}
+            chunk_progress = None
+            if progress_fn:
+                chunk_progress = lambda sent, _, base=offset: progress_fn(base + sent, total)
+            encoder = MultipartFileEncoder(
+                fields, 'dataFile', targetfile, offset=offset, length=self.chunk_size, progress_fn=chunk_progress,
+                cancel_event=cancel_event,
+            )
+            try:
+                response = self._postStream(url, encoder)
+                data = json.loads(response.text)
+                if data["code"] != 200:
+                    raise IOError(response.text)
+                acked = int(data["data"]["offset"])
+            except (
+                _requests().exceptions.ConnectionError, _requests().exceptions.Timeout, IOError, ValueError, TypeError,
+                KeyError,
+            ) as e:
+                failures += 1
+                if failures > self.max_resume_attempts:
+                    raise
+                carb.log_warn(f"upload chunk of {file_name} at {offset} failed ({e}), retrying...")
+                time.sleep(min(2 ** failures * 0.5, 10.0))
+                # Ask the server how far it got, the chunk may have been stored before the drop.
+                try:
+                    acked = self._getUploadedOffset(upload_id)
+                except (_requests().exceptions.ConnectionError, _requests().exceptions.Timeout) as e:
+                    carb.log_warn(f"upload offset of {file_name} is unknown ({e}), resending from {offset}")
+                    acked = None
+                offset = acked if acked is not None else offset
+                continue
+            if acked <= offset:
+                # The chunk was accepted but not stored, sending it again would loop forever.
+                raise IOError(f"upload of {file_name} made no progress at byte {offset}/{total}")
+            offset = acked
+            failures = 0
+
+        return True
+
+    def _getMissingBlobs(self, hashes):
+        """Returns the hashes the platform has no chunk of, None when it doesn't support delta uploads."""
+        url = self.domain + "/platform/api/v1/asset/contents/blobs/missing"
+        response = self._request("POST", url, json={"hashes": hashes})
+        if response.status_code in (404, 405, 501):
+            return None
+        try:
+            data = json.loads(response.text)
+            if data["code"] != 200:
+                raise IOError(response.text)
+            return set(data["data"]["missing"])
+        except (ValueError, TypeError, KeyError):
+            # Not an answer of a platform that supports delta uploads, e.g. the HTML error page of a proxy.
+            carb.log_warn(f"unexpected missing blobs response: {response.text[:200]}")
+            return None
+
+    def _uploadDelta(self, file_name, targetfile, progress_fn, cancel_event=None):
+        """Sends the chunks of targetfile the platform doesn't have yet, returns the chunk manifest.
+
+        Runs of consecutive missing chunks go in one request of up to chunk_size bytes. Returns
+        None when the platform doesn't support delta uploads.
+        """
+        from .content_chunker import ContentChunker
+
+        manifest = ContentChunker().manifest(targetfile)
+        missing = self._getMissingBlobs(sorted({chunk_hash for chunk_hash, _ in manifest["chunks"]}))
+        if missing is None:
+            return None
+        url = self.domain + "/platform/api/v1/asset/contents/blobs"
+        total = manifest["size"]
+        sent = 0
+        run = []
+        run_offset = 0
+
+        def send_run():
+            size = sum(chunk_size for _, chunk_size in run)
+            run_progress = None
+            if progress_fn:
+                run_progress = lambda run_sent, _, base=run_offset: progress_fn(base + run_sent, total)
+            encoder = MultipartFileEncoder(
+                {'chunks': json.dumps(run)}, 'dataFile', targetfile, offset=run_offset, length=size,
+                progress_fn=run_progress, cancel_event=cancel_event,
+            )
+            response = self._postStream(url, encoder)
+            data = json.loads(response.text)
+            if data["code"] != 200:
+                raise IOError(response.text)
+            return size
+
+        offset = 0
+        for chunk_hash, chunk_size in manifest["chunks"]:
+            if chunk_hash in missing:
+                missing.discard(chunk_hash)
+                if run and offset - run_offset + chunk_size > self.chunk_size:
+                    sent += send_run()
+                    run = []
+                if not run:
+                    run_offset = offset
+                run.append([chunk_hash, chunk_size])
+            else:
+                # Already on the platform, or sent earlier in this file.
+                if run:
+                    sent += send_run()
+                    run = []
+                if progress_fn:
+                    progress_fn(offset + chunk_size, total)
+            offset += chunk_size
+        if run:
+            sent += send_run()
+        carb.log_info(f"delta upload of {file_name}: sent {sent} of {total} bytes in {len(manifest['chunks'])} chunks")
+        return manifest, sent
+
+    def _uploadAssetSync(self,file_name, targetfile, progress_fn=None, cancel_event=None):
         # file_name = os.path.basename(targetfile)
         # file_name, _ = os.path.splitext(file_name)
         file_name = f'[ov]-{file_name}'
         carb.log_info(f"filename:" + file_name)
         if not os.path.exists(targetfile):
             carb.log_info(f"**********file is not exit**********" + targetfile)
-            return
+            return False
         
-        headers = {"Authorization": "Bearer " + self.token}
-        id = self.getAssetByName(file_name)
+        try:
+            id = self._getAssetByNameSync(file_name)
+        except (_requests().exceptions.ConnectionError, _requests().exceptions.Timeout, IOError) as e:
+            # Without knowing whether the asset exists, adding it could create a duplicate.
+            carb.log_error(f"Failed to look up {file_name}, not uploading it: {e}")
+            return False
+        if cancel_event and cancel_event.is_set():
+            raise UploadCancelled(f"upload of {file_name} cancelled")
         if not id == '':
             # 更新逻辑
             carb.log_info(f"**********update_asset**********")
-            url = self.domain + "/platform/api/v1/asset/contents/update"
-            form_data = {'name': file_name, 'type': 'model','id':id}
         else:
             # 新增逻辑
             carb.log_info(f"**********upload_asset**********")
-            url = self.domain + "/platform/api/v1/asset/contents/add"
-            form_data = {'name': file_name, 'type': 'model'}
+        form_data = {'name': file_name, 'type': 'model'}
+
+        def post_form(url, data, idempotent):
+            return self._request("POST", url, idempotent=idempotent, data=data)
+
+        def post_file(url, data, idempotent):
+            encoder = MultipartFileEncoder(data, 'dataFile', targetfile, progress_fn=progress_fn, cancel_event=cancel_event)
+            return self._postStream(url, encoder, idempotent)
        
-        files = {'dataFile': open(targetfile, 'rb')}
-        response = requests.post(url, headers=headers,
-                                 data=form_data, files=files)
-        carb.log_info(response.text)
+        with get_tracer().span(Phase.UPLOAD, asset=file_name, bytes_out=os.path.getsize(targetfile)) as span:
+            response = None
+            delta = None
+            if self.delta_upload and self._delta_upload_supported and os.path.getsize(targetfile) >= self.delta_min_size:
+                delta = self._uploadDelta(file_name, targetfile, progress_fn, cancel_event)
+                if delta is None:
+                    carb.log_info(f"delta upload is not supported, sending whole files")
+                    self._delta_upload_supported = False
+            if delta is not None:
+                manifest, sent = delta
+                form_data['manifest'] = json.dumps(manifest)
+                span.set(delta=True, bytes_out=sent, bytes_reused=manifest["size"] - sent)
+                response, id = self._postAsset(file_name, id, form_data, post_form)
+            elif self._chunk_upload_supported and os.path.getsize(targetfile) > self.chunk_size:
+                stat = os.stat(targetfile)
+                upload_id = hashlib.sha1(f"{file_name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8")).hexdigest()
+                if self._uploadChunks(upload_id, file_name, targetfile, progress_fn, cancel_event):
+                    form_data['uploadId'] = upload_id
+                    span.set(chunked=True)
+                    response, id = self._postAsset(file_name, id, form_data, post_form)
+                else:
+                    carb.log_info(f"chunked upload is not supported, falling back to a single request")
+                    self._chunk_upload_supported = False
+
+            if response is None:
+                response, id = self._postAsset(file_name, id, form_data, post_file)
+            carb.log_info(response.text)
+            success = self._updateAssetIndex(file_name, id, response)
+            span.set(success=success)
+            return success
@@ -0,0 +1,83 @@
+import os
+import time
+import uuid
+import shutil
+import threading
+import carb
+from .utils import Utils
+
+
+class CleanupPolicy:
+    ALWAYS = "always"
+    ON_SUCCESS = "on_success"
+    NEVER = "never"
+
+
+class ExportJob:
+    """One export of a stage or file to Daystar World, with its own staging folder.
+
+    Args:
+        job_folder (str): Staging folder of this job, the converted file is written in it.
+        target_name (str): Asset name used for the upload.
+        context (AssetConverterContext): Converter settings of this job.
+        source_path (str): Path of the exported USD file, if any.
+    """
+
+    def __init__(self, job_folder, target_name, context=None, source_path=None):
+        self.job_id = os.path.basename(job_folder)
+        self.job_folder = job_folder
+        self.target_name = target_name
+        self.context = context
+        self.source_path = source_path
+        self.output_path = os.path.join(job_folder, f"{Utils.make_valid_identifier(target_name)}.glb").replace("\\", "/")
+
+
+class StagingWorkspace:
+    """Creates a unique staging folder per export job so concurrent jobs never share an output path.
+
+    Args:
+        root (str): Folder containing the job folders.
+        cleanup_policy (str): When finished job folders are removed, one of CleanupPolicy.
+    """
+
+    def __init__(self, root, cleanup_policy=CleanupPolicy.ON_SUCCESS):
+        self.root = root.replace("\\", "/")
+        self.cleanup_policy = cleanup_policy
+        self._jobs = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def create_job(self, target_name, context=None, source_path=None, job_type=ExportJob, **kwargs):
+        job_folder = os.path.join(self.root, f"{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}")
+        os.makedirs(job_folder)
+        job = job_type(job_folder.replace("\\", "/"), target_name, context, source_path, **kwargs)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        carb.log_info(f"Created export job {job.job_id} for {target_name}")
+        return job
+
+    def finish_job(self, job, success):
+        with self._lock:
+            self._jobs.pop(job.job_id, None)
+        if self.cleanup_policy == CleanupPolicy.ALWAYS or (
+            self.cleanup_policy == CleanupPolicy.ON_SUCCESS and success
+        ):
+            shutil.rmtree(job.job_folder, ignore_errors=True)
+        else:
+            carb.log_info(f"Keeping staging folder of export job {job.job_id}: {job.job_folder}")
+
+    def active_jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def purge(self, max_age=24 * 3600):
+        """Removes job folders older than max_age seconds that no running job owns, e.g. left by a crash."""
+        now = time.time()
+        with self._lock:
+            active = set(self._jobs.keys())
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name in active or not os.path.isdir(path):
+                continue
+            if now - os.path.getmtime(path) > max_age:
+                shutil.rmtree(path, ignore_errors=True)
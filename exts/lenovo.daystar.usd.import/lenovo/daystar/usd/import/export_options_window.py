@@ -2,38 +2,57 @@ import os
 import omni
 import omni.ui
 import asyncio
+import importlib.util
 from .dwtool import DWTool
 import carb
 
-try:
-    from omni.kit.widget.farm import FarmSubmissionWidget, FarmSettingsWidget, TaskDefinition
+from omni.kit.asset_converter import AssetConverterContext
+from typing import Callable
 
-    ENABLE_FARM_SUBMISSION = True
-except Exception as exc:
-    ENABLE_FARM_SUBMISSION = False
 
-try:
-    import omni.mdl.distill_and_bake
+_farm_module = None
 
-    ENABLE_BAKE_MATERIAL = True
-except Exception as exc:
-    ENABLE_BAKE_MATERIAL = False
 
-from omni.kit.asset_converter import AssetConverterContext
-from typing import Callable, List, Tuple
+def _farm_widgets():
+    """Returns omni.kit.widget.farm, or None if farm submission isn't available.
+
+    It's imported when the window is first built, not when the extension starts.
+    """
+    global _farm_module
+    if _farm_module is None:
+        try:
+            import omni.kit.widget.farm
+
+            _farm_module = omni.kit.widget.farm
+        except Exception:
+            _farm_module = False
+    return _farm_module or None
+
+
+def _bake_material_available():
+    # Only looks the module up, importing it pulls in the whole MDL SDK.
+    try:
+        return importlib.util.find_spec("omni.mdl.distill_and_bake") is not None
+    except (ImportError, ValueError):
+        return False
 
 
 class ExportOptionsWindow:
-    def __init__(self, import_fn, modal=False, farm_export_fn: Callable[[], Tuple[str, str]] = None):
+    def __init__(self, import_fn, modal=False, farm_export_fn: Callable[[AssetConverterContext, str, str], None] = None):
         super().__init__()
         self.user_name_key = "USER_NAME_KEY"
         self.pwd_key = "USER_PASSWORD_KEY"
         self.domain_key = "SERVER_DOMAIN_KEY"
+        self.optimize_glb_key = "/exts/lenovo.daystar.usd.import/glb_optimizer/enabled"
+        self.process_textures_key = "/exts/lenovo.daystar.usd.import/texture_processing/enabled"
+        self.generate_lods_key = "/exts/lenovo.daystar.usd.import/lod/enabled"
+        self.farm_url_key = "/exts/lenovo.daystar.usd.import/farm/url"
         self.settings = carb.settings.get_settings()
         self._export_fn = import_fn
         self._farm_export_fn = farm_export_fn
         self._farm_settings_widget = None
         self._farm_submit_button = None
+        self._farm_button_container = None
         self._window = None
         self._modal = modal
         self.dwTool = DWTool()
@@ -46,14 +65,21 @@ class ExportOptionsWindow:
         if self._cancel_button:
             self._cancel_button.set_clicked_fn(None)
 
+        if self._farm_submit_button:
+            self._farm_submit_button.set_clicked_fn(None)
+
         # self._separate_gltf_container = None
         self._export_animations_containter = None
         # self._mdl_gltf_extension_container = None
         self._export_animations_checkbox = None
         self._export_baked_mdl_checkbox = None
+        self._optimize_glb_checkbox = None
+        self._generate_lods_checkbox = None
         self._export_lights_checkbox = None
         self._embed_textures_checkbox = None
         self._embed_textures_container = None
+        self._process_textures_checkbox = None
+        self._process_textures_container = None
         self._export_cameras_checkbox = None
         self._export_materials_checkbox = None
         self._export_visible_only_checkbox = None
@@ -64,7 +90,10 @@ class ExportOptionsWindow:
         self._export_fn = import_fn
 
     def set_farm_export_fn(self, farm_export_fn):
+        """farm_export_fn(context, farm_url, task_comment) exports on the farm, None hides Submit to Farm."""
         self._farm_export_fn = farm_export_fn
+        if self._farm_button_container:
+            self._farm_button_container.visible = farm_export_fn is not None
 
     def _build_window(self):
         self._window = omni.ui.Window(
@@ -111,20 +140,30 @@ class ExportOptionsWindow:
                 self._export_lights_checkbox, _ = self._build_option_checkbox("Export Lights", False)
                 self._embed_textures_checkbox, self._embed_textures_container = self._build_option_checkbox(
                     "Embed Textures", False, tooltip="Currently, only FBX and glTF export supports this option.")
+                self._process_textures_checkbox, self._process_textures_container = self._build_option_checkbox(
+                    "Process Embedded Textures", self.settings.get_as_bool(self.process_textures_key),
+                    tooltip="Downscale, deduplicate and re-encode the embedded textures before export.")
                 self._export_visible_only_checkbox, _ = self._build_option_checkbox(
                     "Export Visible Only", True, tooltip="Only visible prims will be exported if it's enabled.")
-                if ENABLE_BAKE_MATERIAL:
+                if _bake_material_available():
                     self._export_baked_mdl_checkbox, _ = self._build_option_checkbox(
                         "Export Baked MDL", False, tooltip="Baking MDL into UsdPreviewSurface before export if it's enabled.")
                 else:
                     self._export_baked_mdl_checkbox = None
+                self._optimize_glb_checkbox, _ = self._build_option_checkbox(
+                    "Optimize GLB", self.settings.get_as_bool(self.optimize_glb_key),
+                    tooltip="Merge duplicate vertices and quantize meshes of the GLB before upload.")
+                self._generate_lods_checkbox, _ = self._build_option_checkbox(
+                    "Generate LODs", self.settings.get_as_bool(self.generate_lods_key),
+                    tooltip="Add simplified levels of detail of the meshes for web and mobile clients.")
                 # self._export_separate_gltf_checkbox, self._separate_gltf_container = self._build_option_checkbox(
                 #     "Separate .bin for Gltf", False, tooltip="Gltf with Separate bin file will be exported if it's enabled.")
                 # self._export_mdl_gltf_extension_checkbox, self._mdl_gltf_extension_container = self._build_option_checkbox(
                 #     "Export glTF NV_materials_mdl", False, tooltip="Materials will be exported with the NV_materials_mdl glTF extension.")
 
-                if ENABLE_FARM_SUBMISSION:
-                    self._farm_settings_widget = FarmSettingsWidget()
+                farm = _farm_widgets()
+                if farm:
+                    self._farm_settings_widget = farm.FarmSettingsWidget()
                     self._farm_settings_widget.build_ui()
                     omni.ui.Spacer(width=0, height=10)
 
@@ -135,13 +174,12 @@ class ExportOptionsWindow:
                     omni.ui.Spacer(width=5, height=0)
                     self._cancel_button = omni.ui.Button("Cancel", width=80, height=0)
                     self._cancel_button.set_clicked_fn(self._on_cancel_fn)
-                    if ENABLE_FARM_SUBMISSION:
+                    self._farm_button_container = omni.ui.HStack(width=0, height=0)
+                    with self._farm_button_container:
                         omni.ui.Spacer(width=5, height=0)
-                        self._farm_submit_button = FarmSubmissionWidget(
-                            task_definition_fn=self._on_farm_export_fn,
-                            farm_server_fn=self._farm_settings_widget.get_selected_farm,
-                            finalize_fn=self.hide,
-                        )
+                        self._farm_submit_button = omni.ui.Button("Submit to Farm", width=120, height=0)
+                        self._farm_submit_button.set_clicked_fn(self._on_farm_export_fn)
+                    self._farm_button_container.visible = self._farm_export_fn is not None
                     omni.ui.Spacer(height=0)
                 omni.ui.Spacer(width=0, height=10)
 
@@ -157,6 +195,10 @@ class ExportOptionsWindow:
             self._export_baked_mdl_checkbox.model.get_value_as_bool() if self._export_baked_mdl_checkbox else False
         asset_upload_context.export_separate_gltf = False   #self._export_separate_gltf_checkbox.model.get_value_as_bool()
         asset_upload_context.export_mdl_gltf_extension = False  #self._export_mdl_gltf_extension_checkbox.model.get_value_as_bool()
+        # Options of this export only, read by the exporter instead of their settings.
+        asset_upload_context.optimize_glb = self._optimize_glb_checkbox.model.get_value_as_bool()
+        asset_upload_context.generate_lods = self._generate_lods_checkbox.model.get_value_as_bool()
+        asset_upload_context.process_textures = self._process_textures_checkbox.model.get_value_as_bool()
 
         return asset_upload_context
 
@@ -164,12 +206,23 @@ class ExportOptionsWindow:
         domain = self.domain_input_box.model.get_value_as_string()
         user_name = self.name_input_box.model.get_value_as_string()
         pwd = self.pwd_input_box.model.get_value_as_string()
-        
-        result = self.dwTool.loginToDW(domain,user_name,pwd)
-        if result:
-            self.result_text.text = "Success"
-        else:
-            self.result_text.text = "Failed"
+
+        async def login():
+            self._login_button.enabled = False
+            self.result_text.text = "..."
+            try:
+                result = await self.dwTool.loginToDW(domain,user_name,pwd)
+            except Exception as e:
+                carb.log_error(f"login failed: {e}")
+                result = False
+            finally:
+                self._login_button.enabled = True
+            if result:
+                self.result_text.text = "Success"
+            else:
+                self.result_text.text = "Failed"
+
+        asyncio.ensure_future(login())
         self.settings.set_string(self.domain_key,domain)
         self.settings.set_string(self.user_name_key,user_name)
         self.settings.set_string(self.pwd_key,pwd)
@@ -189,28 +242,24 @@ class ExportOptionsWindow:
     def _on_cancel_fn(self):
         self._window.visible = False
 
-    def _on_farm_export_fn(self) -> List["TaskDefinition"]:
+    def _on_farm_export_fn(self):
         if not self._farm_export_fn:
-           return []
-
-        usd_file, output_path = self._farm_export_fn()
-        asset_upload_context = self._get_context()
-
-        tasks = []
-        tasks.append(
-            TaskDefinition(
-                task_type="convert-asset",
-                task_function="convert.asset.process",
-                task_function_args={
-                    "import_path": usd_file,
-                    "output_path": output_path,
-                    "converter_settings": asset_upload_context.to_dict(),
-                },
-                task_comment=self._farm_settings_widget.get_task_comment(),
-            )
-        )
-
-        return tasks
+            return
+        if not self.dwTool.check_status():
+            carb.log_error("login first....")
+            return
+        # The farm picked in the farm settings, else the configured one.
+        farm_url = ""
+        task_comment = ""
+        if self._farm_settings_widget:
+            farm_url = self._farm_settings_widget.get_selected_farm() or ""
+            task_comment = self._farm_settings_widget.get_task_comment() or ""
+        farm_url = farm_url or self.settings.get_as_string(self.farm_url_key)
+        if not farm_url:
+            carb.log_error(f"No farm selected, pick one in the farm settings or set {self.farm_url_key}")
+            return
+        self._window.visible = False
+        self._farm_export_fn(self._get_context(), farm_url, task_comment)
 
     def _build_input_field(self,text,default_value,width,password_mode = False):
         omni.ui.Label(text, width=100)
@@ -241,12 +290,14 @@ class ExportOptionsWindow:
         # self._mdl_gltf_extension_container.visible = False
         self._export_animations_containter.visible = False
         self._embed_textures_container.visible = False
+        self._process_textures_container.visible = False
         if output_path:
             _, ext = os.path.splitext(output_path)
             ext = ext.lower()
             if ext == ".gltf" or ext == ".glb" or ext == ".fbx":
                 self._export_animations_containter.visible = True
                 self._embed_textures_container.visible = True
+                self._process_textures_container.visible = True
             # if ext == ".gltf" or ext == ".glb":
             #     self._separate_gltf_container.visible = True
             #     self._mdl_gltf_extension_container.visible = True
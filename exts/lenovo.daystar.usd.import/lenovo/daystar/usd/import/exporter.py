@@ -7,76 +7,164 @@ import omni.kit.window.content_browser as content
 import omni.kit.asset_converter as converter
 import omni.kit.notification_manager as nm
 from .utils import Utils
-from omni.kit.usd.collect.collector import FlatCollectionTextureOptions
-from omni.kit.tool.collect import get_instance as get_collect_instance
+from .convert_cache import ConvertCache
+from .texture_processor import TextureProcessor
+from .material_baker import MaterialBaker, MaterialBakeCache
+from .collection_cache import CollectionCache
+from .tracing import get_tracer, Phase
+from .progress_tracker import ProgressTracker
+from .stage_loading import cached_stage_id, open_material_stage
+from pxr import Usd
 
-from .progress_popup import ProgressPopup
-from pxr import Usd, UsdUtils, UsdShade
+
+CONVERT_CACHE_SETTINGS = "/exts/lenovo.daystar.usd.import/convert_cache"
+GLB_OPTIMIZER_SETTINGS = "/exts/lenovo.daystar.usd.import/glb_optimizer"
+LOD_SETTINGS = "/exts/lenovo.daystar.usd.import/lod"
+TEXTURE_SETTINGS = "/exts/lenovo.daystar.usd.import/texture_processing"
+MDL_BAKE_SETTINGS = "/exts/lenovo.daystar.usd.import/mdl_bake"
+COLLECTION_CACHE_SETTINGS = "/exts/lenovo.daystar.usd.import/collection_cache"
+
+# Options of one export, set as attributes of its AssetConverterContext next to the converter ones, so
+# concurrent exports keep their own. The setting is the default of exports that don't set them.
+EXPORT_OPTION_SETTINGS = {
+    "optimize_glb": f"{GLB_OPTIMIZER_SETTINGS}/enabled",
+    "generate_lods": f"{LOD_SETTINGS}/enabled",
+    "process_textures": f"{TEXTURE_SETTINGS}/enabled",
+}
+
+
+def export_option(asset_converter_context, name):
+    """Returns the export option name of asset_converter_context, or its setting if the context doesn't set it."""
+    value = getattr(asset_converter_context, name, None)
+    if value is None:
+        return carb.settings.get_settings().get_as_bool(EXPORT_OPTION_SETTINGS[name])
+    return bool(value)
 
 
 class Exporter:
-    def on_startup(self):
-        self._waiting_popup_convert = None
+    def on_startup(self, headless=False, progress_tracker=None):
+        """Loads the settings.
+
+        Args:
+            headless (bool): Exports without any window, the progress is logged.
+            progress_tracker (ProgressTracker): Tracker the phases of the exports are reported to.
+        """
+        self._headless = headless
+        # Phases and converter tasks of the exports, keyed by their output path, see ProgressTracker.
+        self.progress = progress_tracker or ProgressTracker(log_phases=headless)
+        self._convert_cache = None
+        settings = carb.settings.get_settings()
+        if settings.get_as_bool(f"{CONVERT_CACHE_SETTINGS}/enabled"):
+            cache_dir = carb.tokens.get_tokens_interface().resolve(
+                settings.get_as_string(f"{CONVERT_CACHE_SETTINGS}/path")
+            )
+            max_size = settings.get_as_int(f"{CONVERT_CACHE_SETTINGS}/max_size_mb") * 1024 * 1024
+            self._convert_cache = ConvertCache(cache_dir, max_size)
+        self._bake_cache = None
+        if settings.get_as_bool(f"{MDL_BAKE_SETTINGS}/cache_enabled"):
+            cache_dir = carb.tokens.get_tokens_interface().resolve(
+                settings.get_as_string(f"{MDL_BAKE_SETTINGS}/cache_path")
+            )
+            max_size = settings.get_as_int(f"{MDL_BAKE_SETTINGS}/cache_max_size_mb") * 1024 * 1024
+            self._bake_cache = MaterialBakeCache(cache_dir, max_size)
+        self._collection_cache = None
+        # Collecting through omni.kit.tool.collect needs its window, headless exports always use the cache.
+        if settings.get_as_bool(f"{COLLECTION_CACHE_SETTINGS}/enabled") or headless:
+            cache_dir = carb.tokens.get_tokens_interface().resolve(
+                settings.get_as_string(f"{COLLECTION_CACHE_SETTINGS}/path")
+            )
+            max_size = settings.get_as_int(f"{COLLECTION_CACHE_SETTINGS}/max_size_mb") * 1024 * 1024
+            self._collection_cache = CollectionCache(cache_dir, max_size)
 
     def on_shutdown(self):
         pass
 
-    def _show_waiting_popup_convert(self):
-        if not self._waiting_popup_convert:
-            self._waiting_popup_convert = ProgressPopup("Converting...", status_text="Preparing...")
-
-        self._waiting_popup_convert.status_text = "Preparing..."
-        self._waiting_popup_convert.progress = 0.0
-        self._waiting_popup_convert.show()
+    async def _run_converter_task(self, source, output_path, asset_converter_context, progress_fn=None):
+        """Converts source, a stage id or a path, to output_path and returns True if it succeeded.
 
-    async def _start_usd_export_internal(self, stage: Usd.Stage, output_path, asset_convert_context,convert_callback, is_collected=False):
+        The converter task is cancelled with the job tracked for output_path.
+        """
         def convert_progress_callback(progress, total):
-            self._waiting_popup_convert.progress = float(progress) / total
+            if total:
+                self.progress.set_progress(output_path, float(progress) / total)
+                if progress_fn:
+                    progress_fn(float(progress) / total)
 
-        self._show_waiting_popup_convert()
+        self.progress.set_phase(output_path, Phase.CONVERT)
+        converter_task = converter.get_instance().create_converter_task(
+            source, output_path, convert_progress_callback, asset_converter_context
+        )
+        cancel_fn = converter_task.cancel
+        self.progress.add_cancel_fn(output_path, cancel_fn)
+        try:
+            return await converter_task.wait_until_finished()
+        finally:
+            self.progress.remove_cancel_fn(output_path, cancel_fn)
 
+    async def _start_usd_export_internal(self, stage: Usd.Stage, output_path, asset_convert_context,convert_callback, is_collected=False):
         usd_path = stage.GetRootLayer().identifier
         usd_path = usd_path.replace("\\", "/")
-        usd_file_name = os.path.basename(usd_path)
-        self._waiting_popup_convert.status_text = f"Exporting {usd_file_name}..."
+        if self.progress.is_cancelled(output_path):
+            carb.log_info(f"Export of {usd_path} cancelled.")
+            if convert_callback:
+                convert_callback(False)
+            return
         carb.log_info(f"Exporting {usd_path} to {output_path}...")
 
-        stage_cache = UsdUtils.StageCache.Get()
-        stage_id = stage_cache.GetId(stage).ToString()
-        if not stage_id:
-            stage_id = stage_cache.Insert(stage)
+        try:
+            with self._convert_span(usd_path, stage) as span:
+                if is_collected:
+                    # The collected stage is saved, the converter opens it by path.
+                    success = await self._run_converter_task(usd_path, output_path, asset_convert_context)
+                else:
+                    with cached_stage_id(stage) as stage_id:
+                        success = await self._run_converter_task(stage_id, output_path, asset_convert_context)
+                span.set(success=success, bytes_out=Utils.file_size(output_path))
+            if success:
+                await self._post_process_async(output_path, asset_convert_context)
+        except Exception as e:
+            carb.log_error(f"Failed to export {usd_path}: {e}")
+            success = False
+        self._finish_export(usd_path, output_path, success, convert_callback)
 
-        if not stage_id:
-            carb.log_error(f"Failed to export {usd_path} since it's not cached in UsdStageCache.")
-            nm.post_notification(
-                f"Failed to export {os.path.basename(usd_file_name)} since it's not cached in UsdStageCache.",
-                status=nm.NotificationStatus.WARNING,
-            )
-            return
-        if not is_collected:
-            converter_task = converter.get_instance().create_converter_task(
-                stage_id, output_path, convert_progress_callback, asset_convert_context
-            )
-        else:
-            # for collected stage, we use the path to converter
-            converter_task = converter.get_instance().create_converter_task(
-                usd_path, output_path, convert_progress_callback, asset_convert_context
-            )
-        self._waiting_popup_convert.set_cancel_fn(lambda: converter_task.cancel())
-        success = await converter_task.wait_until_finished()
-        if not success:
+    def _finish_export(self, usd_path, output_path, success, convert_callback):
+        """Reports the end of an export, convert_callback is called whether it succeeded or not."""
+        if not success and not self.progress.is_cancelled(output_path):
             nm.post_notification(
-                f"Failed to export {usd_file_name}.\n" "Please check console for more details.",
+                f"Failed to export {os.path.basename(usd_path)}.\n" "Please check console for more details.",
                 status=nm.NotificationStatus.WARNING,
             )
-        self._waiting_popup_convert.set_cancel_fn(None)
-        self._waiting_popup_convert.progress = 0.0
-        self._waiting_popup_convert.hide()
         self._refresh_current_directory()
         if convert_callback:
             convert_callback(success)
 
+    def _get_cached_convert_callback(self, cache_key, output_path, convert_callback):
+        def cached_convert_callback(success):
+            if success:
+                try:
+                    self._store_in_cache(cache_key, output_path)
+                except OSError as e:
+                    carb.log_warn(f"Failed to cache {output_path}: {e}")
+            if convert_callback:
+                convert_callback(success)
+
+        return cached_convert_callback
+
+    async def _finish_from_cache(self, output_path, convert_callback):
+        carb.log_info(f"Reused cached conversion for {output_path}.")
+        self._refresh_current_directory()
+        if convert_callback:
+            convert_callback(True)
+
     def create_usd_export_task(self, stage: Usd.Stage, output_path, asset_converter_context,convert_callback):
+        if self._convert_cache:
+            cache_key = self._convert_cache.make_stage_key(
+                stage, asset_converter_context, output_path, self._cache_settings(asset_converter_context)
+            )
+            if self._fetch_from_cache(cache_key, output_path, asset_converter_context):
+                return asyncio.ensure_future(self._finish_from_cache(output_path, convert_callback))
+            convert_callback = self._get_cached_convert_callback(cache_key, output_path, convert_callback)
+
         usd_path = stage.GetRootLayer().identifier
         usd_path = usd_path.replace("\\", "/")
         usd_file_name = os.path.basename(usd_path)
@@ -84,33 +172,311 @@ class Exporter:
         # OM-44603: collect the usd_path and open the collected path in a new stage
         # and then bake it's material and then export the baked stage
         # Check the file is usd and is exist
-        if asset_converter_context.bake_mdl_material and \
+        if self.needs_collect(asset_converter_context) and \
             Utils.is_usd(usd_path) and \
             omni.client.stat(usd_path)[0] == omni.client.Result.OK:
 
+            if asset_converter_context.bake_mdl_material:
+                self._enable_extension("omni.mdl.distill_and_bake")
+            if self._collection_cache:
+                return asyncio.ensure_future(
+                    self._export_cached_collection_async(
+                        stage, usd_path, output_path, asset_converter_context, convert_callback
+                    )
+                )
+            # The collect extensions are optional dependencies, only loaded by the first export that collects.
+            self._enable_extension("omni.kit.tool.collect")
+            from omni.kit.usd.collect.collector import FlatCollectionTextureOptions
+            from omni.kit.tool.collect import get_instance as get_collect_instance
+
             collect_instance = get_collect_instance()
-            manager = omni.kit.app.get_app().get_extension_manager()
-            manager.set_extension_enabled_immediate("omni.mdl.distill_and_bake", True)
+            self.progress.set_phase(output_path, Phase.COLLECT)
+            collect_span = get_tracer().span(Phase.COLLECT, source=usd_path).begin()
             with tempfile.TemporaryDirectory() as tmp_dir:
                 def export_internal():
-                    try:
-                        import omni.mdl.distill_and_bake
-                        collected_file = os.path.realpath(tmp_dir) + "\\" + usd_file_name
-                        new_stage = Usd.Stage.Open(collected_file)
-                        for prim in new_stage.Traverse():
-                            if UsdShade.Material(prim):
-                                distiller = omni.mdl.distill_and_bake.MdlDistillAndBake(prim, baking_to_new_material=asset_converter_context.export_mdl_gltf_extension)
-                                distiller.distill()
-                        new_stage.Save()
-                        asyncio.ensure_future(self._start_usd_export_internal(new_stage, output_path, asset_converter_context, convert_callback, True))
-                    except ImportError:
-                        return asyncio.ensure_future(self._start_usd_export_internal(stage, output_path, asset_converter_context,convert_callback))
+                    collect_span.end()
+                    collected_file = os.path.realpath(tmp_dir) + "\\" + usd_file_name
+                    return asyncio.ensure_future(
+                        self._export_collected_async(
+                            stage, collected_file, output_path, asset_converter_context, convert_callback
+                        )
+                    )
 
                 collect_instance._start_collecting(usd_path,tmp_dir,False,True,False,FlatCollectionTextureOptions.FLAT, export_internal)
         else:
             return asyncio.ensure_future(self._start_usd_export_internal(stage, output_path, asset_converter_context,convert_callback))
 
+    def _convert_span(self, source, stage=None):
+        """Returns the span of a conversion. The prims are only counted when tracing, it takes a traversal."""
+        tracer = get_tracer()
+        if not tracer.enabled:
+            return tracer.span(Phase.CONVERT)
+        args = {"source": source, "bytes_in": Utils.file_size(source)}
+        if stage:
+            args["prims"] = sum(1 for _ in stage.Traverse())
+        return tracer.span(Phase.CONVERT, **args)
+
+    def _enable_extension(self, extension_id):
+        manager = omni.kit.app.get_app().get_extension_manager()
+        if not manager.is_extension_enabled(extension_id):
+            manager.set_extension_enabled_immediate(extension_id, True)
+
+    async def _export_cached_collection_async(self, stage, usd_path, output_path, asset_converter_context, convert_callback):
+        """Collects usd_path into its persistent workspace, only copying what changed, then exports it.
+
+        The workspace stays locked until the export finished, since the bake writes into it.
+        """
+        self.progress.set_phase(output_path, Phase.COLLECT)
+        async with self._collection_cache.lock(usd_path):
+            try:
+                with get_tracer().span(Phase.COLLECT, source=usd_path) as span:
+                    collected_file = await self._collection_cache.collect_async(usd_path)
+                    stats = self._collection_cache.stats
+                    span.set(files=stats.get("files"), copied=stats.get("copied"), bytes_out=stats.get("copied_size"))
+            except Exception as e:
+                carb.log_error(f"Failed to collect {usd_path}, exporting it without baking: {e}")
+                return await self._start_usd_export_internal(stage, output_path, asset_converter_context, convert_callback)
+            await self._export_collected_async(stage, collected_file, output_path, asset_converter_context, convert_callback)
+
+    async def _export_collected_async(self, stage, collected_file, output_path, asset_converter_context, convert_callback):
+        """Bakes the MDL materials and processes the textures of a collected stage, then exports it.
+
+        If neither pass applies, stage is exported as it is. convert_callback is called in any case,
+        e.g. with False when the collected stage fails to open or to bake.
+        """
+        try:
+            new_stage = await self._prepare_collected_async(collected_file, output_path, asset_converter_context)
+        except Exception as e:
+            carb.log_error(f"Failed to prepare {collected_file} for export: {e}")
+            self._finish_export(collected_file, output_path, False, convert_callback)
+            return
+        if new_stage:
+            await self._start_usd_export_internal(new_stage, output_path, asset_converter_context, convert_callback, True)
+        else:
+            await self._start_usd_export_internal(stage, output_path, asset_converter_context, convert_callback)
+
+    async def _prepare_collected_async(self, collected_file, output_path, asset_converter_context):
+        """Runs the bake and texture passes on collected_file, returns its saved stage, or None if neither ran.
+
+        Both passes only edit materials, so only those are loaded, unless the bake rebinds the geometry.
+        """
+        if asset_converter_context.bake_mdl_material and asset_converter_context.export_mdl_gltf_extension:
+            new_stage = Usd.Stage.Open(collected_file)
+        else:
+            new_stage = open_material_stage(collected_file)
+        if not new_stage:
+            raise RuntimeError(f"failed to open {collected_file}")
+        baked = False
+        if asset_converter_context.bake_mdl_material and not self.progress.is_cancelled(output_path):
+            self.progress.set_phase(output_path, Phase.BAKE)
+            try:
+                with get_tracer().span(Phase.BAKE, source=collected_file) as span:
+                    stats = await self._bake_materials_async(new_stage, asset_converter_context)
+                    span.set(materials=stats["materials"], cached=stats.get("cached", 0))
+                baked = True
+            except ImportError:
+                carb.log_warn("omni.mdl.distill_and_bake is not available, exporting without baking materials.")
+        process_textures = self._process_textures(asset_converter_context)
+        if not baked and not process_textures:
+            return None
+
+        if process_textures and not self.progress.is_cancelled(output_path):
+            self.progress.set_phase(output_path, Phase.TEXTURES)
+            options = self._texture_settings(asset_converter_context)
+            processor = TextureProcessor(
+                options["max_resolution"], options["format"], options["quality"], options["max_workers"]
+            )
+            texture_folder = os.path.join(os.path.dirname(collected_file), "processed_textures")
+            try:
+                with get_tracer().span(Phase.TEXTURES, source=collected_file) as span:
+                    await processor.process_stage_async(new_stage, texture_folder)
+                    stats = processor.stats
+                    span.set(
+                        textures=stats.get("textures"),
+                        bytes_in=stats.get("size_before", 0),
+                        bytes_out=stats.get("size_after", 0),
+                    )
+            except Exception as e:
+                carb.log_error(f"Failed to process the textures of {collected_file}, exporting them as is: {e}")
+        new_stage.Save()
+        return new_stage
+
+    async def _bake_materials_async(self, stage, asset_converter_context):
+        import omni.mdl.distill_and_bake
+
+        baking_to_new_material = asset_converter_context.export_mdl_gltf_extension
+
+        def distill(prim):
+            distiller = omni.mdl.distill_and_bake.MdlDistillAndBake(prim, baking_to_new_material=baking_to_new_material)
+            distiller.distill()
+
+        if baking_to_new_material:
+            # Baking to a new material rebinds the geometry, so it has to run on the whole stage.
+            materials = MaterialBaker.find_materials(stage)
+            for prim in materials:
+                distill(prim)
+            return {"materials": len(materials)}
+        return await MaterialBaker(distill, self._bake_cache).bake_stage_async(stage)
+
+    async def export_stage_async(self, stage: Usd.Stage, output_path, asset_converter_context, progress_fn=None):
+        """Converts stage, e.g. a masked stage, to output_path as it is, without collecting or baking it.
+
+        Returns True if the conversion succeeded.
+        """
+        with self._convert_span(stage.GetRootLayer().identifier, stage) as span:
+            with cached_stage_id(stage) as stage_id:
+                success = await self._run_converter_task(stage_id, output_path, asset_converter_context, progress_fn)
+            span.set(success=success, bytes_out=Utils.file_size(output_path))
+        if success:
+            await self._post_process_async(output_path, asset_converter_context)
+        return success
+
+    async def export_file_async(self, usd_path, output_path, asset_converter_context, progress_fn=None):
+        """Converts the USD file at usd_path to output_path without opening it in the editor.
+
+        Returns True if the conversion succeeded. Stages that need MDL baking or texture processing
+        are opened and go through create_usd_export_task, the others are handed to the converter by path.
+        """
+        cache_key = None
+        if self._convert_cache and not self.needs_collect(asset_converter_context):
+            cache_key = self._convert_cache.make_path_key(
+                usd_path, asset_converter_context, output_path, self._cache_settings(asset_converter_context)
+            )
+            if self._fetch_from_cache(cache_key, output_path, asset_converter_context):
+                return True
+
+        if self.needs_collect(asset_converter_context):
+            stage = Usd.Stage.Open(usd_path)
+            if not stage:
+                carb.log_error(f"Failed to open {usd_path}.")
+                return False
+            finished = asyncio.get_event_loop().create_future()
+
+            def convert_callback(success):
+                if not finished.done():
+                    finished.set_result(success)
+
+            self.create_usd_export_task(stage, output_path, asset_converter_context, convert_callback)
+            return await finished
+
+        carb.log_info(f"Exporting {usd_path} to {output_path}...")
+        with self._convert_span(usd_path) as span:
+            success = await self._run_converter_task(usd_path, output_path, asset_converter_context, progress_fn)
+            span.set(success=success, bytes_out=Utils.file_size(output_path))
+        if success:
+            await self._post_process_async(output_path, asset_converter_context)
+        if success and cache_key:
+            self._store_in_cache(cache_key, output_path)
+        return success
+
+    def _post_process_settings(self, asset_converter_context):
+        settings = carb.settings.get_settings()
+        return {
+            "optimize_glb": export_option(asset_converter_context, "optimize_glb"),
+            "quantize": settings.get_as_bool(f"{GLB_OPTIMIZER_SETTINGS}/quantize"),
+            "quantize_positions": settings.get_as_bool(f"{GLB_OPTIMIZER_SETTINGS}/quantize_positions"),
+            "lod": {
+                "enabled": export_option(asset_converter_context, "generate_lods"),
+                "levels": list(settings.get(f"{LOD_SETTINGS}/levels") or []),
+                "mode": settings.get_as_string(f"{LOD_SETTINGS}/mode"),
+                "min_triangles": settings.get_as_int(f"{LOD_SETTINGS}/min_triangles"),
+            },
+        }
+
+    def lod_assets(self, output_path):
+        """Returns the (level, path) of the LOD GLBs exported next to output_path, to upload with it."""
+        from .lod_generator import find_lod_assets
+
+        return find_lod_assets(output_path)
+
+    def _fetch_from_cache(self, cache_key, output_path, asset_converter_context):
+        """Restores output_path and its LOD GLBs from the convert cache, returns False on a cache miss."""
+        if not self._convert_cache.fetch(cache_key, output_path):
+            return False
+        from .lod_generator import LodGenerator, LodMode, lod_asset_path
+
+        lod = self._post_process_settings(asset_converter_context)["lod"]
+        if lod["enabled"] and lod["mode"] == LodMode.ASSETS:
+
+            for level in range(1, len(LodGenerator(lod["levels"]).levels) + 1):
+                if not self._convert_cache.fetch(f"{cache_key}_lod{level}", lod_asset_path(output_path, level)):
+                    return False
+        return True
+
+    def _store_in_cache(self, cache_key, output_path):
+        self._convert_cache.store(cache_key, output_path)
+        for level, path in self.lod_assets(output_path):
+            self._convert_cache.store(f"{cache_key}_lod{level}", path)
+
+    def _texture_settings(self, asset_converter_context):
+        settings = carb.settings.get_settings()
+        return {
+            "enabled": export_option(asset_converter_context, "process_textures"),
+            "max_resolution": settings.get_as_int(f"{TEXTURE_SETTINGS}/max_resolution"),
+            "format": settings.get_as_string(f"{TEXTURE_SETTINGS}/format"),
+            "quality": settings.get_as_int(f"{TEXTURE_SETTINGS}/quality"),
+            "max_workers": settings.get_as_int(f"{TEXTURE_SETTINGS}/max_workers"),
+        }
+
+    def _process_textures(self, asset_converter_context):
+        return asset_converter_context.embed_textures and self._texture_settings(asset_converter_context)["enabled"]
+
+    def needs_collect(self, asset_converter_context):
+        return asset_converter_context.bake_mdl_material or self._process_textures(asset_converter_context)
+
+    def _cache_settings(self, asset_converter_context):
+        return {**self._post_process_settings(asset_converter_context), "textures": self._texture_settings(asset_converter_context)}
+
+    async def _post_process_async(self, output_path, asset_converter_context):
+        """Runs the optional stages on a converted file. A failing stage leaves the file as converted."""
+        options = self._post_process_settings(asset_converter_context)
+        if not output_path.lower().endswith(".glb") or not os.path.exists(output_path):
+            return
+        if options["lod"]["enabled"] or options["optimize_glb"]:
+            self.progress.set_phase(output_path, Phase.POST_PROCESS)
+        with get_tracer().span(Phase.POST_PROCESS, bytes_in=Utils.file_size(output_path)) as span:
+            await self._run_post_process_async(output_path, options)
+            lod_paths = [path for _, path in self.lod_assets(output_path)]
+            span.set(bytes_out=sum(Utils.file_size(path) for path in [output_path] + lod_paths))
+
+    async def _run_post_process_async(self, output_path, options):
+        # NumPy is only imported once a GLB gets post processed.
+        from .glb_optimizer import GlbOptimizer
+        from .lod_generator import LodGenerator, find_lod_assets
+
+        for _, path in find_lod_assets(output_path):
+            # LOD GLBs of a previous export of this output path.
+            os.remove(path)
+        if options["lod"]["enabled"]:
+            lod = options["lod"]
+            generator = LodGenerator(lod["levels"], lod["mode"], lod["min_triangles"])
+            try:
+                stats = await asyncio.get_event_loop().run_in_executor(None, generator.generate_file, output_path)
+                carb.log_info(
+                    f"LOD generator: {output_path} "
+                    + ", ".join(f"{level['triangles']}" for level in stats["levels"])
+                    + f" of {stats['triangles']} triangles"
+                    + (f" (skipped: {stats['skipped']})" if stats["skipped"] else "")
+                )
+            except Exception as e:
+                carb.log_error(f"Failed to generate the LODs of {output_path}, uploading it without: {e}")
+                for _, path in find_lod_assets(output_path):
+                    os.remove(path)
+        if options["optimize_glb"]:
+            optimizer = GlbOptimizer(quantize=options["quantize"], quantize_positions=options["quantize_positions"])
+            for path in [output_path] + [path for _, path in find_lod_assets(output_path)]:
+                try:
+                    stats = await asyncio.get_event_loop().run_in_executor(None, optimizer.optimize_file, path)
+                    carb.log_info(
+                        f"GLB optimizer: {path} {stats['size_before']} -> {stats['size_after']} bytes"
+                        + (f" (skipped: {stats['skipped']})" if stats["skipped"] else "")
+                    )
+                except Exception as e:
+                    carb.log_error(f"Failed to optimize {path}, uploading it unoptimized: {e}")
+
     def _refresh_current_directory(self):
+        if self._headless:
+            return
         content_window = content.get_content_window()
         if content_window:
             content_window.refresh_current_directory()
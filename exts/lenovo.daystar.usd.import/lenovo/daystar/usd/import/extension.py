@@ -6,6 +6,10 @@
 # distribution of this software and related documentation without an express
 # license agreement from NVIDIA CORPORATION is strictly prohibited.
 #
+import time
+
+_IMPORT_START = time.perf_counter()
+
 import asyncio
 import os
 import omni.ext
@@ -13,11 +17,29 @@ import omni.kit.ui
 import omni.kit.app
 import omni.usd
 import omni.kit.window.content_browser as content
+import omni.kit.notification_manager as nm
 from omni.kit.menu.utils import MenuItemDescription
 from .export_options_window import ExportOptionsWindow
 from .exporter import Exporter
+from .batch_exporter import BatchExporter
+from .delta_exporter import DeltaExporter
+from .shard_exporter import ShardExporter
+from .farm_exporter import FarmExporter, FarmQueueClient, FARM_SETTINGS
+from .headless import HeadlessRunner, HEADLESS_SETTINGS
+from .export_job import StagingWorkspace
+from .progress_popup import ProgressDashboard
+from .progress_tracker import ProgressTracker
 import carb
 from .dwtool import DWTool
+from .upload_stream import UploadCancelled
+from .tracing import get_tracer, TRACING_SETTINGS
+
+# Reported by on_startup, the heavy modules (requests, NumPy, Pillow, collect) are imported on first use.
+_IMPORT_TIME = time.perf_counter() - _IMPORT_START
+
+STAGING_SETTINGS = "/exts/lenovo.daystar.usd.import/staging"
+DELTA_EXPORT_SETTINGS = "/exts/lenovo.daystar.usd.import/delta_export"
+SHARDING_SETTINGS = "/exts/lenovo.daystar.usd.import/sharding"
 
 
 def get_instance():
@@ -27,21 +49,53 @@ def get_instance():
 
 class AssetImporterExtension(omni.ext.IExt):
     EXPORT_MENU_NAME = "ExportToDW"
+    EXPORT_FOLDER_MENU_NAME = "ExportFolderToDW"
+    PUBLISH_CHANGES_MENU_NAME = "PublishChangesToDW"
+    EXPORT_SHARDED_MENU_NAME = "ExportShardedToDW"
 
     def on_startup(self):
         carb.log_info(f"**********on_startup**********")
+        start = time.perf_counter()
         global _global_instance
         _global_instance = self
 
         self._context_icon_menu_items = []
         self._app = omni.kit.app.get_app()
+        self._setup_tracing()
+        # With a job manifest the extension runs it without any menu or window, e.g. on a farm node.
+        manifest_path = carb.settings.get_settings().get_as_string(f"{HEADLESS_SETTINGS}/manifest")
+        # Progress of all the exports, shown in a dashboard or, headless, logged.
+        self._progress = ProgressTracker(log_phases=bool(manifest_path))
+        self._progress_dashboard = None
         self._exporter = Exporter()
-        self._exporter.on_startup()
+        self._exporter.on_startup(headless=bool(manifest_path), progress_tracker=self._progress)
         self._export_option_window = None
         self._new_content_window = None
         self._file_menu_list = []
-        self._register_menus()
+        self._batch_exporter = None
+        self._sharded_export_running = False
+        self._farm_exporters = []
+        self._workspace = self._create_workspace()
+        self._headless_runner = None
+        if not manifest_path:
+            self._register_menus()
+            self._progress_dashboard = ProgressDashboard(self._progress)
+            self._progress.start_frame_updates()
         self.dwTool =DWTool()
+        state_dir = carb.tokens.get_tokens_interface().resolve(
+            carb.settings.get_settings().get_as_string(f"{DELTA_EXPORT_SETTINGS}/path")
+        )
+        self._delta_exporter = DeltaExporter(self._exporter, self.dwTool, self._workspace, state_dir)
+        self._stage_event_sub = omni.usd.get_context().get_stage_event_stream().create_subscription_to_pop(
+            self._on_stage_event, name="lenovo.daystar.usd.import"
+        )
+        if manifest_path:
+            self._headless_runner = HeadlessRunner(self._exporter, self.dwTool, self._workspace, self._progress)
+            asyncio.ensure_future(self._run_headless(manifest_path))
+        carb.log_info(
+            f"lenovo.daystar.usd.import started in {(time.perf_counter() - start) * 1000:.1f} ms "
+            f"(imports {_IMPORT_TIME * 1000:.1f} ms)"
+        )
 
     def on_shutdown(self):
         carb.log_info(f"**********on_shutdown**********")
@@ -49,12 +103,68 @@ class AssetImporterExtension(omni.ext.IExt):
         _global_instance = None
 
         self._unregister_menus()
+        self._stage_event_sub = None
+        self._delta_exporter.stop_tracking()
+        self._delta_exporter = None
+        if self._batch_exporter:
+            self._batch_exporter.cancel()
+            self._batch_exporter = None
+        if self._headless_runner:
+            self._headless_runner.cancel()
+            self._headless_runner = None
+        for farm_exporter in self._farm_exporters:
+            farm_exporter.cancel()
+        self._farm_exporters = []
         if self._export_option_window:
             self._export_option_window.destroy()
         self._export_option_window = None
         self._new_content_window = None
+        self._progress.stop_frame_updates()
+        if self._progress_dashboard:
+            self._progress_dashboard.destroy()
+            self._progress_dashboard = None
         self._exporter.on_shutdown()
         self._exporter = None
+        self.dwTool.close()
+        self._write_session_trace()
+
+    def _setup_tracing(self):
+        settings = carb.settings.get_settings()
+        tracer = get_tracer()
+        tracer.enabled = settings.get_as_bool(f"{TRACING_SETTINGS}/enabled")
+        tracer.max_events = settings.get_as_int(f"{TRACING_SETTINGS}/max_events") or tracer.max_events
+
+    def _write_session_trace(self):
+        tracer = get_tracer()
+        path = carb.settings.get_settings().get_as_string(f"{TRACING_SETTINGS}/path")
+        if not tracer.enabled or not path or not tracer.to_chrome_trace()["traceEvents"]:
+            return
+        folder = carb.tokens.get_tokens_interface().resolve(path)
+        try:
+            tracer.write(os.path.join(folder, f"session_{time.strftime('%Y%m%d%H%M%S')}.trace.json"))
+        except OSError as e:
+            carb.log_warn(f"Failed to write the export trace: {e}")
+        tracer.clear()
+
+    def _create_workspace(self):
+        settings = carb.settings.get_settings()
+        root = carb.tokens.get_tokens_interface().resolve(settings.get_as_string(f"{STAGING_SETTINGS}/path"))
+        workspace = StagingWorkspace(root, settings.get_as_string(f"{STAGING_SETTINGS}/cleanup_policy"))
+        # Removing the folders left by a crash can take a while, it doesn't need to hold up the startup.
+        asyncio.get_event_loop().run_in_executor(None, workspace.purge)
+        return workspace
+
+    async def _run_headless(self, manifest_path):
+        exit_code = 0
+        try:
+            report = await self._headless_runner.run_async(manifest_path)
+            if report["failed"] or report["cancelled"]:
+                exit_code = 1
+        except Exception as e:
+            carb.log_error(f"Headless export of {manifest_path} failed: {e}")
+            exit_code = 2
+        if carb.settings.get_settings().get_as_bool(f"{HEADLESS_SETTINGS}/quit_on_finish"):
+            self._app.post_quit(exit_code)
 
     def _unregister_menus(self):
         if self._file_menu_list:
@@ -93,7 +203,27 @@ class AssetImporterExtension(omni.ext.IExt):
                 appear_after="Save Flattened As...",
                 enable_fn=enable_export_menu,
                 onclick_fn=_on_file_export,
-            )
+            ),
+            MenuItemDescription(
+                name=self.EXPORT_FOLDER_MENU_NAME,
+                glyph="none.svg",
+                appear_after=self.EXPORT_MENU_NAME,
+                onclick_fn=lambda: self._on_folder_export_menu_clicked(self._get_current_dir_in_content_window()),
+            ),
+            MenuItemDescription(
+                name=self.PUBLISH_CHANGES_MENU_NAME,
+                glyph="none.svg",
+                appear_after=self.EXPORT_FOLDER_MENU_NAME,
+                enable_fn=enable_export_menu,
+                onclick_fn=lambda: self._on_publish_changes_menu_clicked(omni.usd.get_context().get_stage()),
+            ),
+            MenuItemDescription(
+                name=self.EXPORT_SHARDED_MENU_NAME,
+                glyph="none.svg",
+                appear_after=self.PUBLISH_CHANGES_MENU_NAME,
+                enable_fn=enable_export_menu,
+                onclick_fn=lambda: self._on_export_sharded_menu_clicked(omni.usd.get_context().get_stage()),
+            ),
         ]
 
         omni.kit.menu.utils.add_menu_items(self._file_menu_list, "File")
@@ -106,35 +236,208 @@ class AssetImporterExtension(omni.ext.IExt):
     def _on_file_export_menu_clicked(self, stage):
         current_dir = self._get_current_dir_in_content_window()
         carb.log_info(f"current_dir:{current_dir}")
-        script_path = os.path.abspath(__file__)
-        carb.log_info(f"script_path:{script_path}")
         display_name = stage.GetRootLayer().GetDisplayName()
         usd_path = stage.GetRootLayer().identifier.replace("\\", "/")
         carb.log_info(f"usd_path:{usd_path}")
-        root_path = os.path.dirname(script_path)
-        root_path = root_path.replace("file:/","")
-        root_path = os.path.join(root_path,"../../../../data")
-        carb.log_info(f"root_path:{root_path}")
 
         file_name, _ = os.path.splitext(display_name)
         if not self._export_option_window:
             self._export_option_window = ExportOptionsWindow(None)
-        
-        self.out_put_path = os.path.join(root_path, f"temp.glb")
-        self.target_file_name = file_name
-        self.out_put_path = self.out_put_path.replace("\\", "/")
-        carb.log_info(f"out_put_path:{self.out_put_path}")
-        if os.path.exists(self.out_put_path):
-            carb.log_info("remove file....." + self.out_put_path)
-            os.remove(self.out_put_path)
-        # usd_path = stage.GetRootLayer().identifier.replace("\\", "/")
-        # self._export_option_window.set_farm_export_fn(lambda: (usd_path, out_put_path))
-        self._export_option_window.show(self.out_put_path)
+
+        def export(context):
+            # Every export gets its own staging folder, so overlapping exports never share an output path.
+            job = self._workspace.create_job(file_name, context, usd_path)
+            carb.log_info(f"out_put_path:{job.output_path}")
+            self._progress.add_job(job.output_path, job.target_name)
+            return self._exporter.create_usd_export_task(
+                stage, job.output_path, context, lambda success: self._asset_convert_finished(job, success))
+
+        self._export_option_window.show(f"{file_name}.glb")
+        self._export_option_window.set_import_fn(export)
+        self._export_option_window.set_farm_export_fn(
+            lambda context, farm_url, task_comment: asyncio.ensure_future(self._run_farm_export(
+                file_name, farm_url, task_comment,
+                lambda farm_exporter: farm_exporter.export_stage_async(stage, file_name, context),
+            ))
+        )
+
+    def _on_folder_export_menu_clicked(self, folder_path):
+        carb.log_info(f"export folder:{folder_path}")
+        if not folder_path:
+            nm.post_notification("Select a folder in the Content window first.", status=nm.NotificationStatus.WARNING)
+            return
+        if self._batch_exporter:
+            nm.post_notification("A folder export is already running.", status=nm.NotificationStatus.WARNING)
+            return
+
+        if not self._export_option_window:
+            self._export_option_window = ExportOptionsWindow(None)
+        self._export_option_window.show(".glb")
+        self._export_option_window.set_import_fn(
+            lambda context: asyncio.ensure_future(self._run_batch_export(folder_path, context))
+        )
+        self._export_option_window.set_farm_export_fn(
+            lambda context, farm_url, task_comment: asyncio.ensure_future(self._run_farm_export(
+                folder_path, farm_url, task_comment,
+                lambda farm_exporter: farm_exporter.export_folder_async(folder_path, context),
+            ))
+        )
+
+    async def _run_batch_export(self, folder_path, context):
+        def on_job_status(job):
+            carb.log_info(f"batch job {job.relative_path}: {job.status}")
+
+        self._batch_exporter = BatchExporter(
+            self._exporter, self.dwTool, self._workspace, status_fn=on_job_status, progress_tracker=self._progress
+        )
+        try:
+            report = await self._batch_exporter.run_async(folder_path, context)
+        finally:
+            self._batch_exporter = None
+        status = nm.NotificationStatus.INFO if report["failed"] == 0 else nm.NotificationStatus.WARNING
+        nm.post_notification(
+            f"Exported {report['succeeded']}/{report['total']} USD files from {folder_path} to Daystar World.",
+            status=status,
+        )
+
+    def _on_stage_event(self, event):
+        if event.type == int(omni.usd.StageEventType.CLOSING):
+            # Edits of the next stage are tracked from its first publish.
+            self._delta_exporter.stop_tracking()
+
+    def _on_publish_changes_menu_clicked(self, stage):
+        if self._delta_exporter.is_publishing():
+            nm.post_notification("A publish is already running.", status=nm.NotificationStatus.WARNING)
+            return
+        file_name, _ = os.path.splitext(stage.GetRootLayer().GetDisplayName())
+        if not self._export_option_window:
+            self._export_option_window = ExportOptionsWindow(None)
+        self._export_option_window.show(f"{file_name}.glb")
+        self._export_option_window.set_import_fn(
+            lambda context: asyncio.ensure_future(self._run_delta_publish(stage, file_name, context))
+        )
+        # Only the changed parts are converted, there's nothing to spread over a farm.
+        self._export_option_window.set_farm_export_fn(None)
+
+    async def _run_delta_publish(self, stage, asset_name, context):
+        try:
+            report = await self._delta_exporter.publish_async(stage, asset_name, context)
+        except Exception as e:
+            carb.log_error(f"Failed to publish the changes of {asset_name}: {e}")
+            nm.post_notification(f"Failed to publish the changes of {asset_name}: {e}", status=nm.NotificationStatus.WARNING)
+            return
+        status = nm.NotificationStatus.INFO if report["failed"] == 0 else nm.NotificationStatus.WARNING
+        nm.post_notification(
+            f"Published {asset_name}: {report['uploaded']} of {report['parts']} part(s) uploaded, "
+            f"{report['removed']} removed, {report['failed']} failed.",
+            status=status,
+        )
+
+    def _on_export_sharded_menu_clicked(self, stage):
+        if self._sharded_export_running:
+            nm.post_notification("A sharded export is already running.", status=nm.NotificationStatus.WARNING)
+            return
+        file_name, _ = os.path.splitext(stage.GetRootLayer().GetDisplayName())
+        if not self._export_option_window:
+            self._export_option_window = ExportOptionsWindow(None)
+        self._export_option_window.show(f"{file_name}.glb")
         self._export_option_window.set_import_fn(
-            lambda context: self._exporter.create_usd_export_task(
-                stage, self.out_put_path, context, self._asset_convert_finished)
+            lambda context: asyncio.ensure_future(self._run_sharded_export(stage, file_name, context))
+        )
+        self._export_option_window.set_farm_export_fn(
+            lambda context, farm_url, task_comment: asyncio.ensure_future(self._run_farm_export(
+                file_name, farm_url, task_comment,
+                lambda farm_exporter: farm_exporter.export_stage_async(stage, file_name, context),
+            ))
+        )
+
+    def _create_shard_exporter(self):
+        settings = carb.settings.get_settings()
+        return ShardExporter(
+            self._exporter,
+            self.dwTool,
+            self._workspace,
+            settings.get_as_string(f"{SHARDING_SETTINGS}/mode") or "grid",
+            settings.get_as_int(f"{SHARDING_SETTINGS}/grid_size") or 4,
+            settings.get_as_int(f"{SHARDING_SETTINGS}/max_workers") or 4,
+        )
+
+    async def _run_sharded_export(self, stage, asset_name, context):
+        shard_exporter = self._create_shard_exporter()
+        self._sharded_export_running = True
+        try:
+            report = await shard_exporter.export_async(stage, asset_name, context)
+        except Exception as e:
+            carb.log_error(f"Failed to export {asset_name} in shards: {e}")
+            nm.post_notification(f"Failed to export {asset_name} in shards: {e}", status=nm.NotificationStatus.WARNING)
+            return
+        finally:
+            self._sharded_export_running = False
+        succeeded = report["failed"] == 0 and report["index_uploaded"]
+        status = nm.NotificationStatus.INFO if succeeded else nm.NotificationStatus.WARNING
+        nm.post_notification(
+            f"Exported {asset_name} in {report['shards']} shard(s): {report['uploaded']} uploaded, {report['failed']} failed.",
+            status=status,
+        )
+
+    async def _run_farm_export(self, name, farm_url, task_comment, export_fn):
+        """Runs the farm export of name, export_fn(farm_exporter) returns its coroutine."""
+        settings = carb.settings.get_settings()
+        staging_url = settings.get_as_string(f"{FARM_SETTINGS}/staging_url")
+        if not staging_url:
+            nm.post_notification(
+                f"Set {FARM_SETTINGS}/staging_url to a folder the farm nodes can read and write.",
+                status=nm.NotificationStatus.WARNING,
+            )
+            return
+        farm_exporter = FarmExporter(
+            FarmQueueClient(farm_url),
+            self.dwTool,
+            self._workspace,
+            staging_url,
+            self._create_shard_exporter(),
+            self._progress,
+            settings.get_as_float(f"{FARM_SETTINGS}/poll_interval") or 5.0,
+            settings.get_as_float(f"{FARM_SETTINGS}/timeout") or 7200.0,
         )
+        farm_exporter.task_comment = task_comment
+        self._farm_exporters.append(farm_exporter)
+        try:
+            report = await export_fn(farm_exporter)
+        except Exception as e:
+            carb.log_error(f"Failed to export {name} on the farm: {e}")
+            nm.post_notification(f"Failed to export {name} on the farm: {e}", status=nm.NotificationStatus.WARNING)
+            return
+        finally:
+            if farm_exporter in self._farm_exporters:
+                self._farm_exporters.remove(farm_exporter)
+        succeeded = report["failed"] == 0 and report.get("index_uploaded") is not False
+        status = nm.NotificationStatus.INFO if succeeded else nm.NotificationStatus.WARNING
+        nm.post_notification(
+            f"Exported {name} on the farm in {report['tasks']} task(s): {report['uploaded']} uploaded, {report['failed']} failed.",
+            status=status,
+        )
+
+    def _asset_convert_finished(self, job, success):
+        carb.log_info(f"asset_convert_finished:{job.job_id} {success}")
+        if not success or self._progress.is_cancelled(job.output_path):
+            self._progress.finish(job.output_path, False)
+            self._workspace.finish_job(job, False)
+            return
+
+        async def upload():
+            uploaded = False
+            assets = [(job.target_name, job.output_path)] + [
+                (f"{job.target_name}_lod{level}", path) for level, path in self._exporter.lod_assets(job.output_path)
+            ]
+            try:
+                uploaded = await self._progress.upload_async(job.output_path, self.dwTool, assets)
+            except UploadCancelled:
+                carb.log_info(f"upload {job.target_name} cancelled")
+            except Exception as e:
+                carb.log_error(f"upload {job.target_name} failed: {e}")
+            finally:
+                self._progress.finish(job.output_path, uploaded)
+                self._workspace.finish_job(job, uploaded)
 
-    def _asset_convert_finished(self,success):
-        carb.log_info(f"asset_convert_finished:{success}")
-        self.dwTool.uploadAssetToDW( self.target_file_name,self.out_put_path)
+        asyncio.ensure_future(upload())
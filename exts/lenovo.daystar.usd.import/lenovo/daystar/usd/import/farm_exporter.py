@@ -0,0 +1,330 @@
+import os
+import time
+import asyncio
+import getpass
+import carb
+import omni.client
+from pxr import Sdf, Usd
+from .utils import Utils
+from .batch_exporter import BatchExporter
+from .dwtool import _requests
+from .pipeline import ExportPipeline
+from .progress_tracker import ProgressTracker
+from .tracing import Phase
+from .upload_stream import UploadCancelled
+
+
+FARM_SETTINGS = "/exts/lenovo.daystar.usd.import/farm"
+
+SUBMIT_PATH = "/queue/management/tasks/submit"
+INFO_PATH = "/queue/management/tasks/info/{task_id}"
+CANCEL_PATH = "/queue/management/tasks/cancel"
+
+# Stage metadata is only read from the root layer, so the shard layers copy it.
+_STAGE_METADATA = ("defaultPrim", "upAxis", "metersPerUnit", "startTimeCode", "endTimeCode", "timeCodesPerSecond")
+
+
+class FarmTaskStatus:
+    SUBMITTED = "submitted"
+    RUNNING = "running"
+    FINISHED = "finished"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    DONE = (FINISHED, FAILED, CANCELLED)
+
+
+class FarmQueueClient:
+    """Submits tasks to an Omniverse Farm queue and follows them through its management API.
+
+    The calls block, FarmExporter runs them in the default executor.
+
+    Args:
+        url (str): URL of the farm queue, e.g. http://farm:8222.
+        timeout (float): Seconds a request may take.
+    """
+
+    def __init__(self, url, timeout=30.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def submit(self, task):
+        """Submits the task dict, returns its task id."""
+        response = _requests().post(self.url + SUBMIT_PATH, json=task, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["task_id"]
+
+    def get_status(self, task_id):
+        """Returns the FarmTaskStatus of the task."""
+        response = _requests().get(self.url + INFO_PATH.format(task_id=task_id), timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["status"]
+
+    def cancel(self, task_id):
+        response = _requests().post(self.url + CANCEL_PATH, json={"task_id": task_id}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class FarmExporter:
+    """Converts a stage or a folder of USD files on farm nodes, then uploads the results to Daystar World.
+
+    A stage is split like ShardExporter splits it. Every shard is written to the farm staging folder
+    as a small layer that sublayers the stage and deactivates the prims outside the shard, so each
+    farm node only loads its part of the scene. A stage of a single shard is converted as is. A folder
+    becomes one task per USD file. All the `convert-asset` tasks are submitted at once and polled
+    until they are done, then the converted files are copied back from the farm staging folder and
+    uploaded, with the shard index for a stage.
+
+    Args:
+        client (FarmQueueClient): Queue the tasks are submitted to.
+        dw_tool (DWTool): Logged in DWTool used for the uploads.
+        workspace (StagingWorkspace): Workspace of the local staging folders.
+        staging_url (str): Folder the farm nodes and this app can both read and write, for the shard
+            layers and the converted files.
+        shard_exporter (ShardExporter): Plans the shards of a stage and builds their index.
+        progress_tracker (ProgressTracker): Tracks the tasks as jobs, cancelling one cancels its task.
+        poll_interval (float): Seconds between two polls of the task statuses.
+        timeout (float): Seconds after which the tasks still running are cancelled.
+        upload_workers (int): Number of concurrent uploads.
+    """
+
+    def __init__(
+        self, client, dw_tool, workspace, staging_url, shard_exporter, progress_tracker=None,
+        poll_interval=5.0, timeout=7200.0, upload_workers=2,
+    ):
+        self._client = client
+        self._dw_tool = dw_tool
+        self._workspace = workspace
+        self.staging_url = staging_url.rstrip("/")
+        self._shard_exporter = shard_exporter
+        self.progress = progress_tracker or ProgressTracker()
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.upload_workers = max(1, upload_workers)
+        self.task_comment = ""
+        self._jobs = []
+
+    async def export_stage_async(self, stage, asset_name, asset_converter_context):
+        """Converts the shards of the saved stage on the farm and uploads them and their index, returns the report."""
+        root_layer = stage.GetRootLayer()
+        if root_layer.anonymous:
+            raise RuntimeError("the stage must be saved before it's exported on the farm")
+        if root_layer.dirty:
+            carb.log_warn(f"{asset_name} has unsaved changes, the farm exports the saved stage")
+        start_time = time.time()
+        shards = self._shard_exporter.plan_shards(stage)
+        if not shards:
+            raise RuntimeError(f"{asset_name} has nothing to export")
+
+        jobs = []
+        for shard in shards:
+            name = f"{asset_name}_shard_{shard.index}" if len(shards) > 1 else asset_name
+            job = self._workspace.create_job(name, asset_converter_context, root_layer.identifier)
+            job.shard = shard
+            job.import_path = root_layer.identifier
+            if len(shards) > 1:
+                job.import_path = f"{self._remote_folder(job)}/{Utils.make_valid_identifier(name)}.usda"
+                self.write_shard_layer(stage, shard, job.import_path)
+            jobs.append(job)
+        carb.log_info(f"Farm export of {asset_name}: {len(jobs)} task(s)")
+
+        # The shards make up one asset, a failed task would leave it partial.
+        await self._run_jobs_async(jobs, {"asset": asset_name}, all_or_nothing=True)
+        index_uploaded = None
+        if len(jobs) > 1 and all(job.uploaded for job in jobs):
+            index = self._shard_exporter.build_index(asset_name, jobs)
+            index_uploaded = await self._shard_exporter.upload_index_async(index)
+        report = self._report(jobs, start_time)
+        report.update({"asset": asset_name, "index_uploaded": index_uploaded})
+        carb.log_info(f"Farm export of {asset_name} finished: {report}")
+        return report
+
+    async def export_folder_async(self, folder_path, asset_converter_context):
+        """Converts every USD file under folder_path on the farm and uploads them, returns the report."""
+        start_time = time.time()
+        jobs = []
+        async for absolute_path, relative_path in Utils.walk_folder_async(folder_path, include_fn=Utils.is_usd):
+            relative_path = relative_path.split("/", 1)[-1]
+            job = self._workspace.create_job(BatchExporter.target_name(relative_path), asset_converter_context, absolute_path)
+            job.import_path = absolute_path
+            jobs.append(job)
+        carb.log_info(f"Farm export of {folder_path}: {len(jobs)} task(s)")
+
+        await self._run_jobs_async(jobs, {"folder": folder_path})
+        report = self._report(jobs, start_time)
+        report["folder"] = folder_path
+        carb.log_info(f"Farm export of {folder_path} finished: {report}")
+        return report
+
+    def write_shard_layer(self, stage, shard, layer_path):
+        """Writes the layer of shard to layer_path, the stage with every prim outside the shard deactivated.
+
+        The shard keeps the prims it depends on, e.g. its materials, like its masked stage does.
+        """
+        masked_stage = Usd.Stage.OpenMasked(stage.GetRootLayer(), Usd.StagePopulationMask(shard.paths))
+        masked_stage.ExpandPopulationMask()
+        mask = masked_stage.GetPopulationMask()
+
+        if "://" not in layer_path:
+            os.makedirs(os.path.dirname(layer_path), exist_ok=True)
+        layer = Sdf.Layer.CreateNew(layer_path)
+        root_layer = stage.GetRootLayer()
+        for key in _STAGE_METADATA:
+            if root_layer.pseudoRoot.HasInfo(key):
+                layer.pseudoRoot.SetInfo(key, root_layer.pseudoRoot.GetInfo(key))
+        layer.subLayerPaths.append(root_layer.identifier)
+
+        pending = list(stage.GetPseudoRoot().GetChildren())
+        while pending:
+            prim = pending.pop()
+            path = prim.GetPath()
+            if mask.IncludesSubtree(path):
+                continue
+            if mask.Includes(path):
+                pending.extend(prim.GetChildren())
+            else:
+                Sdf.CreatePrimInLayer(layer, path).active = False
+        layer.Save()
+
+    def cancel(self):
+        """Cancels the farm tasks of the running export and their uploads."""
+        for job in self._jobs:
+            self.progress.cancel(job.output_path)
+
+    def _remote_folder(self, job):
+        return f"{self.staging_url}/{job.job_id}"
+
+    def _task(self, job, metadata):
+        return {
+            "user": getpass.getuser(),
+            "task_type": "convert-asset",
+            "task_args": {},
+            "task_function": "convert.asset.process",
+            "task_function_args": {
+                "import_path": job.import_path,
+                "output_path": job.remote_output_path,
+                "converter_settings": job.context.to_dict() if job.context is not None else {},
+            },
+            "task_comment": self.task_comment,
+            "status": FarmTaskStatus.SUBMITTED,
+            "metadata": dict(metadata, target_name=job.target_name),
+        }
+
+    async def _run_jobs_async(self, jobs, metadata, all_or_nothing=False):
+        """Runs the farm tasks of jobs, then fetches and uploads the results of the finished ones.
+
+        With all_or_nothing, nothing is uploaded unless every task finished.
+        """
+        loop = asyncio.get_event_loop()
+        self._jobs = jobs
+        for job in jobs:
+            job.remote_output_path = f"{self._remote_folder(job)}/{os.path.basename(job.output_path)}"
+            job.task_id = None
+            job.farm_status = None
+            job.uploaded = False
+            self.progress.add_job(job.output_path, job.target_name)
+            self.progress.set_phase(job.output_path, Phase.CONVERT)
+
+        for job in jobs:
+            if self.progress.is_cancelled(job.output_path):
+                continue
+            try:
+                job.task_id = await loop.run_in_executor(None, self._client.submit, self._task(job, metadata))
+                job.farm_status = FarmTaskStatus.SUBMITTED
+            except Exception as e:
+                carb.log_error(f"Failed to submit {job.target_name} to the farm: {e}")
+                job.farm_status = FarmTaskStatus.FAILED
+                continue
+            self.progress.add_cancel_fn(
+                job.output_path, lambda job=job: loop.run_in_executor(None, self._cancel_task, job)
+            )
+
+        await self._wait_for_tasks_async(jobs)
+
+        async def fetch(job):
+            result = await loop.run_in_executor(
+                None,
+                lambda: omni.client.copy(
+                    job.remote_output_path, job.output_path, behavior=omni.client.CopyBehavior.OVERWRITE
+                ),
+            )
+            if result != omni.client.Result.OK:
+                carb.log_error(f"Failed to fetch {job.remote_output_path} from the farm")
+                return False
+            return True
+
+        async def upload(job):
+            try:
+                job.uploaded = await self.progress.upload_async(
+                    job.output_path, self._dw_tool, [(job.target_name, job.output_path)]
+                )
+            except UploadCancelled:
+                carb.log_info(f"upload {job.target_name} cancelled")
+            return job.uploaded
+
+        # Only uploaded once every task is done, so a cancelled export uploads nothing.
+        finished = [
+            job for job in jobs
+            if job.farm_status == FarmTaskStatus.FINISHED and not self.progress.is_cancelled(job.output_path)
+        ]
+        if all_or_nothing and len(finished) < len(jobs):
+            if finished:
+                carb.log_error(f"{len(jobs) - len(finished)} of {len(jobs)} farm task(s) failed, nothing is uploaded")
+            finished = []
+        if finished:
+            await ExportPipeline(fetch, upload, self.upload_workers, self.upload_workers, len(finished)).run_async(finished)
+        for job in jobs:
+            self.progress.finish(job.output_path, job.uploaded)
+            self._workspace.finish_job(job, job.uploaded)
+        self._jobs = []
+
+    async def _wait_for_tasks_async(self, jobs):
+        loop = asyncio.get_event_loop()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            pending = [job for job in jobs if job.task_id and job.farm_status not in FarmTaskStatus.DONE]
+            if not pending:
+                return
+            if time.monotonic() > deadline:
+                carb.log_error(f"{len(pending)} farm task(s) didn't finish in {self.timeout}s, cancelling them")
+                await asyncio.gather(*[loop.run_in_executor(None, self._cancel_task, job) for job in pending])
+                for job in pending:
+                    job.farm_status = FarmTaskStatus.FAILED
+                return
+            for job in pending:
+                try:
+                    status = await loop.run_in_executor(None, self._client.get_status, job.task_id)
+                except Exception as e:
+                    # The queue may be briefly unreachable, the task is polled again.
+                    carb.log_warn(f"Failed to get the status of farm task {job.task_id}: {e}")
+                    continue
+                if status != job.farm_status:
+                    carb.log_info(f"farm task of {job.target_name}: {status}")
+                    job.farm_status = status
+                    if status == FarmTaskStatus.RUNNING:
+                        self.progress.set_progress(job.output_path, 0.5)
+                    elif status == FarmTaskStatus.FINISHED:
+                        self.progress.set_progress(job.output_path, 1.0)
+            await asyncio.sleep(self.poll_interval)
+
+    def _cancel_task(self, job):
+        if not job.task_id or job.farm_status in FarmTaskStatus.DONE:
+            return
+        try:
+            self._client.cancel(job.task_id)
+        except Exception as e:
+            carb.log_warn(f"Failed to cancel farm task {job.task_id}: {e}")
+
+    def _report(self, jobs, start_time):
+        statuses = [job.farm_status for job in jobs]
+        return {
+            "tasks": len(jobs),
+            "finished": statuses.count(FarmTaskStatus.FINISHED),
+            "uploaded": len([job for job in jobs if job.uploaded]),
+            "failed": len([job for job in jobs if not job.uploaded]),
+            "jobs": [
+                {"target_name": job.target_name, "task_id": job.task_id, "status": job.farm_status, "uploaded": job.uploaded}
+                for job in jobs
+            ],
+            "duration": round(time.time() - start_time, 3),
+        }
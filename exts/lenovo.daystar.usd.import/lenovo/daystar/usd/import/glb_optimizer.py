@@ -0,0 +1,469 @@
+import json
+import time
+import struct
+import hashlib
+import carb
+import numpy as np
+
+
+GLB_MAGIC = 0x46546C67
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+TRIANGLES = 4
+
+BYTE = 5120
+UNSIGNED_BYTE = 5121
+SHORT = 5122
+UNSIGNED_SHORT = 5123
+UNSIGNED_INT = 5125
+FLOAT = 5126
+
+COMPONENT_DTYPES = {
+    BYTE: np.int8,
+    UNSIGNED_BYTE: np.uint8,
+    SHORT: np.int16,
+    UNSIGNED_SHORT: np.uint16,
+    UNSIGNED_INT: np.uint32,
+    FLOAT: np.float32,
+}
+TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+COMPONENT_TYPES = {np.dtype(v): k for k, v in COMPONENT_DTYPES.items()}
+SIZE_TYPES = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4"}
+
+# Extensions whose data this optimizer doesn't understand, GLBs using them are left untouched.
+UNSUPPORTED_EXTENSIONS = ("KHR_draco_mesh_compression", "EXT_meshopt_compression", "KHR_mesh_quantization")
+# Extensions that don't reference accessors, or whose references GlbOptimizer remaps. It renumbers
+# and drops accessors, so GLBs using any other extension are left untouched by it.
+ACCESSOR_SAFE_EXTENSIONS = (
+    "EXT_mesh_gpu_instancing",
+    "EXT_texture_avif",
+    "EXT_texture_webp",
+    "KHR_lights_punctual",
+    "KHR_texture_basisu",
+    "KHR_texture_transform",
+    "KHR_xmp_json_ld",
+    "MSFT_lod",
+)
+ACCESSOR_SAFE_PREFIXES = ("KHR_materials_",)
+
+
+def read_glb(data):
+    """Returns the (json dict, binary chunk) of a GLB file content."""
+    magic, version, length = struct.unpack_from("<III", data, 0)
+    if magic != GLB_MAGIC or version != 2:
+        raise ValueError("Not a glTF 2.0 binary file")
+    offset = 12
+    gltf = None
+    binary = b""
+    while offset < length:
+        chunk_length, chunk_type = struct.unpack_from("<II", data, offset)
+        chunk = data[offset + 8 : offset + 8 + chunk_length]
+        if chunk_type == CHUNK_JSON:
+            gltf = json.loads(bytes(chunk).decode("utf-8"))
+        elif chunk_type == CHUNK_BIN:
+            binary = bytes(chunk)
+        offset += 8 + chunk_length
+    return gltf, binary
+
+
+def write_glb(gltf, binary):
+    json_chunk = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    binary += b"\0" * (-len(binary) % 4)
+    length = 12 + 8 + len(json_chunk) + (8 + len(binary) if binary else 0)
+    data = struct.pack("<III", GLB_MAGIC, 2, length) + struct.pack("<II", len(json_chunk), CHUNK_JSON) + json_chunk
+    if binary:
+        data += struct.pack("<II", len(binary), CHUNK_BIN) + binary
+    return data
+
+
+def unsupported_reason(gltf):
+    """Returns why the buffers of gltf can't be rewritten, or None if they can."""
+    buffers = gltf.get("buffers", [])
+    if len(buffers) > 1 or any("uri" in b for b in buffers):
+        return "external or multiple buffers"
+    for extension in gltf.get("extensionsUsed", []):
+        if extension in UNSUPPORTED_EXTENSIONS:
+            return f"uses {extension}"
+    if any("sparse" in a or "bufferView" not in a for a in gltf.get("accessors", [])):
+        return "sparse accessors"
+    return None
+
+
+def read_accessor(gltf, binary, accessor_index):
+    """Returns a copy of the data of an accessor as a (count, components) array."""
+    accessor = gltf["accessors"][accessor_index]
+    view = gltf["bufferViews"][accessor["bufferView"]]
+    dtype = np.dtype(COMPONENT_DTYPES[accessor["componentType"]])
+    components = TYPE_SIZES[accessor["type"]]
+    stride = view.get("byteStride") or dtype.itemsize * components
+    offset = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+    array = np.ndarray(
+        shape=(accessor["count"], components), dtype=dtype, buffer=binary,
+        offset=offset, strides=(stride, dtype.itemsize)
+    )
+    return array.copy()
+
+
+def morton_order(points):
+    """Returns the indices sorting points along a 3D Morton (Z-order) curve."""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.int64)
+    low = points.min(axis=0)
+    extent = np.maximum(points.max(axis=0) - low, 1e-12)
+    cells = ((points - low) / extent * 1023).astype(np.uint64)
+
+    def spread(v):
+        v = (v | (v << np.uint64(16))) & np.uint64(0x030000FF)
+        v = (v | (v << np.uint64(8))) & np.uint64(0x0300F00F)
+        v = (v | (v << np.uint64(4))) & np.uint64(0x030C30C3)
+        v = (v | (v << np.uint64(2))) & np.uint64(0x09249249)
+        return v
+
+    codes = spread(cells[:, 0]) | (spread(cells[:, 1]) << np.uint64(1)) | (spread(cells[:, 2]) << np.uint64(2))
+    return np.argsort(codes, kind="stable")
+
+
+class _BufferBuilder:
+    """Packs bufferViews into a new binary chunk, sharing views whose content is identical."""
+
+    def __init__(self):
+        self.views = []
+        self._chunks = []
+        self._length = 0
+        self._known = {}
+
+    def add(self, data, target=None, byte_stride=None):
+        key = (hashlib.sha1(data).digest(), target, byte_stride)
+        if key in self._known:
+            return self._known[key]
+        padding = -self._length % 4
+        if padding:
+            self._chunks.append(b"\0" * padding)
+            self._length += padding
+        view = {"buffer": 0, "byteOffset": self._length, "byteLength": len(data)}
+        if target:
+            view["target"] = target
+        if byte_stride:
+            view["byteStride"] = byte_stride
+        self._chunks.append(data)
+        self._length += len(data)
+        self.views.append(view)
+        self._known[key] = len(self.views) - 1
+        return self._known[key]
+
+    def build(self):
+        return b"".join(self._chunks)
+
+
+class GlbOptimizer:
+    """Optimizes the meshes of a GLB with NumPy before it's uploaded.
+
+    Triangle primitives sharing the same vertex attributes are processed together:
+    duplicate vertices are merged, triangles are sorted along a Morton curve of their
+    centroids and vertices are renumbered in first-use order, so consecutive triangles
+    reuse recently transformed vertices. Normals, tangents, texture coordinates and
+    positions can be quantized as allowed by KHR_mesh_quantization. Accessors and buffer
+    views nothing references are dropped, and identical buffer views are stored once.
+    The accessors of EXT_mesh_gpu_instancing are remapped, GLBs using other extensions that
+    may reference accessors are left untouched.
+
+    Args:
+        dedup_vertices (bool): Merge identical vertices.
+        reorder_indices (bool): Reorder triangles and vertices for cache locality.
+        quantize (bool): Quantize normals, tangents and texture coordinates.
+        quantize_positions (bool): Also quantize positions to 16 bits over the mesh bounds.
+    """
+
+    def __init__(self, dedup_vertices=True, reorder_indices=True, quantize=True, quantize_positions=True):
+        self.dedup_vertices = dedup_vertices
+        self.reorder_indices = reorder_indices
+        self.quantize = quantize
+        self.quantize_positions = quantize_positions
+
+    def optimize_file(self, input_path, output_path=None):
+        """Optimizes the GLB at input_path in place or into output_path, returns the stats."""
+        with open(input_path, "rb") as f:
+            data = f.read()
+        optimized, stats = self.optimize(data)
+        with open(output_path or input_path, "wb") as f:
+            f.write(optimized)
+        carb.log_info(
+            f"Optimized {input_path}: {stats['size_before']} -> {stats['size_after']} bytes, "
+            f"{stats['vertices_before']} -> {stats['vertices_after']} vertices in {stats['duration']:.3f}s"
+        )
+        return stats
+
+    def optimize(self, data):
+        """Returns the optimized GLB content and the stats of the optimization."""
+        start_time = time.time()
+        gltf, binary = read_glb(data)
+        stats = {
+            "size_before": len(data),
+            "size_after": len(data),
+            "vertices_before": 0,
+            "vertices_after": 0,
+            "accessors_before": len(gltf.get("accessors", [])),
+            "accessors_after": len(gltf.get("accessors", [])),
+            "skipped": None,
+        }
+        reason = self._unsupported_reason(gltf)
+        if reason:
+            stats["skipped"] = reason
+            stats["duration"] = time.time() - start_time
+            return data, stats
+
+        self._gltf = gltf
+        self._binary = binary
+        self._accessors = gltf.get("accessors", [])
+        self._builder = _BufferBuilder()
+        self._new_accessors = []
+        self._copied = {}
+        self._quantized = False
+
+        for mesh_index, mesh in enumerate(gltf.get("meshes", [])):
+            self._optimize_mesh(mesh_index, mesh, stats)
+
+        for skin in gltf.get("skins", []):
+            if "inverseBindMatrices" in skin:
+                skin["inverseBindMatrices"] = self._copy_accessor(skin["inverseBindMatrices"])
+        for animation in gltf.get("animations", []):
+            for sampler in animation.get("samplers", []):
+                sampler["input"] = self._copy_accessor(sampler["input"])
+                sampler["output"] = self._copy_accessor(sampler["output"])
+        for node in gltf.get("nodes", []):
+            instancing = node.get("extensions", {}).get("EXT_mesh_gpu_instancing")
+            if instancing:
+                instancing["attributes"] = {
+                    name: self._copy_accessor(index) for name, index in instancing.get("attributes", {}).items()
+                }
+        for image in gltf.get("images", []):
+            if "bufferView" in image:
+                image["bufferView"] = self._builder.add(self._view_bytes(image["bufferView"]))
+
+        new_binary = self._builder.build()
+        gltf["accessors"] = self._new_accessors
+        gltf["bufferViews"] = self._builder.views
+        if new_binary:
+            gltf["buffers"] = [{"byteLength": len(new_binary)}]
+        else:
+            gltf.pop("buffers", None)
+        for key in ("accessors", "bufferViews"):
+            if not gltf[key]:
+                del gltf[key]
+        if self._quantized:
+            for key in ("extensionsUsed", "extensionsRequired"):
+                extensions = gltf.setdefault(key, [])
+                if "KHR_mesh_quantization" not in extensions:
+                    extensions.append("KHR_mesh_quantization")
+
+        optimized = write_glb(gltf, new_binary)
+        stats["size_after"] = len(optimized)
+        stats["accessors_after"] = len(self._new_accessors)
+        stats["duration"] = time.time() - start_time
+        self._gltf = self._binary = self._builder = None
+        return optimized, stats
+
+    def _unsupported_reason(self, gltf):
+        reason = unsupported_reason(gltf)
+        if reason:
+            return reason
+        for extension in gltf.get("extensionsUsed", []):
+            if extension not in ACCESSOR_SAFE_EXTENSIONS and not extension.startswith(ACCESSOR_SAFE_PREFIXES):
+                # Its accessors, if any, would be left pointing at the wrong data.
+                return f"uses {extension}"
+        return None
+
+    def _view_bytes(self, view_index):
+        view = self._gltf["bufferViews"][view_index]
+        offset = view.get("byteOffset", 0)
+        return self._binary[offset : offset + view["byteLength"]]
+
+    def _read_accessor(self, accessor_index):
+        return read_accessor(self._gltf, self._binary, accessor_index)
+
+    def _add_accessor(self, array, target=None, normalized=False, min_max=False, accessor_type=None, padded_to=None):
+        array = np.ascontiguousarray(array)
+        if array.ndim == 1:
+            array = array.reshape(-1, 1)
+        components = array.shape[1]
+        accessor = {
+            "componentType": COMPONENT_TYPES[array.dtype],
+            "count": int(array.shape[0]),
+            "type": accessor_type or SIZE_TYPES[components],
+        }
+        byte_stride = None
+        if padded_to and array.dtype.itemsize * components % padded_to:
+            # Vertex attributes must be 4 byte aligned, pad each element.
+            padding = (-array.dtype.itemsize * components % padded_to) // array.dtype.itemsize
+            array = np.concatenate([array, np.zeros((array.shape[0], padding), dtype=array.dtype)], axis=1)
+            byte_stride = array.dtype.itemsize * array.shape[1]
+        accessor["bufferView"] = self._builder.add(array.tobytes(), target, byte_stride)
+        if normalized:
+            accessor["normalized"] = True
+        if min_max and len(array):
+            values = array[:, :components]
+            cast = float if array.dtype.kind == "f" else int
+            accessor["min"] = [cast(v) for v in values.min(axis=0)]
+            accessor["max"] = [cast(v) for v in values.max(axis=0)]
+        self._new_accessors.append(accessor)
+        return len(self._new_accessors) - 1
+
+    def _copy_accessor(self, accessor_index, vertex_attribute=False):
+        if accessor_index in self._copied:
+            return self._copied[accessor_index]
+        original = self._accessors[accessor_index]
+        target = self._gltf["bufferViews"][original["bufferView"]].get("target")
+        if vertex_attribute:
+            target = ARRAY_BUFFER
+        new_index = self._add_accessor(
+            self._read_accessor(accessor_index), target, accessor_type=original["type"],
+            padded_to=4 if vertex_attribute else None
+        )
+        accessor = self._new_accessors[new_index]
+        for key in ("normalized", "min", "max", "name"):
+            if key in original:
+                accessor[key] = original[key]
+        self._copied[accessor_index] = new_index
+        return new_index
+
+    def _optimize_mesh(self, mesh_index, mesh, stats):
+        groups = {}
+        for primitive in mesh.get("primitives", []):
+            if primitive.get("mode", TRIANGLES) != TRIANGLES or "targets" in primitive or "extensions" in primitive:
+                self._copy_primitive(primitive)
+                continue
+            key = json.dumps(primitive["attributes"], sort_keys=True)
+            groups.setdefault(key, []).append(primitive)
+
+        # Skinned or instanced meshes can't be moved under a dequantization node.
+        movable = all(
+            "skin" not in node and "extensions" not in node
+            for node in self._gltf.get("nodes", []) if node.get("mesh") == mesh_index
+        )
+        quantize_positions = (
+            self.quantize and self.quantize_positions and movable
+            and groups and sum(len(g) for g in groups.values()) == len(mesh.get("primitives", []))
+        )
+        position_transform = None
+        if quantize_positions:
+            position_transform = self._position_transform(groups)
+
+        for primitives in groups.values():
+            self._optimize_group(primitives, position_transform, stats)
+
+        if position_transform:
+            self._quantized = True
+            self._move_mesh_to_dequantization_nodes(mesh_index, position_transform)
+
+    def _copy_primitive(self, primitive):
+        primitive["attributes"] = {k: self._copy_accessor(v, True) for k, v in primitive["attributes"].items()}
+        if "indices" in primitive:
+            primitive["indices"] = self._copy_accessor(primitive["indices"])
+        for target in primitive.get("targets", []):
+            for name in list(target.keys()):
+                target[name] = self._copy_accessor(target[name], True)
+
+    def _position_transform(self, groups):
+        lows, highs = [], []
+        for primitives in groups.values():
+            accessor = self._accessors[primitives[0]["attributes"]["POSITION"]]
+            if accessor["componentType"] != FLOAT:
+                return None
+            positions = self._read_accessor(primitives[0]["attributes"]["POSITION"])
+            if len(positions):
+                lows.append(positions.min(axis=0))
+                highs.append(positions.max(axis=0))
+        if not lows:
+            return None
+        low = np.min(lows, axis=0).astype(np.float64)
+        extent = float((np.max(highs, axis=0) - low).max())
+        # A uniform scale keeps normals valid without touching them.
+        scale = extent / 65535.0 if extent > 0 else 1.0
+        return low, scale
+
+    def _optimize_group(self, primitives, position_transform, stats):
+        attributes = {name: self._read_accessor(index) for name, index in primitives[0]["attributes"].items()}
+        vertex_count = len(next(iter(attributes.values())))
+        stats["vertices_before"] += vertex_count
+        index_lists = []
+        for primitive in primitives:
+            if "indices" in primitive:
+                index_lists.append(self._read_accessor(primitive["indices"]).ravel().astype(np.int64))
+            else:
+                index_lists.append(np.arange(vertex_count, dtype=np.int64))
+
+        remap = np.arange(vertex_count, dtype=np.int64)
+        if self.dedup_vertices and vertex_count:
+            rows = np.concatenate([a.view(np.uint8).reshape(vertex_count, -1) for a in attributes.values()], axis=1)
+            rows = np.ascontiguousarray(rows).view(np.dtype((np.void, rows.shape[1]))).ravel()
+            _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+            remap = first[inverse.ravel()]
+        index_lists = [remap[indices] for indices in index_lists]
+
+        if self.reorder_indices and "POSITION" in attributes:
+            positions = attributes["POSITION"].astype(np.float64)
+            for i, indices in enumerate(index_lists):
+                if len(indices) % 3:
+                    continue
+                triangles = indices.reshape(-1, 3)
+                order = morton_order(positions[triangles].mean(axis=1))
+                index_lists[i] = triangles[order].ravel()
+
+        # Keep the referenced vertices only, numbered in the order they are first used.
+        all_indices = np.concatenate(index_lists) if index_lists else np.zeros(0, dtype=np.int64)
+        used, first_use = np.unique(all_indices, return_index=True)
+        kept = used[np.argsort(first_use, kind="stable")]
+        new_index = np.zeros(vertex_count, dtype=np.int64)
+        new_index[kept] = np.arange(len(kept))
+        stats["vertices_after"] += len(kept)
+
+        new_attributes = {}
+        for name, array in attributes.items():
+            original = self._accessors[primitives[0]["attributes"][name]]
+            new_attributes[name] = self._write_attribute(name, array[kept], original, position_transform)
+
+        index_dtype = np.uint16 if len(kept) < 65535 else np.uint32
+        for primitive, indices in zip(primitives, index_lists):
+            primitive["attributes"] = dict(new_attributes)
+            primitive["indices"] = self._add_accessor(new_index[indices].astype(index_dtype), ELEMENT_ARRAY_BUFFER)
+
+    def _write_attribute(self, name, array, original, position_transform):
+        normalized = original.get("normalized", False)
+        if self.quantize and original["componentType"] == FLOAT:
+            if name == "POSITION" and position_transform:
+                low, scale = position_transform
+                quantized = np.clip(np.rint((array - low) / scale), 0, 65535).astype(np.uint16)
+                return self._add_accessor(quantized, ARRAY_BUFFER, min_max=True, padded_to=4)
+            if name in ("NORMAL", "TANGENT"):
+                quantized = np.rint(np.clip(array, -1.0, 1.0) * 127).astype(np.int8)
+                self._quantized = True
+                return self._add_accessor(quantized, ARRAY_BUFFER, normalized=True, padded_to=4)
+            if name.startswith("TEXCOORD_") and len(array) and array.min() >= 0.0 and array.max() <= 1.0:
+                quantized = np.rint(array * 65535).astype(np.uint16)
+                self._quantized = True
+                return self._add_accessor(quantized, ARRAY_BUFFER, normalized=True, padded_to=4)
+        return self._add_accessor(
+            array, ARRAY_BUFFER, normalized=normalized, min_max=name == "POSITION", padded_to=4
+        )
+
+    def _move_mesh_to_dequantization_nodes(self, mesh_index, position_transform):
+        low, scale = position_transform
+        nodes = self._gltf.get("nodes", [])
+        for node_index in range(len(nodes)):
+            node = nodes[node_index]
+            if node.get("mesh") != mesh_index:
+                continue
+            # The dequantization transform goes on a child so the node's own children aren't scaled.
+            child = {
+                "name": f"{node.get('name', 'mesh')}_dequantized",
+                "mesh": node.pop("mesh"),
+                "translation": [float(v) for v in low],
+                "scale": [scale, scale, scale],
+            }
+            nodes.append(child)
+            node.setdefault("children", []).append(len(nodes) - 1)
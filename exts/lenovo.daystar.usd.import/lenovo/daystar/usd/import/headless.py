@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import carb
+from omni.kit.asset_converter import AssetConverterContext
+from .utils import Utils
+from .batch_exporter import BatchExporter, BatchJob
+
+
+HEADLESS_SETTINGS = "/exts/lenovo.daystar.usd.import/headless"
+EXTENSION_SETTINGS_ROOT = "/exts/lenovo.daystar.usd.import"
+
+# Credentials never go in the manifest, they come from the environment of the farm node.
+DOMAIN_ENV = "DAYSTAR_DW_DOMAIN"
+USER_ENV = "DAYSTAR_DW_USER"
+PASSWORD_ENV = "DAYSTAR_DW_PASSWORD"
+
+# Same defaults as the options of ExportOptionsWindow.
+DEFAULT_CONVERTER_OPTIONS = {
+    "embed_textures": False,
+    "ignore_animations": False,
+    "ignore_light": True,
+    "ignore_camera": True,
+    "ignore_materials": False,
+    "export_hidden_props": False,
+    "bake_mdl_material": False,
+    "export_separate_gltf": False,
+    "export_mdl_gltf_extension": False,
+}
+
+
+def make_converter_context(options=None):
+    """Returns an AssetConverterContext with the default export options overridden by options.
+
+    Raises:
+        ValueError: If an option isn't an attribute of AssetConverterContext.
+    """
+    context = AssetConverterContext()
+    for name, value in {**DEFAULT_CONVERTER_OPTIONS, **(options or {})}.items():
+        if name.startswith("_") or not hasattr(context, name):
+            raise ValueError(f"unknown converter option {name}")
+        setattr(context, name, value)
+    return context
+
+
+def load_manifest(manifest_path):
+    """Reads and checks a job manifest, see HeadlessRunner.
+
+    Raises:
+        ValueError: If the manifest isn't valid.
+    """
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("inputs"), list) or not manifest["inputs"]:
+        raise ValueError(f"{manifest_path} has no inputs")
+    for entry in manifest["inputs"]:
+        if isinstance(entry, str):
+            continue
+        if not isinstance(entry, dict) or ("path" in entry) == ("folder" in entry):
+            raise ValueError(f"input {entry} needs either a path or a folder")
+    for key in ("converter", "settings"):
+        if not isinstance(manifest.get(key, {}), dict):
+            raise ValueError(f"{key} of {manifest_path} must be an object")
+    # Fails early on unknown converter options instead of in the middle of the run.
+    make_converter_context(manifest.get("converter"))
+    for entry in manifest["inputs"]:
+        if isinstance(entry, dict):
+            make_converter_context({**manifest.get("converter", {}), **entry.get("converter", {})})
+    return manifest
+
+
+class HeadlessRunner:
+    """Runs the exports and uploads of a job manifest without any window, e.g. on a render farm node.
+
+    The manifest is a JSON file:
+
+        {
+            "inputs": [
+                "omniverse://server/factory.usd",
+                {"path": "omniverse://server/robot.usd", "name": "robot_v2", "converter": {"embed_textures": true}},
+                {"folder": "omniverse://server/props"}
+            ],
+            "converter": {"ignore_light": false},
+            "settings": {"glb_optimizer/enabled": true},
+            "domain": "https://daystar.example.com",
+            "max_workers": 1,
+            "upload_workers": 2,
+            "max_retries": 2,
+            "report": "/farm/reports/factory.json"
+        }
+
+    Each input is a USD file, uploaded under `name` or the name of the file, or a folder whose
+    USD files are all exported like File > ExportFolderToDW does. "converter" holds the
+    AssetConverterContext options of all inputs, "settings" overrides extension settings, e.g. to
+    turn on the GLB optimizer. The domain comes from DAYSTAR_DW_DOMAIN or the manifest, the user
+    and password from DAYSTAR_DW_USER and DAYSTAR_DW_PASSWORD.
+
+    Args:
+        exporter (Exporter): Exporter started headless.
+        dw_tool (DWTool): DWTool used to log in and upload.
+        workspace (StagingWorkspace): Workspace of the job staging folders.
+        progress_tracker (ProgressTracker): Tracker the jobs are reported to, see BatchExporter.
+    """
+
+    def __init__(self, exporter, dw_tool, workspace, progress_tracker=None):
+        self._exporter = exporter
+        self._progress = progress_tracker
+        self._dw_tool = dw_tool
+        self._workspace = workspace
+        self._batch_exporter = None
+
+    def cancel(self):
+        if self._batch_exporter:
+            self._batch_exporter.cancel()
+
+    async def run_async(self, manifest_path):
+        """Runs the manifest at manifest_path and returns the report, see BatchExporter.summary.
+
+        Raises:
+            ValueError: If the manifest isn't valid.
+            RuntimeError: If the login to Daystar World failed.
+        """
+        manifest = load_manifest(manifest_path)
+        settings = carb.settings.get_settings()
+        for path, value in manifest.get("settings", {}).items():
+            settings.set(f"{EXTENSION_SETTINGS_ROOT}/{path.strip('/')}", value)
+
+        domain = os.environ.get(DOMAIN_ENV) or manifest.get("domain")
+        user_name = os.environ.get(USER_ENV)
+        password = os.environ.get(PASSWORD_ENV)
+        if not domain or not user_name or not password:
+            raise RuntimeError(f"set {DOMAIN_ENV}, {USER_ENV} and {PASSWORD_ENV} to log in to Daystar World")
+        if not await self._dw_tool.loginToDW(domain, user_name, password):
+            raise RuntimeError(f"failed to log in to {domain} as {user_name}")
+
+        self._batch_exporter = BatchExporter(
+            self._exporter,
+            self._dw_tool,
+            self._workspace,
+            max_workers=manifest.get("max_workers", 1),
+            max_retries=manifest.get("max_retries", 2),
+            upload_workers=manifest.get("upload_workers", 2),
+            progress_tracker=self._progress,
+        )
+        report_path = manifest.get("report") or os.path.join(
+            self._workspace.root, f"headless_report_{time.strftime('%Y%m%d%H%M%S')}.json"
+        )
+        try:
+            report = await self._batch_exporter.run_jobs_async(self._jobs(manifest), manifest_path, report_path)
+        finally:
+            self._batch_exporter = None
+        return report
+
+    async def _jobs(self, manifest):
+        for entry in manifest["inputs"]:
+            if isinstance(entry, str):
+                entry = {"path": entry}
+            context = make_converter_context({**manifest.get("converter", {}), **entry.get("converter", {})})
+            if "folder" in entry:
+                async for job in self._batch_exporter.walk_jobs_async(entry["folder"], context):
+                    yield job
+                continue
+            path = entry["path"].replace("\\", "/")
+            name = entry.get("name") or Utils.make_valid_identifier(os.path.splitext(os.path.basename(path))[0])
+            yield self._workspace.create_job(
+                name, context, path, job_type=BatchJob, relative_path=os.path.basename(path)
+            )
@@ -0,0 +1,339 @@
+import os
+import copy
+import time
+import carb
+import numpy as np
+from .glb_optimizer import (
+    GlbOptimizer, read_glb, write_glb, read_accessor, unsupported_reason, ELEMENT_ARRAY_BUFFER, TRIANGLES,
+    COMPONENT_TYPES,
+)
+
+
+class LodMode:
+    # The levels are extra meshes of the same GLB, referenced by the MSFT_lod extension.
+    MSFT_LOD = "msft_lod"
+    # Every level is a GLB of its own next to the converted file, see lod_asset_path.
+    ASSETS = "assets"
+
+
+def lod_asset_path(output_path, level):
+    """Returns the path of the sibling GLB of a LOD level of output_path."""
+    stem, ext = os.path.splitext(output_path)
+    return f"{stem}_lod{level}{ext}"
+
+
+def find_lod_assets(output_path):
+    """Returns the (level, path) of the sibling LOD GLBs of output_path that exist."""
+    assets = []
+    level = 1
+    while os.path.exists(lod_asset_path(output_path, level)):
+        assets.append((level, lod_asset_path(output_path, level)))
+        level += 1
+    return assets
+
+
+def _quadric_error(quadrics, positions):
+    points = np.concatenate([positions, np.ones((len(positions), 1))], axis=1)
+    return np.einsum("ki,kij,kj->k", points, quadrics, points)
+
+
+def simplify(positions, triangles, target_count, max_passes=1000):
+    """Simplifies a triangle list down to about target_count triangles by quadric error edge collapses.
+
+    Each pass computes the cost of every edge at once and collapses the edges that are the cheapest
+    of both their vertices, so no two collapses of a pass touch the same vertex. A collapse moves a
+    vertex onto its neighbor, which keeps the vertex attributes valid. Vertices on open borders,
+    which includes the UV and normal seams of glTF meshes, never move, so the result doesn't crack.
+    Collapses that would fold a triangle over are skipped for good.
+
+    Args:
+        positions (np.ndarray): (n, 3) vertex positions.
+        triangles (np.ndarray): (m, 3) vertex indices.
+        target_count (int): Number of triangles to reach.
+        max_passes (int): Maximum number of collapse passes.
+
+    Returns:
+        np.ndarray: (k, 3) vertex indices of the simplified triangles.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    vertex_count = len(positions)
+    triangles = triangles[
+        (triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 0] != triangles[:, 2])
+    ]
+    if len(triangles) <= target_count or vertex_count == 0:
+        return triangles
+
+    corners = positions[triangles]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    areas = np.linalg.norm(normals, axis=1)
+    unit_normals = normals / np.maximum(areas, 1e-30)[:, None]
+    planes = np.concatenate([unit_normals, -(unit_normals * corners[:, 0]).sum(axis=1)[:, None]], axis=1)
+    face_quadrics = planes[:, :, None] * planes[:, None, :] * (areas * 0.5)[:, None, None]
+    quadrics = np.zeros((vertex_count, 4, 4))
+    for corner in range(3):
+        np.add.at(quadrics, triangles[:, corner], face_quadrics)
+
+    edges = np.sort(np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]]), axis=1)
+    edge_keys, edge_uses = np.unique(edges[:, 0] * vertex_count + edges[:, 1], return_counts=True)
+    border = edge_keys[edge_uses == 1]
+    locked = np.zeros(vertex_count, dtype=bool)
+    locked[border // vertex_count] = True
+    locked[border % vertex_count] = True
+    blocked = np.zeros(0, dtype=np.int64)
+
+    for _ in range(max_passes):
+        # The last collapses mostly get rejected, stop within 1% of the target.
+        if len(triangles) <= target_count + target_count // 100:
+            break
+        edges = np.sort(np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]]), axis=1)
+        edge_keys = np.unique(edges[:, 0] * vertex_count + edges[:, 1])
+        a, b = edge_keys // vertex_count, edge_keys % vertex_count
+        combined = quadrics[a] + quadrics[b]
+        # Cost of keeping a and moving b onto it, and the other way around.
+        keep_a = np.where(locked[b], np.inf, _quadric_error(combined, positions[a]))
+        keep_b = np.where(locked[a], np.inf, _quadric_error(combined, positions[b]))
+        keep = np.where(keep_a <= keep_b, a, b)
+        remove = np.where(keep_a <= keep_b, b, a)
+        cost = np.minimum(keep_a, keep_b)
+        cost[np.isin(edge_keys, blocked)] = np.inf
+        candidates = np.flatnonzero(np.isfinite(cost))
+        if len(candidates) == 0:
+            break
+
+        rank = np.full(len(cost), len(cost), dtype=np.int64)
+        rank[candidates[np.argsort(cost[candidates], kind="stable")]] = np.arange(len(candidates))
+        used = np.zeros(vertex_count, dtype=bool)
+        chosen = []
+        for _ in range(8):
+            candidates = candidates[~used[a[candidates]] & ~used[b[candidates]]]
+            if len(candidates) == 0:
+                break
+            best = np.full(vertex_count, len(cost), dtype=np.int64)
+            np.minimum.at(best, a[candidates], rank[candidates])
+            np.minimum.at(best, b[candidates], rank[candidates])
+            selected = candidates[(best[a[candidates]] == rank[candidates]) & (best[b[candidates]] == rank[candidates])]
+            used[a[selected]] = used[b[selected]] = True
+            chosen.append(selected)
+        chosen = np.concatenate(chosen)
+        # A collapse removes about two triangles, don't go far below the target in one pass.
+        chosen = chosen[np.argsort(rank[chosen])][: max(1, (len(triangles) - target_count) // 2)]
+
+        while len(chosen):
+            remap = np.arange(vertex_count)
+            remap[remove[chosen]] = keep[chosen]
+            collapsed = remap[triangles]
+            # Reject the collapses that flip a triangle around, until none does.
+            flipped = _flipped(positions, triangles, collapsed)
+            if not flipped.any():
+                break
+            rejected = np.isin(remove[chosen], triangles[flipped])
+            blocked = np.concatenate([blocked, edge_keys[chosen[rejected]]])
+            chosen = chosen[~rejected]
+        if len(chosen) == 0:
+            continue
+
+        quadrics[keep[chosen]] += quadrics[remove[chosen]]
+        triangles = collapsed[
+            (collapsed[:, 0] != collapsed[:, 1]) & (collapsed[:, 1] != collapsed[:, 2]) & (collapsed[:, 0] != collapsed[:, 2])
+        ]
+    return triangles
+
+
+def _flipped(positions, before, after):
+    """Returns the mask of the non degenerate triangles of after whose normal turned by more than about 75 degrees."""
+    def normals(triangles):
+        corners = positions[triangles]
+        return np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+
+    degenerate = (after[:, 0] == after[:, 1]) | (after[:, 1] == after[:, 2]) | (after[:, 0] == after[:, 2])
+    changed = np.any(before != after, axis=1) & ~degenerate
+    flipped = np.zeros(len(before), dtype=bool)
+    if changed.any():
+        old, new = normals(before[changed]), normals(after[changed])
+        cosine = (old * new).sum(axis=1) / np.maximum(np.linalg.norm(old, axis=1) * np.linalg.norm(new, axis=1), 1e-30)
+        flipped[changed] = cosine < 0.25
+    return flipped
+
+
+class LodGenerator:
+    """Generates lighter levels of detail of the meshes of a GLB.
+
+    Every triangle primitive is simplified to a fraction of its triangles for each level, see
+    simplify. The levels share the vertex buffers of the full mesh and only get new indices. In
+    MSFT_LOD mode they're added to the GLB, and nodes pick the level by screen coverage, halving
+    the coverage of the full mesh for each level. In ASSETS mode every level is written as a GLB
+    of its own next to the input, see lod_asset_path.
+
+    Args:
+        levels (list): Fractions of the triangles kept by each level, the full mesh (1.0) is always level 0.
+        mode (str): One of LodMode.
+        min_triangles (int): Primitives with fewer triangles are kept as they are in every level.
+    """
+
+    def __init__(self, levels=(1.0, 0.5, 0.2, 0.05), mode=LodMode.MSFT_LOD, min_triangles=64):
+        self.levels = sorted({float(level) for level in levels if 0.0 < float(level) < 1.0}, reverse=True)
+        self.mode = mode
+        self.min_triangles = min_triangles
+
+    def generate_file(self, input_path):
+        """Adds the LOD levels of the GLB at input_path, in place or as sibling files, returns the stats."""
+        with open(input_path, "rb") as f:
+            data = f.read()
+        data, level_files, stats = self.generate(data)
+        if self.mode == LodMode.ASSETS:
+            for level, level_data in enumerate(level_files, start=1):
+                with open(lod_asset_path(input_path, level), "wb") as f:
+                    f.write(level_data)
+        else:
+            with open(input_path, "wb") as f:
+                f.write(data)
+        for level in stats["levels"]:
+            carb.log_info(
+                f"LOD {level['level']} of {input_path}: {level['triangles']}/{stats['triangles']} triangles "
+                f"in {level['duration']:.3f}s"
+            )
+        return stats
+
+    def generate(self, data):
+        """Returns the GLB content with MSFT_lod levels, the GLB content of each level and the stats.
+
+        In ASSETS mode the first is data unchanged, in MSFT_LOD mode the list of levels is empty.
+        """
+        gltf, binary = read_glb(data)
+        stats = {"triangles": 0, "levels": [], "skipped": None}
+        reason = unsupported_reason(gltf) or ("no levels" if not self.levels else None)
+        if reason:
+            stats["skipped"] = reason
+            return data, [], stats
+
+        self._gltf = gltf
+        self._binary = bytearray(binary)
+        # level_indices[level][(mesh, primitive)] is the accessor of the indices of the primitive at that level.
+        level_indices = [{} for _ in self.levels]
+        for mesh in gltf.get("meshes", []):
+            for primitive in mesh.get("primitives", []):
+                if primitive.get("mode", TRIANGLES) == TRIANGLES and "extensions" not in primitive:
+                    stats["triangles"] += len(self._read_triangles(primitive))
+        for i, ratio in enumerate(self.levels):
+            start_time = time.time()
+            triangles = 0
+            for mesh_index, mesh in enumerate(gltf.get("meshes", [])):
+                for primitive_index, primitive in enumerate(mesh.get("primitives", [])):
+                    indices, count = self._simplify_primitive(primitive, ratio)
+                    level_indices[i][(mesh_index, primitive_index)] = indices
+                    triangles += count
+            stats["levels"].append(
+                {"level": i + 1, "ratio": ratio, "triangles": triangles, "duration": time.time() - start_time}
+            )
+
+        if self.mode == LodMode.ASSETS:
+            level_files = [self._write_level(level) for level in level_indices]
+            result = data
+        else:
+            self._add_msft_lod(level_indices)
+            result = self._write(gltf)
+            level_files = []
+        self._gltf = self._binary = None
+        return result, level_files, stats
+
+    def _read_triangles(self, primitive):
+        if "indices" in primitive:
+            indices = read_accessor(self._gltf, self._binary, primitive["indices"]).ravel()
+        else:
+            indices = np.arange(self._gltf["accessors"][primitive["attributes"]["POSITION"]]["count"])
+        return indices[: len(indices) // 3 * 3].astype(np.int64).reshape(-1, 3)
+
+    def _simplify_primitive(self, primitive, ratio):
+        """Returns the indices accessor of primitive at ratio, or None if it's kept as is, and its triangle count."""
+        if primitive.get("mode", TRIANGLES) != TRIANGLES or "extensions" in primitive or "POSITION" not in primitive["attributes"]:
+            return None, 0
+        triangles = self._read_triangles(primitive)
+        if len(triangles) < self.min_triangles:
+            return None, len(triangles)
+        positions = read_accessor(self._gltf, self._binary, primitive["attributes"]["POSITION"])
+        simplified = simplify(positions, triangles, max(1, int(len(triangles) * ratio)))
+        if len(simplified) == len(triangles):
+            return None, len(triangles)
+        dtype = np.uint16 if len(positions) < 65535 else np.uint32
+        return self._add_indices(simplified.astype(dtype).ravel()), len(simplified)
+
+    def _add_indices(self, indices):
+        self._binary += b"\0" * (-len(self._binary) % 4)
+        self._gltf.setdefault("bufferViews", []).append(
+            {"buffer": 0, "byteOffset": len(self._binary), "byteLength": indices.nbytes, "target": ELEMENT_ARRAY_BUFFER}
+        )
+        self._binary += indices.tobytes()
+        self._gltf.setdefault("accessors", []).append(
+            {
+                "bufferView": len(self._gltf["bufferViews"]) - 1,
+                "componentType": COMPONENT_TYPES[indices.dtype],
+                "count": int(len(indices)),
+                "type": "SCALAR",
+            }
+        )
+        return len(self._gltf["accessors"]) - 1
+
+    def _level_mesh(self, mesh_index, indices):
+        mesh = copy.deepcopy(self._gltf["meshes"][mesh_index])
+        for primitive_index, primitive in enumerate(mesh.get("primitives", [])):
+            if indices.get((mesh_index, primitive_index)) is not None:
+                primitive["indices"] = indices[(mesh_index, primitive_index)]
+        return mesh
+
+    def _add_msft_lod(self, level_indices):
+        gltf = self._gltf
+        meshes = gltf.get("meshes", [])
+        nodes = gltf.get("nodes", [])
+        lod_meshes = {}
+        for node_index in range(len(nodes)):
+            node = nodes[node_index]
+            if "mesh" not in node or "skin" in node or "extensions" in node:
+                continue
+            mesh_index = node["mesh"]
+            if not any(index is not None for level in level_indices for (mesh, _), index in level.items() if mesh == mesh_index):
+                continue
+            if node.get("children"):
+                # A LOD replaces the node with its children, so the mesh goes on a child node of its own.
+                child = {"name": f"{node.get('name', 'mesh')}_mesh", "mesh": node.pop("mesh")}
+                if "weights" in node:
+                    child["weights"] = node.pop("weights")
+                nodes.append(child)
+                node["children"].append(len(nodes) - 1)
+                node = child
+
+            if mesh_index not in lod_meshes:
+                lod_meshes[mesh_index] = []
+                for level, indices in enumerate(level_indices, start=1):
+                    mesh = self._level_mesh(mesh_index, indices)
+                    mesh["name"] = f"{mesh.get('name', 'mesh')}_lod{level}"
+                    meshes.append(mesh)
+                    lod_meshes[mesh_index].append(len(meshes) - 1)
+            ids = []
+            for level, lod_mesh in enumerate(lod_meshes[mesh_index], start=1):
+                lod_node = {"name": f"{node.get('name', 'mesh')}_lod{level}", "mesh": lod_mesh}
+                if "weights" in node:
+                    lod_node["weights"] = list(node["weights"])
+                nodes.append(lod_node)
+                ids.append(len(nodes) - 1)
+            node["extensions"] = {"MSFT_lod": {"ids": ids}}
+            coverage = [0.5 ** (level + 1) for level in range(len(ids))]
+            node.setdefault("extras", {})["MSFT_screencoverage"] = coverage + [0.0]
+
+        if lod_meshes:
+            extensions = gltf.setdefault("extensionsUsed", [])
+            if "MSFT_lod" not in extensions:
+                extensions.append("MSFT_lod")
+
+    def _write(self, gltf):
+        if self._binary:
+            gltf["buffers"] = [{"byteLength": len(self._binary)}]
+        return write_glb(gltf, bytes(self._binary))
+
+    def _write_level(self, indices):
+        gltf = copy.deepcopy(self._gltf)
+        gltf["meshes"] = [self._level_mesh(mesh_index, indices) for mesh_index in range(len(gltf.get("meshes", [])))]
+        # Drops the indices of the other levels and the vertices the level doesn't use.
+        compactor = GlbOptimizer(dedup_vertices=False, reorder_indices=False, quantize=False, quantize_positions=False)
+        data, _ = compactor.optimize(self._write(gltf))
+        return data
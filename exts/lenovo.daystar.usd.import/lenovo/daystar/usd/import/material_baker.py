@@ -0,0 +1,301 @@
+import os
+import time
+import shutil
+import asyncio
+import hashlib
+import threading
+import carb
+from pxr import Sdf, Usd, UsdShade
+from .utils import Utils
+
+# Bumped when the way baked materials are stored changes, so older cache entries are not reused.
+BAKE_VERSION = "1"
+BAKE_ROOT = Sdf.Path("/Bake")
+BAKE_MATERIAL = BAKE_ROOT.AppendChild("Material")
+BAKE_LAYER = "material.usda"
+
+
+class MaterialBakeCache:
+    """Folders of baked materials keyed by the hash of their material network.
+
+    Each entry holds the baked material layer and the textures it uses, with relative asset paths,
+    so it can be copied next to any stage. Entries are evicted least recently used first once the
+    cache grows over `max_size` bytes.
+
+    Args:
+        cache_dir (str): Folder of the cache entries.
+        max_size (int): Maximum total size of the entries in bytes.
+    """
+
+    def __init__(self, cache_dir, max_size):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def fetch(self, key):
+        """Returns the entry folder of key, or None on a cache miss."""
+        entry = os.path.join(self.cache_dir, key)
+        with self._lock:
+            if not os.path.exists(os.path.join(entry, BAKE_LAYER)):
+                return None
+            # Touch the entry so it's the most recently used one.
+            os.utime(entry)
+        return entry
+
+    def store(self, key, bake_folder):
+        entry = os.path.join(self.cache_dir, key)
+        tmp_entry = entry + ".tmp"
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        shutil.copytree(bake_folder, tmp_entry)
+        with self._lock:
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp_entry, entry)
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".tmp") or not os.path.isdir(path):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(folder, file_name))
+                for folder, _, file_names in os.walk(path)
+                for file_name in file_names
+            )
+            entries.append((os.path.getmtime(path), size, path))
+            total_size += size
+        entries.sort()
+        while entries and total_size > self.max_size:
+            _, size, path = entries.pop(0)
+            carb.log_info(f"Material bake cache evict {path}")
+            shutil.rmtree(path, ignore_errors=True)
+            total_size -= size
+
+
+class MaterialBaker:
+    """Distills and bakes the MDL materials of a stage, each unique network once and with a persistent cache.
+
+    Materials are keyed by a hash of their shader network, the values of its inputs and the
+    content of the files it uses, independent of the material name. Each unique network is baked
+    once: either it's found in the cache, or it's copied into a stage of its own and baked there.
+    The baked result is then copied over every material sharing the key. Materials whose network
+    connects outside of the material are baked in place. Bakes run one at a time on the calling
+    thread, the MDL SDK and the USD registries the distiller uses aren't known to be thread safe.
+
+    Args:
+        distill_fn (function): Called with a material prim to distill and bake it in place.
+        cache (MaterialBakeCache): Cache of the baked materials, if any.
+    """
+
+    def __init__(self, distill_fn, cache=None):
+        self._distill_fn = distill_fn
+        self._cache = cache
+        self.stats = {}
+        self._file_hashes = {}
+
+    @staticmethod
+    def find_materials(stage):
+        """Returns the material prims of stage without descending into materials or shaders."""
+        materials = []
+        it = iter(Usd.PrimRange.Stage(stage))
+        for prim in it:
+            if prim.IsA(UsdShade.Material):
+                materials.append(prim)
+                it.PruneChildren()
+            elif prim.IsA(UsdShade.Shader):
+                it.PruneChildren()
+        return materials
+
+    def make_key(self, material_prim):
+        """Returns the hash of the material network, or None if it connects outside of the material."""
+        hasher = hashlib.sha1(BAKE_VERSION.encode("utf-8"))
+        root = material_prim.GetPath()
+        for prim in Usd.PrimRange(material_prim):
+            hasher.update(f"prim|{prim.GetPath().MakeRelativePath(root)}|{prim.GetTypeName()}".encode("utf-8"))
+            for attr in prim.GetAttributes():
+                if not attr.HasAuthoredValue() and not attr.HasAuthoredConnections():
+                    continue
+                hasher.update(f"attr|{attr.GetName()}|{attr.GetTypeName()}|{attr.GetColorSpace()}".encode("utf-8"))
+                value = attr.Get()
+                if isinstance(value, Sdf.AssetPath):
+                    value = self._hash_asset(value)
+                hasher.update(repr(value).encode("utf-8"))
+                for target in attr.GetConnections():
+                    if not target.HasPrefix(root):
+                        return None
+                    hasher.update(str(target.MakeRelativePath(root)).encode("utf-8"))
+        return hasher.hexdigest()
+
+    async def bake_stage_async(self, stage):
+        """Bakes the materials of stage, the baked files are written next to its root layer."""
+        start_time = time.time()
+        materials = self.find_materials(stage)
+        groups = {}
+        in_place = []
+        for prim in materials:
+            key = self.make_key(prim)
+            if key is None:
+                in_place.append(prim)
+            else:
+                groups.setdefault(key, []).append(prim)
+
+        bake_root = os.path.join(os.path.dirname(stage.GetRootLayer().realPath), "baked_materials")
+        entries = {}
+        to_bake = {}
+        baked = 0
+        for key, prims in groups.items():
+            entry = self._cache.fetch(key) if self._cache else None
+            if entry:
+                entries[key] = entry
+            else:
+                bake_folder = os.path.join(bake_root, key)
+                try:
+                    self._extract(prims[0], bake_folder)
+                    to_bake[key] = bake_folder
+                except Exception as e:
+                    carb.log_warn(f"Failed to isolate material {prims[0].GetPath()}, baking it in place: {e}")
+                    in_place.extend(prims)
+
+        for key, bake_folder in to_bake.items():
+            # Lets the UI update between materials.
+            await asyncio.sleep(0)
+            try:
+                self._bake_isolated(bake_folder)
+            except Exception as e:
+                carb.log_warn(f"Failed to bake material {groups[key][0].GetPath()} in isolation, baking it in place: {e}")
+                in_place.extend(groups[key])
+                continue
+            entries[key] = to_bake[key]
+            baked += 1
+            if self._cache:
+                try:
+                    self._cache.store(key, to_bake[key])
+                except OSError as e:
+                    carb.log_warn(f"Failed to cache baked material {groups[key][0].GetPath()}: {e}")
+
+        for key, entry in entries.items():
+            folder = os.path.join(bake_root, key)
+            if os.path.normpath(entry) != os.path.normpath(folder):
+                shutil.rmtree(folder, ignore_errors=True)
+                shutil.copytree(entry, folder)
+            for prim in groups[key]:
+                self._apply(stage, folder, prim.GetPath())
+
+        for prim in in_place:
+            self._distill_fn(prim)
+
+        self.stats = {
+            "materials": len(materials),
+            "unique": len(groups),
+            "cached": len(entries) - baked,
+            "baked": baked,
+            "in_place": len(in_place),
+            "duration": round(time.time() - start_time, 3),
+        }
+        carb.log_info(f"Material bake of {stage.GetRootLayer().identifier}: {self.stats}")
+        return self.stats
+
+    def _hash_asset(self, asset_path):
+        path = asset_path.resolvedPath
+        if not path or not os.path.isfile(path):
+            return f"asset|{asset_path.path}"
+        if path not in self._file_hashes:
+            self._file_hashes[path] = Utils.hash_file(path)
+        return f"asset|{os.path.splitext(path)[1].lower()}|{self._file_hashes[path]}"
+
+    def _extract(self, material_prim, bake_folder):
+        """Writes the composed network of material_prim to a layer of its own in bake_folder."""
+        shutil.rmtree(bake_folder, ignore_errors=True)
+        os.makedirs(bake_folder)
+        layer = Sdf.Layer.CreateNew(os.path.join(bake_folder, BAKE_LAYER))
+        Sdf.CreatePrimInLayer(layer, BAKE_ROOT).specifier = Sdf.SpecifierDef
+        root = material_prim.GetPath()
+        for prim in Usd.PrimRange(material_prim):
+            spec = Sdf.CreatePrimInLayer(layer, prim.GetPath().ReplacePrefix(root, BAKE_MATERIAL))
+            spec.specifier = Sdf.SpecifierDef
+            spec.typeName = prim.GetTypeName()
+            schemas = prim.GetPrimTypeInfo().GetAppliedAPISchemas()
+            if schemas:
+                spec.SetInfo("apiSchemas", Sdf.TokenListOp.CreateExplicit(list(schemas)))
+            for attr in prim.GetAttributes():
+                if not attr.HasAuthoredValue() and not attr.HasAuthoredConnections():
+                    continue
+                attr_spec = Sdf.AttributeSpec(spec, attr.GetName(), attr.GetTypeName(), attr.GetVariability())
+                value = attr.Get()
+                if isinstance(value, Sdf.AssetPath):
+                    value = Sdf.AssetPath(value.resolvedPath or value.path)
+                if value is not None:
+                    attr_spec.default = value
+                if attr.GetColorSpace():
+                    attr_spec.colorSpace = attr.GetColorSpace()
+                for target in attr.GetConnections():
+                    attr_spec.connectionPathList.Append(target.ReplacePrefix(root, BAKE_MATERIAL))
+        layer.Save()
+
+    def _bake_isolated(self, bake_folder):
+        layer_path = os.path.join(bake_folder, BAKE_LAYER)
+        stage = Usd.Stage.Open(layer_path)
+        self._distill_fn(stage.GetPrimAtPath(BAKE_MATERIAL))
+        stage.Save()
+        self._make_self_contained(Sdf.Layer.FindOrOpen(layer_path), bake_folder)
+
+    def _make_self_contained(self, layer, bake_folder):
+        """Copies the files the baked material uses into bake_folder and makes their paths relative."""
+        folder = os.path.normpath(bake_folder)
+
+        def visit(path):
+            if not path.IsPropertyPath():
+                return
+            spec = layer.GetAttributeAtPath(path)
+            if not spec or spec.typeName != Sdf.ValueTypeNames.Asset or not spec.default or not spec.default.path:
+                return
+            source = os.path.normpath(layer.ComputeAbsolutePath(spec.default.path))
+            if not os.path.isfile(source):
+                return
+            if os.path.commonpath([folder, source]) != folder:
+                name = f"{Utils.hash_file(source)[:16]}_{os.path.basename(source)}"
+                shutil.copyfile(source, os.path.join(folder, name))
+                source = os.path.join(folder, name)
+            spec.default = Sdf.AssetPath("./" + os.path.relpath(source, folder).replace("\\", "/"))
+
+        layer.Traverse(BAKE_ROOT, visit)
+        layer.Save()
+
+    def _apply(self, stage, bake_folder, material_path):
+        """Copies the baked material of bake_folder over material_path in the root layer of stage."""
+        entry_layer = Sdf.Layer.FindOrOpen(os.path.join(bake_folder, BAKE_LAYER))
+        root_layer = stage.GetRootLayer()
+        Sdf.CreatePrimInLayer(root_layer, material_path)
+        if not Sdf.CopySpec(entry_layer, BAKE_MATERIAL, root_layer, material_path):
+            raise RuntimeError(f"failed to copy the baked material to {material_path}")
+        prefix = "./" + os.path.relpath(bake_folder, os.path.dirname(root_layer.realPath)).replace("\\", "/")
+
+        def visit(path):
+            if not path.IsPropertyPath():
+                return
+            spec = root_layer.GetAttributeAtPath(path)
+            if spec and spec.typeName == Sdf.ValueTypeNames.Asset and spec.default and spec.default.path.startswith("./"):
+                spec.default = Sdf.AssetPath(prefix + spec.default.path[1:])
+
+        root_layer.Traverse(material_path, visit)
+
+        # Opinions of weaker layers that the bake replaced are switched off.
+        baked_paths = set()
+        entry_layer.Traverse(BAKE_MATERIAL, lambda path: baked_paths.add(path.ReplacePrefix(BAKE_MATERIAL, material_path)))
+        stale_prims = []
+        for prim in Usd.PrimRange(stage.GetPrimAtPath(material_path)):
+            if prim.GetPath() not in baked_paths:
+                stale_prims.append(prim)
+                continue
+            for attr in prim.GetAttributes():
+                if attr.GetPath() in baked_paths:
+                    continue
+                if attr.HasAuthoredConnections():
+                    attr.SetConnections([])
+                if attr.HasAuthoredValue():
+                    attr.Block()
+        for prim in stale_prims:
+            prim.SetActive(False)
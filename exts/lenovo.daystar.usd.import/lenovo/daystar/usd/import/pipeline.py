@@ -0,0 +1,138 @@
+import os
+import time
+import asyncio
+import carb
+from .tracing import get_tracer
+
+
+class StageMetrics:
+    """Throughput counters of one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.failures = 0
+        self.bytes = 0
+        self.busy_time = 0.0
+        # Time the stage spent waiting for room in the hand-off queue.
+        self.blocked_time = 0.0
+        self.start_time = None
+        self.end_time = None
+
+    @property
+    def wall_time(self):
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time.time()) - self.start_time
+
+    def to_dict(self):
+        wall_time = self.wall_time
+        return {
+            "items": self.items,
+            "failures": self.failures,
+            "bytes": self.bytes,
+            "busy_time": round(self.busy_time, 3),
+            "blocked_time": round(self.blocked_time, 3),
+            "wall_time": round(wall_time, 3),
+            "items_per_second": round(self.items / wall_time, 3) if wall_time else 0.0,
+            "bytes_per_second": round(self.bytes / wall_time, 1) if wall_time else 0.0,
+        }
+
+
+class ExportPipeline:
+    """Runs export jobs through a convert stage and an upload stage that overlap.
+
+    Converted jobs are handed to the upload stage through a queue of `queue_size` jobs, so
+    asset N uploads while asset N+1 converts. When uploads fall behind, the queue fills up
+    and the convert workers wait instead of piling converted files on disk.
+
+    Args:
+        convert_fn (function): Coroutine function convert_fn(job) returning True if the job can be uploaded.
+        upload_fn (function): Coroutine function upload_fn(job) returning True if the upload succeeded.
+        convert_workers (int): Number of concurrent conversions.
+        upload_workers (int): Number of concurrent uploads.
+        queue_size (int): Maximum number of converted jobs waiting for upload.
+    """
+
+    def __init__(self, convert_fn, upload_fn, convert_workers=1, upload_workers=2, queue_size=2):
+        self._convert_fn = convert_fn
+        self._upload_fn = upload_fn
+        self.convert_workers = max(1, convert_workers)
+        self.upload_workers = max(1, upload_workers)
+        self.queue_size = max(1, queue_size)
+        self.convert_metrics = StageMetrics("convert")
+        self.upload_metrics = StageMetrics("upload")
+
+    def metrics(self):
+        return {"convert": self.convert_metrics.to_dict(), "upload": self.upload_metrics.to_dict()}
+
+    async def run_async(self, jobs):
+        """Runs jobs, an iterable or async iterable, through both stages and returns the stage metrics."""
+        convert_queue = asyncio.Queue(maxsize=self.convert_workers)
+        upload_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def convert_worker():
+            while True:
+                job = await convert_queue.get()
+                if job is None:
+                    break
+                converted = await self._run_stage(self.convert_metrics, self._convert_fn, job)
+                if not converted:
+                    continue
+                self.convert_metrics.bytes += self._output_size(job)
+                blocked_start = time.time()
+                await upload_queue.put(job)
+                self.convert_metrics.blocked_time += time.time() - blocked_start
+
+        async def upload_worker():
+            while True:
+                job = await upload_queue.get()
+                if job is None:
+                    break
+                size = self._output_size(job)
+                if await self._run_stage(self.upload_metrics, self._upload_fn, job):
+                    self.upload_metrics.bytes += size
+
+        self.convert_metrics.start_time = self.upload_metrics.start_time = time.time()
+        converters = [asyncio.ensure_future(convert_worker()) for _ in range(self.convert_workers)]
+        uploaders = [asyncio.ensure_future(upload_worker()) for _ in range(self.upload_workers)]
+        try:
+            if hasattr(jobs, "__aiter__"):
+                async for job in jobs:
+                    await convert_queue.put(job)
+            else:
+                for job in jobs:
+                    await convert_queue.put(job)
+        finally:
+            for _ in converters:
+                await convert_queue.put(None)
+            await asyncio.gather(*converters)
+            self.convert_metrics.end_time = time.time()
+            for _ in uploaders:
+                await upload_queue.put(None)
+            await asyncio.gather(*uploaders)
+            self.upload_metrics.end_time = time.time()
+
+        carb.log_info(f"Export pipeline metrics: {self.metrics()}")
+        return self.metrics()
+
+    async def _run_stage(self, metrics, stage_fn, job):
+        start_time = time.time()
+        try:
+            with get_tracer().job(job):
+                success = await stage_fn(job)
+        except Exception as e:
+            carb.log_error(f"Export pipeline {metrics.name} stage failed: {e}")
+            success = False
+        metrics.busy_time += time.time() - start_time
+        if success:
+            metrics.items += 1
+        else:
+            metrics.failures += 1
+        return success
+
+    def _output_size(self, job):
+        output_path = getattr(job, "output_path", None)
+        if output_path and os.path.exists(output_path):
+            return os.path.getsize(output_path)
+        return 0
@@ -123,3 +123,102 @@ class ProgressPopup:
                     cancel_button.set_clicked_fn(self._on_cancel_button_fn)
                     ui.Spacer(height=0)
                 ui.Spacer(width=0, height=10)
+
+
+def _format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} GB"
+
+
+def _format_duration(seconds):
+    seconds = int(round(seconds))
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class ProgressDashboard:
+    """Window listing the export jobs of a ProgressTracker with their phase, progress, throughput, ETA and peak memory.
+
+    The rows are only written when the tracker flushes, which is at most once per frame, and the
+    window is only rebuilt when jobs come or go. The Cancel button of a job cancels its converter
+    task or upload.
+
+    Args:
+        tracker (ProgressTracker): Tracker of the jobs shown.
+        title (str): Title of this window.
+    """
+
+    def __init__(self, tracker, title="Daystar World Exports"):
+        self._tracker = tracker
+        self._title = title
+        self._rows = {}
+        self._build_ui()
+        tracker.subscribe(self._on_jobs_changed)
+
+    def destroy(self):
+        self._tracker.unsubscribe(self._on_jobs_changed)
+        self._rows = {}
+        if self._window:
+            self._window.visible = False
+            self._window = None
+
+    def show(self):
+        self._window.visible = True
+
+    def hide(self):
+        self._window.visible = False
+
+    def is_visible(self):
+        return self._window.visible
+
+    def _on_jobs_changed(self, changed):
+        if any(job is None or key not in self._rows for key, job in changed.items()):
+            if any(job and not job.finished and key not in self._rows for key, job in changed.items()):
+                self.show()
+            self._window.frame.rebuild()
+            return
+        for key, job in changed.items():
+            self._update_row(self._rows[key], job)
+
+    def _update_row(self, row, job):
+        row["phase"].text = job.status if job.finished else (job.phase or "pending")
+        row["model"].set_value(job.fraction)
+        stats = []
+        if job.throughput:
+            stats.append(f"{_format_size(job.throughput)}/s")
+        if job.eta is not None:
+            stats.append(f"{_format_duration(job.eta)} left")
+        elif job.finished:
+            stats.append(_format_duration(job.elapsed))
+        if job.peak_rss:
+            stats.append(f"peak {_format_size(job.peak_rss)}")
+        row["stats"].text = ", ".join(stats)
+        row["cancel"].enabled = not job.finished and not job.cancel_requested
+
+    def _build_rows(self):
+        self._rows = {}
+        with ui.VStack(height=0, spacing=4):
+            ui.Spacer(height=4)
+            for job in self._tracker.jobs:
+                with ui.HStack(height=0, spacing=8):
+                    ui.Label(job.name, width=160, elided_text=True)
+                    phase_label = ui.Label("", width=80)
+                    model = CustomProgressModel()
+                    ui.ProgressBar(model, style={"color": 0xFFFF9E3D})
+                    stats_label = ui.Label("", width=200)
+                    cancel_button = ui.Button(
+                        "Cancel", width=0, clicked_fn=lambda key=job.key: self._tracker.cancel(key)
+                    )
+                row = {"phase": phase_label, "model": model, "stats": stats_label, "cancel": cancel_button}
+                self._update_row(row, job)
+                self._rows[job.key] = row
+            with ui.HStack(height=0):
+                ui.Spacer()
+                ui.Button("Clear finished", width=0, clicked_fn=self._tracker.remove_finished)
+            ui.Spacer(height=4)
+
+    def _build_ui(self):
+        self._window = ui.Window(self._title, visible=False, width=560, height=240)
+        self._window.frame.set_build_fn(self._build_rows)
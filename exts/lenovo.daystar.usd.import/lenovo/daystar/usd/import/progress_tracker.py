@@ -0,0 +1,314 @@
+import time
+import threading
+import carb
+from .utils import Utils
+from .tracing import Phase
+
+
+class JobStatus:
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobProgress:
+    """Progress of one export job, see ProgressTracker.
+
+    Args:
+        key (str): Key of the job in its tracker, the output path of the export.
+        name (str): Name shown for the job, e.g. the target asset name.
+        clock (function): Returns the current time in seconds.
+    """
+
+    def __init__(self, key, name, clock=time.perf_counter):
+        self.key = key
+        self.name = name
+        self.phase = None
+        self.status = JobStatus.RUNNING
+        self.fraction = 0.0
+        self.done = 0
+        self.total = 0
+        self.cancel_requested = False
+        self.cancel_fns = []
+        self._clock = clock
+        self.start_time = clock()
+        self.phase_start_time = self.start_time
+        self.end_time = None
+        self.peak_rss = 0
+
+    @property
+    def finished(self):
+        return self.status != JobStatus.RUNNING
+
+    @property
+    def elapsed(self):
+        return (self.end_time or self._clock()) - self.start_time
+
+    @property
+    def throughput(self):
+        """Bytes per second of the current phase, 0.0 for phases that don't count bytes."""
+        elapsed = self._clock() - self.phase_start_time
+        if not self.total or elapsed <= 0.0:
+            return 0.0
+        return self.done / elapsed
+
+    @property
+    def eta(self):
+        """Seconds left in the current phase, None until it can be estimated."""
+        if self.finished:
+            return None
+        if self.total:
+            throughput = self.throughput
+            return (self.total - self.done) / throughput if throughput else None
+        if self.fraction <= 0.0:
+            return None
+        return (self._clock() - self.phase_start_time) * (1.0 - self.fraction) / self.fraction
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "phase": self.phase,
+            "status": self.status,
+            "fraction": round(self.fraction, 3),
+            "done": self.done,
+            "total": self.total,
+            "throughput": round(self.throughput, 1),
+            "eta": None if self.eta is None else round(self.eta, 1),
+            "elapsed": round(self.elapsed, 3),
+            "peak_rss": self.peak_rss,
+        }
+
+
+class ProgressTracker:
+    """Tracks the phases and progress of concurrent export jobs, e.g. for ProgressDashboard.
+
+    Jobs are keyed by the output path of their export, which is unique per staging job, so the
+    exporter reports the phases it runs without knowing the job. Updates of unknown keys are
+    ignored, so exports nobody tracks cost nothing.
+
+    The updates only change the JobProgress. The listeners are called by flush, once with all
+    the jobs that changed since the last flush, which start_frame_updates runs at most once
+    per frame however often the converter and the uploads report progress. Updates must come
+    from the event loop thread, DWTool already hands its progress to it.
+
+    While jobs run, a thread samples the resident set size of the process every memory_interval
+    seconds into the peak_rss of the running jobs. Jobs share the process, so the peak of a job
+    is the peak of the process while it ran, whichever job allocated it.
+
+    Finished jobs stay until the dashboard removes them. Without a listener, e.g. in headless and
+    farm runs, only the last max_finished are kept, so long batches don't keep every job.
+
+    Args:
+        log_phases (bool): Logs every phase change, for headless runs without a dashboard.
+        clock (function): Returns the current time in seconds.
+        memory_interval (float): Seconds between samples of the resident set size, 0 to only
+            sample it at phase changes.
+        max_finished (int): Number of finished jobs kept while nobody listens.
+    """
+
+    def __init__(self, log_phases=False, clock=time.perf_counter, memory_interval=0.25, max_finished=100):
+        self.log_phases = log_phases
+        self.memory_interval = memory_interval
+        self.max_finished = max_finished
+        self._clock = clock
+        self._jobs = {}
+        self._dirty = {}
+        self._listeners = []
+        self._update_sub = None
+        self._memory_lock = threading.Lock()
+        self._memory_thread = None
+
+    @property
+    def jobs(self):
+        return list(self._jobs.values())
+
+    def get(self, key):
+        return self._jobs.get(key)
+
+    def add_job(self, key, name):
+        """Starts tracking the job of output path key, or returns it if it's already tracked."""
+        job = self._jobs.get(key)
+        if job and not job.finished:
+            return job
+        job = JobProgress(key, name, self._clock)
+        self._jobs[key] = job
+        self._sample_memory([job])
+        self._start_memory_sampler()
+        self._mark_dirty(job)
+        return job
+
+    def set_phase(self, key, phase, total=0):
+        """Moves the job to phase, total is the number of bytes the phase sends, if it counts them."""
+        job = self._jobs.get(key)
+        if not job or job.finished:
+            return
+        job.phase = phase
+        job.fraction = 0.0
+        job.done = 0
+        job.total = total
+        job.phase_start_time = self._clock()
+        self._sample_memory([job])
+        if self.log_phases:
+            carb.log_info(f"{job.name}: {phase}")
+        self._mark_dirty(job)
+
+    def set_progress(self, key, fraction=None, done=None):
+        """Sets the progress of the current phase, as a fraction or as bytes done out of its total."""
+        job = self._jobs.get(key)
+        if not job or job.finished:
+            return
+        if done is not None:
+            job.done = done
+            if job.total:
+                fraction = float(done) / job.total
+        if fraction is not None:
+            job.fraction = min(max(fraction, 0.0), 1.0)
+        self._mark_dirty(job)
+
+    def add_cancel_fn(self, key, cancel_fn):
+        """Calls cancel_fn when the job is cancelled, right away if it already was."""
+        job = self._jobs.get(key)
+        if not job:
+            return
+        if job.cancel_requested:
+            cancel_fn()
+            return
+        job.cancel_fns.append(cancel_fn)
+
+    def remove_cancel_fn(self, key, cancel_fn):
+        job = self._jobs.get(key)
+        if job and cancel_fn in job.cancel_fns:
+            job.cancel_fns.remove(cancel_fn)
+
+    def is_cancelled(self, key):
+        job = self._jobs.get(key)
+        return bool(job and job.cancel_requested)
+
+    def cancel(self, key):
+        """Cancels the converter task and upload the job registered, its owner finishes it."""
+        job = self._jobs.get(key)
+        if not job or job.finished or job.cancel_requested:
+            return
+        carb.log_info(f"Cancelling the export of {job.name}")
+        job.cancel_requested = True
+        for cancel_fn in list(job.cancel_fns):
+            try:
+                cancel_fn()
+            except Exception as e:
+                carb.log_warn(f"Failed to cancel {job.phase} of {job.name}: {e}")
+        self._mark_dirty(job)
+
+    def finish(self, key, success):
+        job = self._jobs.get(key)
+        if not job or job.finished:
+            return
+        if success:
+            job.status = JobStatus.SUCCEEDED
+            job.fraction = 1.0
+        else:
+            job.status = JobStatus.CANCELLED if job.cancel_requested else JobStatus.FAILED
+        job.end_time = self._clock()
+        job.cancel_fns = []
+        self._sample_memory([job])
+        if self.log_phases:
+            carb.log_info(f"{job.name}: {job.status} in {job.elapsed:.1f}s, peak RSS {job.peak_rss / 2 ** 20:.0f} MB")
+        self._mark_dirty(job)
+        if not self._listeners:
+            self._prune_finished()
+
+    async def upload_async(self, key, dw_tool, assets):
+        """Uploads assets, (name, path) pairs, through dw_tool as the upload phase of the job of key.
+
+        Returns False as soon as an upload is rejected. Cancelling the job aborts the upload in
+        flight with UploadCancelled.
+        """
+        sizes = [Utils.file_size(path) for _, path in assets]
+        self.set_phase(key, Phase.UPLOAD, total=sum(sizes))
+        cancel_event = threading.Event()
+        self.add_cancel_fn(key, cancel_event.set)
+        sent_before = 0
+        try:
+            for (name, path), size in zip(assets, sizes):
+                def progress_fn(sent, total, base=sent_before):
+                    self.set_progress(key, done=base + sent)
+
+                if not await dw_tool.uploadAssetToDW(name, path, progress_fn, cancel_event):
+                    return False
+                sent_before += size
+            return True
+        finally:
+            self.remove_cancel_fn(key, cancel_event.set)
+
+    def remove_finished(self):
+        for key in [key for key, job in self._jobs.items() if job.finished]:
+            del self._jobs[key]
+            self._dirty[key] = None
+
+    def _prune_finished(self):
+        """Drops the oldest finished jobs beyond max_finished, nobody would flush their removal."""
+        finished = [key for key, job in self._jobs.items() if job.finished]
+        for key in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[key]
+            self._dirty.pop(key, None)
+
+    def subscribe(self, listener_fn):
+        """listener_fn is called by flush with a dict of the keys that changed to their JobProgress.
+
+        Removed jobs map to None.
+        """
+        self._listeners.append(listener_fn)
+
+    def unsubscribe(self, listener_fn):
+        if listener_fn in self._listeners:
+            self._listeners.remove(listener_fn)
+
+    def flush(self):
+        if not self._dirty:
+            return
+        changed, self._dirty = self._dirty, {}
+        for listener_fn in list(self._listeners):
+            listener_fn(changed)
+
+    def start_frame_updates(self):
+        """Flushes on every app update, so the listeners run at most once per frame."""
+        import omni.kit.app
+
+        if not self._update_sub:
+            self._update_sub = omni.kit.app.get_app().get_update_event_stream().create_subscription_to_pop(
+                lambda _: self.flush(), name="lenovo.daystar.usd.import progress"
+            )
+
+    def stop_frame_updates(self):
+        self._update_sub = None
+
+    def _sample_memory(self, jobs):
+        rss = Utils.current_rss()
+        for job in jobs:
+            if rss > job.peak_rss:
+                job.peak_rss = rss
+
+    def _start_memory_sampler(self):
+        if self.memory_interval <= 0:
+            return
+        with self._memory_lock:
+            if self._memory_thread:
+                return
+            self._memory_thread = threading.Thread(
+                target=self._run_memory_sampler, name="lenovo.daystar.usd.import memory", daemon=True
+            )
+            self._memory_thread.start()
+
+    def _run_memory_sampler(self):
+        """Samples the running jobs until none is left. Only writes peak_rss, the listeners see it at the next update."""
+        while True:
+            time.sleep(self.memory_interval)
+            with self._memory_lock:
+                running = [job for job in list(self._jobs.values()) if not job.finished]
+                if not running:
+                    self._memory_thread = None
+                    return
+            self._sample_memory(running)
+
+    def _mark_dirty(self, job):
+        self._dirty[job.key] = job
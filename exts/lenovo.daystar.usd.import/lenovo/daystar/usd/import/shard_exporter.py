@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import carb
+from pxr import Gf, Usd, UsdGeom
+from .utils import Utils
+from .pipeline import ExportPipeline
+from .delta_exporter import DeltaExporter
+
+
+class ShardMode:
+    PRIMS = "prims"
+    GRID = "grid"
+
+
+class Shard:
+    """Prims of a stage exported together as one part of a sharded asset.
+
+    Args:
+        index (int): Index of the shard.
+        paths (list): Paths of the prims of the shard.
+        bounds (Gf.Range3d): World bounds of the prims.
+    """
+
+    def __init__(self, index, paths, bounds):
+        self.index = index
+        self.paths = paths
+        self.bounds = bounds
+
+    def to_dict(self):
+        bounds = None
+        if not self.bounds.IsEmpty():
+            bounds = {"min": list(self.bounds.GetMin()), "max": list(self.bounds.GetMax())}
+        return {"index": self.index, "prims": [str(path) for path in self.paths], "bounds": bounds}
+
+
+class ShardExporter:
+    """Exports a large stage as shards converted concurrently, plus an index of their bounds.
+
+    In PRIMS mode every top-level prim is a shard. In GRID mode the world bounds of the stage are
+    cut in `grid_size` x `grid_size` cells along its two largest axes and prims go to the cell of
+    their center. Prims larger than a cell are split into their children, down to instances and
+    gprims. Each shard is converted from a stage masked to its prims, so no conversion has to load
+    the whole scene, and uploaded as `<name>_shard_<index>`. The `<name>_shards` index lists the
+    shards with their world bounds so the client can stream in the ones it needs.
+
+    Args:
+        exporter (Exporter): Exporter used to convert the shards.
+        dw_tool (DWTool): Logged in DWTool used to upload the shards and the index.
+        workspace (StagingWorkspace): Workspace of the shard staging folders.
+        mode (str): One of ShardMode.
+        grid_size (int): Number of cells along each axis of the grid.
+        max_workers (int): Number of concurrent conversions.
+        upload_workers (int): Number of concurrent uploads.
+    """
+
+    def __init__(self, exporter, dw_tool, workspace, mode=ShardMode.GRID, grid_size=4, max_workers=4, upload_workers=2):
+        self._exporter = exporter
+        self._dw_tool = dw_tool
+        self._workspace = workspace
+        self.mode = mode
+        self.grid_size = max(1, grid_size)
+        self.max_workers = max(1, max_workers)
+        self.upload_workers = max(1, upload_workers)
+        # Stops the split of a grid into ever smaller prims on huge flat hierarchies.
+        self.max_units = 100000
+
+    def plan_shards(self, stage):
+        """Returns the list of shards of stage."""
+        bbox_cache = UsdGeom.BBoxCache(Usd.TimeCode.Default(), [UsdGeom.Tokens.default_, UsdGeom.Tokens.render])
+        parts = DeltaExporter.find_parts(stage)
+        bounds = {path: self._bounds(bbox_cache, stage.GetPrimAtPath(path)) for path in parts}
+        if self.mode == ShardMode.PRIMS:
+            return [Shard(index, [path], bounds[path]) for index, path in enumerate(parts)]
+
+        world = Gf.Range3d()
+        for part_bounds in bounds.values():
+            world.UnionWith(part_bounds)
+        if world.IsEmpty():
+            return [Shard(0, parts, world)] if parts else []
+        size = world.GetSize()
+        axes = sorted(range(3), key=lambda axis: size[axis], reverse=True)[:2]
+        cell_size = [max(size[axis], 1e-6) / self.grid_size for axis in axes]
+
+        units = self._split_units(stage, bbox_cache, bounds, axes, cell_size)
+        cells = {}
+        for path, unit_bounds in units:
+            if unit_bounds.IsEmpty():
+                # Prims without geometry, e.g. lights, go with the first shard.
+                cell = (-1, -1)
+            else:
+                center = unit_bounds.GetMidpoint()
+                cell = tuple(
+                    min(int((center[axis] - world.GetMin()[axis]) / cell_size[i]), self.grid_size - 1)
+                    for i, axis in enumerate(axes)
+                )
+            cells.setdefault(cell, []).append((path, unit_bounds))
+
+        shards = []
+        for cell in sorted(cells.keys()):
+            shard_bounds = Gf.Range3d()
+            for _, unit_bounds in cells[cell]:
+                shard_bounds.UnionWith(unit_bounds)
+            shards.append(Shard(len(shards), [path for path, _ in cells[cell]], shard_bounds))
+        return shards
+
+    async def export_async(self, stage, asset_name, asset_converter_context):
+        """Converts and uploads the shards of stage, and their index if all of them uploaded, returns the report."""
+        if self._exporter.needs_collect(asset_converter_context):
+            raise RuntimeError("sharded export doesn't support baked MDL materials or processed textures")
+        start_time = time.time()
+        shards = self.plan_shards(stage)
+        carb.log_info(f"Sharded export of {asset_name}: {len(shards)} shard(s)")
+
+        jobs = []
+        for shard in shards:
+            job = self._workspace.create_job(
+                f"{asset_name}_shard_{shard.index}", asset_converter_context, stage.GetRootLayer().identifier
+            )
+            job.shard = shard
+            job.uploaded = False
+            jobs.append(job)
+
+        async def convert(job):
+            masked_stage = Usd.Stage.OpenMasked(
+                stage.GetRootLayer(), stage.GetSessionLayer(), Usd.StagePopulationMask(job.shard.paths)
+            )
+            masked_stage.ExpandPopulationMask()
+            return await self._exporter.export_stage_async(masked_stage, job.output_path, job.context)
+
+        async def upload(job):
+            job.uploaded = await self._dw_tool.uploadAssetToDW(job.target_name, job.output_path)
+            return job.uploaded
+
+        pipeline = ExportPipeline(convert, upload, self.max_workers, self.upload_workers, self.max_workers)
+        stage_metrics = await pipeline.run_async(jobs)
+
+        for job in jobs:
+            self._workspace.finish_job(job, job.uploaded)
+        failed = len([job for job in jobs if not job.uploaded])
+        # An index pointing at shards that were never uploaded would publish a partial asset.
+        index_uploaded = False
+        if failed:
+            carb.log_warn(f"{failed} shard(s) of {asset_name} failed, its index isn't uploaded.")
+        else:
+            index_uploaded = await self.upload_index_async(self.build_index(asset_name, jobs))
+        report = {
+            "asset": asset_name,
+            "shards": len(jobs),
+            "uploaded": len(jobs) - failed,
+            "failed": failed,
+            "index_uploaded": index_uploaded,
+            "stages": stage_metrics,
+            "duration": round(time.time() - start_time, 3),
+        }
+        carb.log_info(f"Sharded export of {asset_name} finished: {report}")
+        return report
+
+    def build_index(self, asset_name, jobs):
+        """Returns the index of the shards exported by jobs, which have a shard, a target_name and an uploaded flag."""
+        index = {"asset": asset_name, "mode": self.mode, "bounds": None, "shards": []}
+        world = Gf.Range3d()
+        for job in jobs:
+            world.UnionWith(job.shard.bounds)
+            shard = job.shard.to_dict()
+            shard["asset"] = job.target_name if job.uploaded else None
+            index["shards"].append(shard)
+        if not world.IsEmpty():
+            index["bounds"] = {"min": list(world.GetMin()), "max": list(world.GetMax())}
+        return index
+
+    def _bounds(self, bbox_cache, prim):
+        return bbox_cache.ComputeWorldBound(prim).ComputeAlignedRange()
+
+    def _split_units(self, stage, bbox_cache, bounds, axes, cell_size):
+        """Splits the prims larger than a cell into their children, returns a list of (path, bounds)."""
+        pending = list(bounds.items())
+        units = []
+        while pending:
+            path, unit_bounds = pending.pop()
+            prim = stage.GetPrimAtPath(path)
+            size = unit_bounds.GetSize()
+            too_large = not unit_bounds.IsEmpty() and any(
+                size[axis] > cell_size[i] for i, axis in enumerate(axes)
+            )
+            children = []
+            if too_large and not prim.IsInstance() and not prim.IsA(UsdGeom.Gprim):
+                children = [child for child in prim.GetChildren() if child.IsA(UsdGeom.Imageable)]
+            if not children or len(units) + len(pending) + len(children) > self.max_units:
+                units.append((path, unit_bounds))
+                continue
+            for child in children:
+                pending.append((child.GetPath(), self._bounds(bbox_cache, child)))
+        units.sort(key=lambda unit: unit[0])
+        return units
+
+    async def upload_index_async(self, index):
+        """Uploads index as the `<asset>_shards` asset, returns True if it was uploaded."""
+        name = f"{index['asset']}_shards"
+        job = self._workspace.create_job(name)
+        index_file = os.path.join(job.job_folder, f"{Utils.make_valid_identifier(name)}.json")
+        with open(index_file, "w") as f:
+            json.dump(index, f, indent=2)
+        uploaded = False
+        try:
+            uploaded = await self._dw_tool.uploadAssetToDW(name, index_file)
+        except Exception as e:
+            carb.log_error(f"Failed to upload the shard index of {index['asset']}: {e}")
+        self._workspace.finish_job(job, uploaded)
+        return uploaded
@@ -0,0 +1,78 @@
+import contextlib
+from pxr import Usd, UsdShade, UsdUtils
+
+
+# Like the default predicate, but unloaded payloads are visited so they can be loaded one at a time.
+_UNLOADED_PREDICATE = Usd.PrimIsActive & Usd.PrimIsDefined & ~Usd.PrimIsAbstract
+
+
+@contextlib.contextmanager
+def cached_stage_id(stage):
+    """Yields the id of stage in the UsdUtils stage cache, which the converter takes, for the duration of the block.
+
+    A stage that wasn't cached, e.g. one the exporter opened itself, is inserted when the block
+    starts and erased when it exits, even on errors. This only bounds how long the cache has an
+    entry for the stage, so the shared cache doesn't collect one per exported stage over the
+    session; how long the stage stays in memory is up to the callers holding it. Inserting a
+    stage opened from Python hands its ownership to the cache though, so such a stage expires
+    with its entry and can't be used after the block. Stages that were already cached, like the
+    stage of the editor, keep their entry.
+    """
+    stage_cache = UsdUtils.StageCache.Get()
+    inserted = not stage_cache.Contains(stage)
+    stage_id = stage_cache.Insert(stage) if inserted else stage_cache.GetId(stage)
+    try:
+        yield stage_id.ToString()
+    finally:
+        if inserted:
+            stage_cache.Erase(stage)
+
+
+def _outside_connections(root_prim):
+    """Returns the paths of the prims outside root_prim that its shading network connects to."""
+    root = root_prim.GetPath()
+    paths = set()
+    for prim in Usd.PrimRange(root_prim):
+        for attr in prim.GetAttributes():
+            for source in attr.GetConnections():
+                if not source.HasPrefix(root):
+                    paths.add(source.GetPrimPath())
+    return paths
+
+
+def find_material_paths(usd_path):
+    """Returns the paths of the materials of the stage at usd_path, and of the prims they connect to.
+
+    The stage is opened without its payloads, which are then loaded and unloaded one at a time,
+    so only the largest payload is ever in memory.
+    """
+    stage = Usd.Stage.Open(usd_path, Usd.Stage.LoadNone)
+    paths = set()
+    pending = [(stage.GetPseudoRoot().GetPath(), False)]
+    while pending:
+        root, load = pending.pop()
+        if load:
+            stage.Load(root, Usd.LoadWithoutDescendants)
+        it = iter(Usd.PrimRange(stage.GetPrimAtPath(root), _UNLOADED_PREDICATE))
+        for prim in it:
+            if prim.IsA(UsdShade.Material):
+                paths.add(prim.GetPath())
+                paths.update(_outside_connections(prim))
+                it.PruneChildren()
+            elif prim.IsA(UsdShade.Shader):
+                it.PruneChildren()
+            elif prim.GetPath() != root and prim.HasAuthoredPayloads() and not prim.IsLoaded():
+                pending.append((prim.GetPath(), True))
+                it.PruneChildren()
+        if load:
+            stage.Unload(root)
+    return sorted(paths)
+
+
+def open_material_stage(usd_path):
+    """Opens the stage at usd_path with only its materials populated, for passes that only edit materials.
+
+    Edits go to the root layer, as with a full open, but the geometry is never loaded.
+    """
+    mask = Usd.StagePopulationMask(find_material_paths(usd_path))
+    return Usd.Stage.OpenMasked(usd_path, mask, Usd.Stage.LoadAll)
@@ -1 +1,25 @@
-from .test_hello_world import *
\ No newline at end of file
+from .test_hello_world import *
+from .test_dwtool_upload import *
+from .test_asset_index import *
+from .test_batch_exporter import *
+from .test_utils import *
+from .test_convert_cache import *
+from .test_export_job import *
+from .test_pipeline import *
+from .test_dwtool_retry import *
+from .test_glb_optimizer import *
+from .test_texture_processor import *
+from .test_material_baker import *
+from .test_collection_cache import *
+from .test_delta_exporter import *
+from .test_shard_exporter import *
+from .test_lod_generator import *
+from .test_headless import *
+from .test_tracing import *
+from .test_benchmarks import *
+from .test_dw_load import *
+from .test_progress_tracker import *
+from .test_farm_exporter import *
+from .test_content_chunker import *
+from .test_stage_loading import *
+from .test_export_options import *
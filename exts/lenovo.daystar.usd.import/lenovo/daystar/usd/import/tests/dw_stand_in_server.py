@@ -0,0 +1,371 @@
+import json
+import time
+import hashlib
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+API_PREFIX = "/platform/api/v1"
+
+
+def parse_multipart(content_type, body):
+    """Returns a dict of field name -> bytes for a multipart/form-data body."""
+    boundary = content_type.split("boundary=", 1)[1].strip().encode("utf-8")
+    fields = {}
+    for part in body.split(b"--" + boundary):
+        if not part or part.startswith(b"--"):
+            continue
+        header, _, content = part.partition(b"\r\n\r\n")
+        for line in header.decode("utf-8").split("\r\n"):
+            if line.lower().startswith("content-disposition"):
+                name = line.split('name="', 1)[1].split('"', 1)[0]
+                fields[name] = content[:-2] if content.endswith(b"\r\n") else content
+    return fields
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.stand_in.connections += 1
+
+    def handle_one_request(self):
+        stand_in = self.server.stand_in
+        with stand_in._lock:
+            stand_in._in_flight += 1
+            stand_in.max_in_flight = max(stand_in.max_in_flight, stand_in._in_flight)
+        try:
+            super().handle_one_request()
+        finally:
+            with stand_in._lock:
+                stand_in._in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        with self.server.stand_in._lock:
+            self.server.stand_in.bytes_received += length
+        if not length or not self.server.stand_in.bandwidth:
+            return self.rfile.read(length) if length else b""
+        # Throttled as it arrives, so the upload of the client is held back like on a slow link.
+        blocks = []
+        while length > 0:
+            block = self.rfile.read(min(length, 64 * 1024))
+            if not block:
+                # The client gave up on the request, e.g. a cancelled upload.
+                self.close_connection = True
+                return None
+            self._wait_for_link(len(block))
+            blocks.append(block)
+            length -= len(block)
+        return b"".join(blocks)
+
+    def _inject_fault(self, path, handled=False):
+        """Answers with an injected fault for path if one is pending, returns True if it did.
+
+        handled picks the faults injected after the request was handled, the body was already read.
+        """
+        stand_in = self.server.stand_in
+        fault = stand_in._take_fault(stand_in._late_faults if handled else stand_in._faults, path)
+        if not fault:
+            return False
+        if not handled:
+            self._read_body()
+        status, retry_after, html = fault
+        if html:
+            body = b"<html><body><h1>Bad Gateway</h1></body></html>"
+        else:
+            body = json.dumps({"code": status, "msg": "injected fault"}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html" if html else "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
+        self.end_headers()
+        self.wfile.write(body)
+        return True
+
+    def _simulate_latency(self):
+        stand_in = self.server.stand_in
+        delay = stand_in.latency
+        if stand_in.latency_jitter:
+            with stand_in._lock:
+                delay += stand_in._random.uniform(0.0, stand_in.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _wait_for_link(self, size):
+        """Waits for size bytes to go through the bandwidth cap."""
+        stand_in = self.server.stand_in
+        with stand_in._lock:
+            # All connections share one link, transfers queue behind each other.
+            now = time.monotonic()
+            start = max(now, stand_in._link_free_at)
+            stand_in._link_free_at = start + size / stand_in.bandwidth
+            delay = stand_in._link_free_at - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def _inject_random_error(self, path):
+        """Answers with error_status at error_rate, returns True if it did."""
+        stand_in = self.server.stand_in
+        if not stand_in.error_rate or not path.endswith(stand_in.error_paths):
+            return False
+        with stand_in._lock:
+            if stand_in._random.random() >= stand_in.error_rate:
+                return False
+            stand_in.errors_injected += 1
+        self._send_json({"code": stand_in.error_status, "msg": "random error"}, status=stand_in.error_status)
+        return True
+
+    def _authorized(self):
+        if self.headers.get("Authorization") == "Bearer " + self.server.stand_in.token:
+            return True
+        self._send_json({"code": 401, "msg": "unauthorized"}, status=401)
+        return False
+
+    def _drop_connection(self):
+        self.close_connection = True
+        self.connection.shutdown(2)
+
+    def do_GET(self):
+        stand_in = self.server.stand_in
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        stand_in.requests.append(("GET", url.path))
+        if self._inject_fault(url.path):
+            return
+        self._simulate_latency()
+        if self._inject_random_error(url.path) or not self._authorized():
+            return
+        if url.path == API_PREFIX + "/asset/contents/page":
+            current, size = int(query["current"]), int(query["size"])
+            records = [{"id": a["id"], "name": name} for name, a in stand_in.assets.items()]
+            page = records[(current - 1) * size : current * size]
+            self._send_json({"code": 200, "data": {"records": page, "total": len(records)}})
+        elif url.path == API_PREFIX + "/asset/contents/chunk" and stand_in.chunk_upload:
+            offset = len(stand_in.uploads.get(query["uploadId"], b""))
+            self._send_json({"code": 200, "data": {"offset": offset}})
+        else:
+            self._send_json({"code": 404, "msg": "not found"}, status=404)
+
+    def do_POST(self):
+        stand_in = self.server.stand_in
+        url = urlparse(self.path)
+        stand_in.requests.append(("POST", url.path))
+        if self._inject_fault(url.path):
+            return
+        body = self._read_body()
+        if body is None:
+            return
+        self._simulate_latency()
+        if self._inject_random_error(url.path):
+            return
+        content_type = self.headers.get("Content-Type", "")
+        if url.path == API_PREFIX + "/auth/login":
+            data = json.loads(body)
+            if data["username"] == stand_in.user_name and data["password"] == stand_in.password:
+                stand_in.logins += 1
+                self._send_json({"code": 200, "data": {"accessToken": stand_in.token}})
+            else:
+                self._send_json({"code": 401, "msg": "bad credentials"})
+            return
+
+        if not self._authorized():
+            return
+
+        if url.path == API_PREFIX + "/asset/contents/blobs/missing" and stand_in.delta_upload:
+            hashes = json.loads(body)["hashes"]
+            with stand_in._lock:
+                missing = [chunk_hash for chunk_hash in hashes if chunk_hash not in stand_in.blobs]
+            self._send_json({"code": 200, "data": {"missing": missing}})
+        elif url.path == API_PREFIX + "/asset/contents/blobs" and stand_in.delta_upload:
+            fields = parse_multipart(content_type, body)
+            data = bytes(fields["dataFile"])
+            offset = 0
+            for chunk_hash, size in json.loads(fields["chunks"]):
+                chunk = data[offset : offset + size]
+                if hashlib.sha256(chunk).hexdigest() != chunk_hash:
+                    self._send_json({"code": 400, "msg": f"chunk {chunk_hash} doesn't match its hash"})
+                    return
+                with stand_in._lock:
+                    stand_in.blobs[chunk_hash] = chunk
+                offset += size
+            self._send_json({"code": 200, "data": {"stored": offset}})
+        elif url.path == API_PREFIX + "/asset/contents/chunk" and stand_in.chunk_upload:
+            if stand_in.drop_chunks > 0:
+                stand_in.drop_chunks -= 1
+                self._drop_connection()
+                return
+            fields = parse_multipart(content_type, body)
+            upload_id = fields["uploadId"].decode("utf-8")
+            data = stand_in.uploads.setdefault(upload_id, bytearray())
+            if stand_in.stall_chunks > 0:
+                stand_in.stall_chunks -= 1
+            elif int(fields["offset"]) == len(data):
+                data.extend(fields["dataFile"])
+            self._send_json({"code": 200, "data": {"offset": len(data)}})
+        elif url.path in (API_PREFIX + "/asset/contents/add", API_PREFIX + "/asset/contents/update"):
+            if content_type.startswith("multipart/form-data"):
+                fields = {k: v for k, v in parse_multipart(content_type, body).items()}
+                data = bytes(fields.pop("dataFile"))
+                fields = {k: v.decode("utf-8") for k, v in fields.items()}
+            else:
+                fields = {k: v[0] for k, v in parse_qs(body.decode("utf-8")).items()}
+                if "manifest" in fields:
+                    data = stand_in._reassemble(json.loads(fields["manifest"]))
+                    if data is None:
+                        self._send_json({"code": 400, "msg": "missing chunks"})
+                        return
+                else:
+                    data = bytes(stand_in.uploads.pop(fields["uploadId"]))
+            name = fields["name"]
+            with stand_in._lock:
+                if url.path.endswith("/update"):
+                    asset_id = fields["id"]
+                else:
+                    stand_in.next_id += 1
+                    asset_id = str(stand_in.next_id)
+                stand_in.assets[name] = {"id": asset_id, "data": data}
+            if self._inject_fault(url.path, handled=True):
+                return
+            self._send_json({"code": 200, "data": {"id": asset_id, "name": name}})
+        else:
+            self._send_json({"code": 404, "msg": "not found"}, status=404)
+
+
+class DWStandInServer:
+    """In-process stand-in for the Daystar World platform API, used to test DWTool without the real platform.
+
+    Attributes:
+        assets (dict): name -> {"id", "data"} of the stored assets.
+        chunk_upload (bool): If the chunked upload endpoint is available.
+        delta_upload (bool): If the chunk store endpoints of delta uploads are available.
+        blobs (dict): SHA-256 -> bytes of the chunks stored by delta uploads.
+        bytes_received (int): Total size of the request bodies received, to measure upload savings.
+        drop_chunks (int): Number of upcoming chunk requests to answer by dropping the connection.
+        stall_chunks (int): Number of upcoming chunk requests to acknowledge without storing the chunk.
+        requests (list): (method, path) of every request received.
+        connections (int): Number of TCP connections accepted.
+        logins (int): Number of successful logins.
+        max_in_flight (int): Highest number of requests handled at the same time.
+        latency (float): Seconds every request waits before it is handled.
+        latency_jitter (float): Up to this many random seconds are added to the latency.
+        bandwidth (int): Bytes per second of request bodies shared by all connections, 0 for no cap.
+        error_rate (float): Probability of answering a request with error_status instead of handling it.
+        error_status (int): HTTP status of the random errors.
+        error_paths (tuple): Path suffixes the random errors apply to.
+        errors_injected (int): Number of random errors sent.
+
+    Args:
+        seed (int): Seed of the latency jitter and the random errors.
+    """
+
+    def __init__(self, user_name="user", password="pwd", seed=0):
+        self.user_name = user_name
+        self.password = password
+        self.token = "stand-in-token"
+        self.assets = {}
+        self.uploads = {}
+        self.chunk_upload = True
+        self.delta_upload = True
+        self.blobs = {}
+        self.bytes_received = 0
+        self.drop_chunks = 0
+        self.stall_chunks = 0
+        self.next_id = 0
+        self.requests = []
+        self.connections = 0
+        self.logins = 0
+        self.max_in_flight = 0
+        self.latency = 0.0
+        self.latency_jitter = 0.0
+        self.bandwidth = 0
+        self.error_rate = 0.0
+        self.error_status = 503
+        self.error_paths = ("/auth/login", "/asset/contents/page", "/asset/contents/add", "/asset/contents/update")
+        self.errors_injected = 0
+        self._random = random.Random(seed)
+        self._link_free_at = 0.0
+        self._in_flight = 0
+        self._faults = []
+        self._late_faults = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_asset(self, name, data=b""):
+        with self._lock:
+            self.next_id += 1
+            self.assets[name] = {"id": str(self.next_id), "data": data}
+            return str(self.next_id)
+
+    def inject_fault(self, path, status, count=1, retry_after=None, html=False):
+        """Answers the next `count` requests whose path ends with `path` with `status`.
+
+        With html, the body is an HTML page instead of JSON, like the error page of a proxy.
+        """
+        with self._lock:
+            self._faults.extend([(path, status, retry_after, html)] * count)
+
+    def inject_fault_after_handling(self, path, status, count=1):
+        """Handles the next `count` requests whose path ends with `path`, then answers them with `status`.
+
+        Stands in for a platform that fails after storing the asset, e.g. behind a gateway timeout.
+        """
+        with self._lock:
+            self._late_faults.extend([(path, status, None, False)] * count)
+
+    def expire_token(self):
+        """Invalidates the current access token, the next login gets a new one."""
+        self.token = f"stand-in-token-{self.logins}"
+
+    def _reassemble(self, manifest):
+        """Returns the file of a chunk manifest, None if a chunk is missing or it doesn't match its hash."""
+        with self._lock:
+            if any(chunk_hash not in self.blobs for chunk_hash, _ in manifest["chunks"]):
+                return None
+            data = b"".join(self.blobs[chunk_hash] for chunk_hash, _ in manifest["chunks"])
+        if len(data) != manifest["size"] or hashlib.sha256(data).hexdigest() != manifest["sha256"]:
+            return None
+        return data
+
+    def _take_fault(self, faults, path):
+        with self._lock:
+            for i, (fault_path, status, retry_after, html) in enumerate(faults):
+                if path.endswith(fault_path):
+                    del faults[i]
+                    return status, retry_after, html
+        return None
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stand_in = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,144 @@
+import json
+import time
+import uuid
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from ..farm_exporter import SUBMIT_PATH, INFO_PATH, CANCEL_PATH, FarmTaskStatus
+
+
+INFO_PREFIX = INFO_PATH.split("{", 1)[0]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def do_GET(self):
+        stand_in = self.server.stand_in
+        path = urlparse(self.path).path
+        stand_in.requests.append(("GET", path))
+        task = stand_in.tasks.get(path[len(INFO_PREFIX):]) if path.startswith(INFO_PREFIX) else None
+        if task is None:
+            self._send_json({"detail": "not found"}, status=404)
+            return
+        self._send_json({"task_id": task["task_id"], "status": task["status"], "node": task["node"]})
+
+    def do_POST(self):
+        stand_in = self.server.stand_in
+        path = urlparse(self.path).path
+        stand_in.requests.append(("POST", path))
+        data = self._read_json()
+        if path == SUBMIT_PATH:
+            self._send_json({"task_id": stand_in._submit(data)})
+        elif path == CANCEL_PATH and data.get("task_id") in stand_in.tasks:
+            self._send_json({"task_id": data["task_id"], "status": stand_in._cancel(data["task_id"])})
+        else:
+            self._send_json({"detail": "not found"}, status=404)
+
+
+class FarmStandIn:
+    """In-process stand-in for the Omniverse Farm queue, used to test FarmExporter without a farm.
+
+    Submitted tasks are run by `nodes` threads, each calling convert_fn(task_function_args) the way
+    a farm node runs the `convert-asset` job.
+
+    Attributes:
+        tasks (dict): task_id -> submitted task, with its "status" and the "node" that ran it.
+        requests (list): (method, path) of every request received.
+        task_duration (float): Seconds a node takes per task on top of convert_fn.
+        fail_imports (tuple): Import path suffixes of the tasks that fail.
+
+    Args:
+        convert_fn (function): convert_fn(task_function_args), raises to fail the task.
+        nodes (int): Number of tasks run at the same time.
+    """
+
+    def __init__(self, convert_fn, nodes=2):
+        self.convert_fn = convert_fn
+        self.nodes = nodes
+        self.tasks = {}
+        self.requests = []
+        self.task_duration = 0.0
+        self.fail_imports = ()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._server = None
+        self._threads = []
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _submit(self, task):
+        task_id = uuid.uuid4().hex
+        with self._lock:
+            self.tasks[task_id] = dict(task, task_id=task_id, status=FarmTaskStatus.SUBMITTED, node=None)
+        self._queue.put(task_id)
+        return task_id
+
+    def _cancel(self, task_id):
+        with self._lock:
+            task = self.tasks[task_id]
+            if task["status"] not in FarmTaskStatus.DONE:
+                task["status"] = FarmTaskStatus.CANCELLED
+            return task["status"]
+
+    def _run_node(self, node):
+        while True:
+            task_id = self._queue.get()
+            if task_id is None:
+                break
+            with self._lock:
+                task = self.tasks[task_id]
+                if task["status"] != FarmTaskStatus.SUBMITTED:
+                    continue
+                task["status"] = FarmTaskStatus.RUNNING
+                task["node"] = node
+            args = task["task_function_args"]
+            try:
+                time.sleep(self.task_duration)
+                if args["import_path"].endswith(self.fail_imports):
+                    raise RuntimeError("injected failure")
+                self.convert_fn(args)
+                status = FarmTaskStatus.FINISHED
+            except Exception:
+                status = FarmTaskStatus.FAILED
+            with self._lock:
+                if task["status"] == FarmTaskStatus.RUNNING:
+                    task["status"] = status
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stand_in = self
+        self._threads = [threading.Thread(target=self._server.serve_forever, daemon=True)]
+        self._threads += [threading.Thread(target=self._run_node, args=(node,), daemon=True) for node in range(self.nodes)]
+        for thread in self._threads:
+            thread.start()
+        return self.url
+
+    def stop(self):
+        for _ in range(self.nodes):
+            self._queue.put(None)
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
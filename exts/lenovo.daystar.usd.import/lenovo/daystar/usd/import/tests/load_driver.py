@@ -0,0 +1,84 @@
+import os
+import math
+import time
+import random
+import asyncio
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of values, 0.0 if there are none."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+async def run_publishers_async(
+    dw_tool, server, folder, publishers=8, assets_per_publisher=10, asset_size=256 * 1024, update_ratio=0.25, seed=0
+):
+    """Runs concurrent simulated publishers through dw_tool against server and returns the load report.
+
+    Each publisher uploads assets_per_publisher assets of asset_size bytes one after the other,
+    like an artist publishing a scene part by part. A fraction update_ratio of them publishes
+    again one of the publisher's earlier assets, which goes through the update endpoint.
+
+    Args:
+        dw_tool (DWTool): Logged in DWTool shared by all publishers, like in the extension.
+        server (DWStandInServer): Server dw_tool is logged in to, its counters go to the report.
+        folder (str): Folder the asset files are written to.
+    """
+    rng = random.Random(seed)
+    latencies = []
+    failures = []
+    uploaded_bytes = 0
+    requests_before = len(server.requests)
+    connections_before = server.connections
+
+    paths = []
+    for publisher in range(publishers):
+        path = os.path.join(folder, f"publisher_{publisher}.bin")
+        with open(path, "wb") as f:
+            f.write(rng.getrandbits(asset_size * 8).to_bytes(asset_size, "little") if asset_size else b"")
+        paths.append(path)
+
+    async def publish(publisher):
+        nonlocal uploaded_bytes
+        for index in range(assets_per_publisher):
+            if index and rng.random() < update_ratio:
+                index = rng.randrange(index)
+            name = f"publisher_{publisher}_asset_{index}"
+            start = time.perf_counter()
+            try:
+                success = await dw_tool.uploadAssetToDW(name, paths[publisher])
+                error = "rejected"
+            except Exception as e:
+                success, error = False, str(e)
+            latencies.append(time.perf_counter() - start)
+            if success:
+                uploaded_bytes += asset_size
+            else:
+                failures.append(f"{name}: {error}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*[publish(publisher) for publisher in range(publishers)])
+    duration = time.perf_counter() - start
+
+    uploads = len(latencies)
+    return {
+        "publishers": publishers,
+        "uploads": uploads,
+        "failed": len(failures),
+        "failures": failures,
+        "duration": round(duration, 3),
+        "uploads_per_second": round(uploads / duration, 2) if duration else 0.0,
+        "bytes_per_second": round(uploaded_bytes / duration, 1) if duration else 0.0,
+        "latency": {
+            "p50": round(percentile(latencies, 0.5), 4),
+            "p99": round(percentile(latencies, 0.99), 4),
+            "max": round(max(latencies), 4) if latencies else 0.0,
+        },
+        "requests": len(server.requests) - requests_before,
+        "connections": server.connections - connections_before,
+        "max_in_flight": server.max_in_flight,
+        "errors_injected": server.errors_injected,
+    }
@@ -0,0 +1,161 @@
+import os
+import math
+import zlib
+import random
+import struct
+from pxr import Gf, Kind, Sdf, Usd, UsdGeom, UsdShade, Vt
+
+
+class StageSpec:
+    """Size of a synthetic stage, see generate_stage.
+
+    Args:
+        meshes (int): Number of meshes in the stage, instances included.
+        vertices (int): Vertices of each mesh, rounded up to a square grid.
+        materials (int): Number of UsdPreviewSurface materials, bound round robin.
+        texture_size (int): Width and height of the diffuse texture of each material, 0 for none.
+        instancing_ratio (float): Fraction of the meshes that are instances of a prototype.
+        prototypes (int): Number of prototypes the instances are spread over.
+        seed (int): Seed of the placement and the texture noise, the same spec always generates the same stage.
+    """
+
+    def __init__(
+        self, meshes=100, vertices=400, materials=4, texture_size=0, instancing_ratio=0.0, prototypes=4, seed=0
+    ):
+        self.meshes = meshes
+        self.vertices = vertices
+        self.materials = max(1, materials)
+        self.texture_size = texture_size
+        self.instancing_ratio = min(max(instancing_ratio, 0.0), 1.0)
+        self.prototypes = max(1, prototypes)
+        self.seed = seed
+
+    @property
+    def instances(self):
+        return int(round(self.meshes * self.instancing_ratio))
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+def write_png(path, size, rng):
+    """Writes a size x size RGB PNG of noise, which compresses about as badly as a photographed texture."""
+    rows = b"".join(b"\x00" + rng.getrandbits(size * 24).to_bytes(size * 3, "little") for _ in range(size))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(rows, 1)))
+        f.write(chunk(b"IEND", b""))
+
+
+def _grid(vertices):
+    """Returns the points, face vertex counts and indices and texture coordinates of a wavy grid."""
+    side = max(2, int(math.ceil(math.sqrt(vertices))))
+    points, st = [], []
+    for i in range(side):
+        for j in range(side):
+            u, v = i / (side - 1), j / (side - 1)
+            points.append(Gf.Vec3f(u * 100.0, math.sin(u * 6.0) * math.cos(v * 4.0) * 5.0, v * 100.0))
+            st.append(Gf.Vec2f(u, v))
+    indices = []
+    for i in range(side - 1):
+        for j in range(side - 1):
+            corner = i * side + j
+            indices.extend([corner, corner + 1, corner + side + 1, corner + side])
+    counts = [4] * ((side - 1) * (side - 1))
+    return Vt.Vec3fArray(points), Vt.IntArray(counts), Vt.IntArray(indices), Vt.Vec2fArray(st)
+
+
+def _define_mesh(stage, path, grid, material):
+    points, counts, indices, st = grid
+    mesh = UsdGeom.Mesh.Define(stage, path)
+    mesh.CreatePointsAttr(points)
+    mesh.CreateFaceVertexCountsAttr(counts)
+    mesh.CreateFaceVertexIndicesAttr(indices)
+    mesh.CreateExtentAttr(UsdGeom.PointBased.ComputeExtent(points))
+    UsdGeom.PrimvarsAPI(mesh).CreatePrimvar(
+        "st", Sdf.ValueTypeNames.TexCoord2fArray, UsdGeom.Tokens.vertex
+    ).Set(st)
+    UsdShade.MaterialBindingAPI.Apply(mesh.GetPrim()).Bind(material)
+    return mesh
+
+
+def _define_material(stage, path, texture_path, rng):
+    material = UsdShade.Material.Define(stage, path)
+    shader = UsdShade.Shader.Define(stage, f"{path}/Surface")
+    shader.CreateIdAttr("UsdPreviewSurface")
+    shader.CreateInput("roughness", Sdf.ValueTypeNames.Float).Set(rng.random())
+    material.CreateSurfaceOutput().ConnectToSource(shader.ConnectableAPI(), "surface")
+    if texture_path:
+        reader = UsdShade.Shader.Define(stage, f"{path}/StReader")
+        reader.CreateIdAttr("UsdPrimvarReader_float2")
+        reader.CreateInput("varname", Sdf.ValueTypeNames.Token).Set("st")
+        texture = UsdShade.Shader.Define(stage, f"{path}/Diffuse")
+        texture.CreateIdAttr("UsdUVTexture")
+        texture.CreateInput("file", Sdf.ValueTypeNames.Asset).Set(texture_path)
+        texture.CreateInput("st", Sdf.ValueTypeNames.Float2).ConnectToSource(reader.ConnectableAPI(), "result")
+        shader.CreateInput("diffuseColor", Sdf.ValueTypeNames.Color3f).ConnectToSource(
+            texture.ConnectableAPI(), "rgb"
+        )
+    else:
+        shader.CreateInput("diffuseColor", Sdf.ValueTypeNames.Color3f).Set(
+            Gf.Vec3f(rng.random(), rng.random(), rng.random())
+        )
+    return material
+
+
+def generate_stage(folder, spec, name="synthetic"):
+    """Writes the stage described by spec, and its textures, into folder and returns the path of the stage.
+
+    The meshes are laid out on a grid under /World/Meshes. The instances reference prototypes
+    defined under the /Prototypes class, so the prototypes themselves aren't exported.
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(spec.seed)
+    path = os.path.join(folder, f"{name}.usd").replace("\\", "/")
+    stage = Usd.Stage.CreateNew(path)
+    UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.y)
+    UsdGeom.SetStageMetersPerUnit(stage, 0.01)
+    world = UsdGeom.Xform.Define(stage, "/World")
+    stage.SetDefaultPrim(world.GetPrim())
+    Usd.ModelAPI(world).SetKind(Kind.Tokens.assembly)
+
+    materials = []
+    for index in range(spec.materials):
+        texture_path = None
+        if spec.texture_size:
+            texture_path = f"./textures/diffuse_{index}.png"
+            os.makedirs(os.path.join(folder, "textures"), exist_ok=True)
+            write_png(os.path.join(folder, texture_path), spec.texture_size, rng)
+        materials.append(_define_material(stage, f"/World/Looks/Material_{index}", texture_path, rng))
+
+    grid = _grid(spec.vertices)
+    instances = spec.instances
+    prototypes = []
+    if instances:
+        stage.CreateClassPrim("/Prototypes")
+        for index in range(min(spec.prototypes, instances)):
+            prototype = UsdGeom.Xform.Define(stage, f"/Prototypes/Prototype_{index}")
+            _define_mesh(stage, f"{prototype.GetPath()}/Mesh", grid, materials[index % len(materials)])
+            prototypes.append(prototype.GetPath())
+
+    columns = max(1, int(math.ceil(math.sqrt(spec.meshes))))
+    UsdGeom.Xform.Define(stage, "/World/Meshes")
+    for index in range(spec.meshes):
+        prim_path = f"/World/Meshes/Mesh_{index}"
+        # Instances are spread over the grid instead of being all at its end.
+        if instances and index * instances // spec.meshes != (index + 1) * instances // spec.meshes:
+            xform = UsdGeom.Xform.Define(stage, prim_path)
+            xform.GetPrim().GetReferences().AddInternalReference(prototypes[index % len(prototypes)])
+            xform.GetPrim().SetInstanceable(True)
+        else:
+            xform = _define_mesh(stage, prim_path, grid, materials[index % len(materials)])
+        offset = Gf.Vec3d((index % columns) * 120.0, rng.uniform(-10.0, 10.0), (index // columns) * 120.0)
+        xform.AddTranslateOp().Set(offset)
+        xform.AddRotateYOp().Set(rng.uniform(0.0, 360.0))
+    stage.GetRootLayer().Save()
+    return path
@@ -0,0 +1,85 @@
+import omni.kit.test
+
+from ..dwtool import AssetIndex
+
+
+class _Listing:
+    """Stands in for the paged asset listing of the platform, fails the next `failures` requests."""
+
+    def __init__(self, names):
+        self.records = [{"name": name, "id": f"id-{name}"} for name in names]
+        self.pages = []
+        self.failures = 0
+
+    def __call__(self, current, size):
+        self.pages.append(current)
+        if self.failures:
+            self.failures -= 1
+            raise IOError("listing failed")
+        return self.records[(current - 1) * size : current * size]
+
+
+class TestAssetIndex(omni.kit.test.AsyncTestCase):
+    async def test_paging(self):
+        listing = _Listing(["a", "b", "c", "d", "e"])
+        index = AssetIndex(page_size=2)
+
+        self.assertEqual(index.lookup("c", listing), "id-c")
+        # Stopped at the page that had the name.
+        self.assertEqual(listing.pages, [1, 2])
+        self.assertFalse(index.is_fresh())
+
+        # Continues from there, the short last page completes the index.
+        self.assertEqual(index.lookup("x", listing), "")
+        self.assertEqual(listing.pages, [1, 2, 3])
+        self.assertTrue(index.is_fresh())
+
+        # Answered locally.
+        self.assertEqual(index.lookup_many(["a", "e", "x"], listing), {"a": "id-a", "e": "id-e"})
+        self.assertEqual(listing.pages, [1, 2, 3])
+
+    async def test_ttl_expiry(self):
+        listing = _Listing(["a", "b", "c"])
+        index = AssetIndex(page_size=2, ttl=60.0)
+        index.refresh(listing)
+        self.assertTrue(index.is_fresh())
+
+        listing.records = [record for record in listing.records if record["name"] != "b"]
+        listing.records.append({"name": "d", "id": "id-d"})
+        index._refreshed_at -= 61.0
+        self.assertFalse(index.is_fresh())
+
+        # A new pass picks up the new asset and drops the removed one.
+        self.assertEqual(index.lookup("d", listing), "id-d")
+        self.assertEqual(index.lookup("b", listing), "")
+        self.assertTrue(index.is_fresh())
+        self.assertEqual(listing.pages, [1, 2, 1, 2])
+
+    async def test_discard(self):
+        listing = _Listing(["a", "b", "c"])
+        index = AssetIndex(page_size=2)
+        index.refresh(listing)
+
+        # e.g. an /add response without an id, the asset may still exist.
+        index.discard("c")
+        self.assertFalse(index.is_fresh())
+        self.assertEqual(index.lookup("c", listing), "id-c")
+        self.assertEqual(listing.pages, [1, 2, 1, 2])
+        self.assertEqual(index.lookup("a", listing), "id-a")
+
+    async def test_failed_page(self):
+        listing = _Listing(["a", "b", "c"])
+        index = AssetIndex(page_size=2)
+        self.assertEqual(index.lookup("a", listing), "id-a")
+
+        listing.failures = 1
+        with self.assertRaises(IOError):
+            index.lookup("c", listing)
+        # The failure isn't taken for the end of the listing.
+        self.assertFalse(index.is_fresh())
+        self.assertEqual(index.lookup("a", listing), "id-a")
+
+        self.assertEqual(index.lookup("c", listing), "id-c")
+        # The failed page was requested again.
+        self.assertEqual(listing.pages, [1, 2, 2])
+        self.assertTrue(index.is_fresh())
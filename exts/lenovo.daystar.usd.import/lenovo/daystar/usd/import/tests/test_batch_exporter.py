@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import omni.kit.test
+
+from ..dwtool import DWTool
+from ..batch_exporter import BatchExporter, BatchJobStatus
+from ..export_job import StagingWorkspace, CleanupPolicy
+from .dw_stand_in_server import DWStandInServer
+
+
+class _CopyExporter:
+    """Stands in for Exporter, "converts" by copying the source file."""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.calls = []
+
+    async def export_file_async(self, usd_path, output_path, asset_converter_context, progress_fn=None):
+        self.calls.append(usd_path)
+        name = os.path.basename(usd_path)
+        if self.failures.get(name, 0) > 0:
+            self.failures[name] -= 1
+            return False
+        shutil.copyfile(usd_path, output_path)
+        progress_fn(1.0)
+        return True
+
+    def lod_assets(self, output_path):
+        return []
+
+
+class TestBatchExporter(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._server = DWStandInServer()
+        self._server.start()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._source_dir = os.path.join(self._tmp_dir.name, "library")
+        os.makedirs(os.path.join(self._source_dir, "sub"))
+        for path in ("a.usd", "sub/b.usda", "readme.txt"):
+            with open(os.path.join(self._source_dir, path), "w") as f:
+                f.write(path)
+        DWTool._instance = None
+        self._tool = DWTool()
+        self.assertTrue(await self._tool.loginToDW(self._server.url, "user", "pwd"))
+
+    async def tearDown(self):
+        self._tool.close()
+        self._server.stop()
+        self._tmp_dir.cleanup()
+        DWTool._instance = None
+
+    async def test_exports_and_uploads_usd_files_with_retries(self):
+        exporter = _CopyExporter(failures={"b.usda": 1, "a.usd": 5})
+        statuses = []
+        workspace = StagingWorkspace(os.path.join(self._tmp_dir.name, "staging"), CleanupPolicy.ON_SUCCESS)
+        batch = BatchExporter(
+            exporter, self._tool, workspace, max_workers=2, max_retries=1, status_fn=lambda job: statuses.append(job.status)
+        )
+        batch.retry_delay = 0
+        report = await batch.run_async(self._source_dir, None)
+
+        self.assertEqual(report["total"], 2)
+        self.assertEqual(report["succeeded"], 1)
+        self.assertEqual(report["failed"], 1)
+        jobs = {job["target_name"]: job for job in report["jobs"]}
+        self.assertEqual(jobs["sub_b"]["status"], BatchJobStatus.SUCCEEDED)
+        self.assertEqual(jobs["sub_b"]["attempts"], 2)
+        self.assertEqual(jobs["sub_b"]["upload_attempts"], 1)
+        self.assertEqual(report["stages"]["upload"]["items"], 1)
+        self.assertEqual(report["stages"]["upload"]["bytes"], len(b"sub/b.usda"))
+        self.assertEqual(jobs["a"]["status"], BatchJobStatus.FAILED)
+        self.assertEqual(self._server.assets["[ov]-sub_b"]["data"], b"sub/b.usda")
+        self.assertIn(BatchJobStatus.UPLOADING, statuses)
+        # Only the report and the staging folder of the failed job are left.
+        left = sorted(os.listdir(workspace.root))
+        self.assertEqual(len(left), 2)
+        self.assertTrue(left[-1].startswith("batch_report_"))
+        self.assertEqual(left[0], jobs["a"]["job_id"])
@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import asyncio
+import platform
+import tempfile
+import unittest
+import carb
+import omni.kit.test
+import omni.kit.asset_converter as converter
+from pxr import Usd, UsdGeom
+
+from ..dwtool import DWTool
+from ..exporter import Exporter, CONVERT_CACHE_SETTINGS
+from ..export_job import StagingWorkspace, CleanupPolicy
+from ..tracing import get_tracer
+from .dw_stand_in_server import DWStandInServer
+from .stage_generator import StageSpec, generate_stage
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+# Set to 1 to run the benchmarks, they take minutes so the default test run skips them.
+RUN_BENCHMARKS_ENV = "DAYSTAR_BENCHMARKS"
+# Set to 1 to write the results of the run as the new baseline instead of comparing them to it.
+UPDATE_BASELINE_ENV = "DAYSTAR_BENCHMARK_UPDATE"
+# Path of the JSON file the results of the run are written to, e.g. to keep them as a CI artifact.
+RESULTS_ENV = "DAYSTAR_BENCHMARK_RESULTS"
+
+BENCHMARKS = {
+    "many_small_meshes": StageSpec(meshes=400, vertices=100, materials=8),
+    "instanced": StageSpec(meshes=400, vertices=400, materials=8, instancing_ratio=0.9),
+    "dense_meshes": StageSpec(meshes=16, vertices=40000, materials=2),
+    "textured": StageSpec(meshes=32, vertices=400, materials=16, texture_size=1024),
+}
+
+
+def find_regressions(results, baseline):
+    """Returns a message for each duration of results slower than its baseline by more than the tolerance.
+
+    A duration regresses when it is above baseline * (1 + tolerance) + min_slack, the slack keeps
+    timer noise on short phases from failing the run. Benchmarks that can't be compared are left
+    out, see find_unchecked.
+    """
+    tolerance = baseline.get("tolerance", 0.25)
+    min_slack = baseline.get("min_slack", 0.05)
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("benchmarks", {}).get(name)
+        if not reference or reference.get("spec") != result["spec"]:
+            continue
+        durations = [("total", reference["duration"], result["duration"])]
+        for phase, totals in reference.get("phases", {}).items():
+            if phase in result["phases"]:
+                durations.append((phase, totals["duration"], result["phases"][phase]["duration"]))
+        for label, expected, measured in durations:
+            if measured > expected * (1.0 + tolerance) + min_slack:
+                regressions.append(f"{name} {label}: {measured:.3f}s, baseline {expected:.3f}s")
+    return regressions
+
+
+def find_unchecked(results, baseline):
+    """Returns a message for each benchmark of results missing from the baseline, or whose spec changed since."""
+    unchecked = []
+    for name, result in results.items():
+        reference = baseline.get("benchmarks", {}).get(name)
+        if not reference:
+            unchecked.append(f"{name}: not in the baseline")
+        elif reference.get("spec") != result["spec"]:
+            unchecked.append(f"{name}: changed since its baseline was recorded")
+    return unchecked
+
+
+class TestBenchmarks(omni.kit.test.AsyncTestCase):
+    """Times the export of synthetic stages through Exporter.create_usd_export_task and their upload.
+
+    Each benchmark is compared to tests/benchmark_baseline.json and the run fails if one got
+    slower than the tolerance of the baseline allows: by default 25% of its duration plus 0.05s,
+    the "tolerance" and "min_slack" of the baseline. Benchmarks the baseline has no entry for,
+    or an entry recorded with another spec, are skipped with a message. After a deliberate change
+    in speed, or on a new reference machine, record a new baseline with DAYSTAR_BENCHMARKS=1
+    DAYSTAR_BENCHMARK_UPDATE=1 and commit it. The benchmarks only run with DAYSTAR_BENCHMARKS=1.
+    """
+
+    async def setUp(self):
+        self._server = DWStandInServer()
+        self._server.start()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        settings = carb.settings.get_settings()
+        # Every run has to convert, a cache hit would time nothing.
+        self._convert_cache_enabled = settings.get_as_bool(f"{CONVERT_CACHE_SETTINGS}/enabled")
+        settings.set(f"{CONVERT_CACHE_SETTINGS}/enabled", False)
+        self._exporter = Exporter()
+        self._exporter.on_startup(headless=True)
+        self._tracer_enabled = get_tracer().enabled
+        get_tracer().enabled = True
+        DWTool._instance = None
+        self._tool = DWTool()
+        self.assertTrue(await self._tool.loginToDW(self._server.url, "user", "pwd"))
+        self._workspace = StagingWorkspace(os.path.join(self._tmp_dir.name, "staging"), CleanupPolicy.ALWAYS)
+
+    async def tearDown(self):
+        get_tracer().enabled = self._tracer_enabled
+        carb.settings.get_settings().set(f"{CONVERT_CACHE_SETTINGS}/enabled", self._convert_cache_enabled)
+        self._exporter.on_shutdown()
+        self._tool.close()
+        self._server.stop()
+        self._tmp_dir.cleanup()
+        DWTool._instance = None
+
+    async def _run_benchmark(self, name, spec):
+        stage_path = generate_stage(os.path.join(self._tmp_dir.name, name), spec)
+        stage = Usd.Stage.Open(stage_path)
+        context = converter.AssetConverterContext()
+        context.embed_textures = bool(spec.texture_size)
+        job = self._workspace.create_job(name, context, stage_path)
+        finished = asyncio.get_event_loop().create_future()
+
+        def convert_callback(success):
+            if not finished.done():
+                finished.set_result(success)
+
+        start = time.perf_counter()
+        with get_tracer().job(job):
+            self._exporter.create_usd_export_task(stage, job.output_path, context, convert_callback)
+            converted = await finished
+            convert_end = time.perf_counter()
+            uploaded = converted and await self._tool.uploadAssetToDW(name, job.output_path)
+        end = time.perf_counter()
+        result = {
+            "spec": spec.to_dict(),
+            "success": bool(converted and uploaded),
+            "duration": round(end - start, 3),
+            "convert_duration": round(convert_end - start, 3),
+            "upload_duration": round(end - convert_end, 3),
+            "output_size": os.path.getsize(job.output_path) if converted else 0,
+            "phases": get_tracer().job_summary(job.job_id),
+        }
+        self._workspace.finish_job(job, result["success"])
+        return result
+
+    async def test_stage_generator(self):
+        spec = StageSpec(meshes=20, vertices=30, materials=3, texture_size=16, instancing_ratio=0.5)
+        stage = Usd.Stage.Open(generate_stage(self._tmp_dir.name, spec))
+        prims = list(Usd.PrimRange(stage.GetPseudoRoot(), Usd.TraverseInstanceProxies()))
+        self.assertEqual(len([prim for prim in prims if prim.IsA(UsdGeom.Mesh)]), 20)
+        self.assertEqual(len([prim for prim in prims if prim.IsInstance()]), 10)
+        self.assertEqual(len(UsdGeom.Mesh(stage.GetPrimAtPath("/World/Meshes/Mesh_0")).GetPointsAttr().Get()), 36)
+        self.assertEqual(len(os.listdir(os.path.join(self._tmp_dir.name, "textures"))), 3)
+
+    @unittest.skipUnless(
+        os.environ.get(RUN_BENCHMARKS_ENV) == "1" or os.environ.get(UPDATE_BASELINE_ENV) == "1",
+        f"set {RUN_BENCHMARKS_ENV}=1 to run the benchmarks",
+    )
+    async def test_benchmarks(self):
+        results = {}
+        for name, spec in BENCHMARKS.items():
+            results[name] = await self._run_benchmark(name, spec)
+            carb.log_info(f"Benchmark {name}: {results[name]}")
+            self.assertTrue(results[name]["success"], f"benchmark {name} failed to export")
+
+        run = {
+            "machine": {"platform": platform.platform(), "cpus": os.cpu_count()},
+            "benchmarks": results,
+        }
+        results_path = os.environ.get(RESULTS_ENV)
+        if results_path:
+            with open(results_path, "w") as f:
+                json.dump(run, f, indent=2)
+
+        with open(BASELINE_PATH, "r") as f:
+            baseline = json.load(f)
+        if os.environ.get(UPDATE_BASELINE_ENV) == "1":
+            baseline.update(run)
+            with open(BASELINE_PATH, "w") as f:
+                json.dump(baseline, f, indent=2)
+            carb.log_warn(f"Benchmark baseline updated: {BASELINE_PATH}")
+            return
+        regressions = find_regressions(results, baseline)
+        self.assertEqual(regressions, [], "performance regressions against the benchmark baseline")
+        unchecked = find_unchecked(results, baseline)
+        if unchecked:
+            self.skipTest(
+                f"no baseline to compare to in {BASELINE_PATH} ({'; '.join(unchecked)}), record one on the "
+                f"reference machine with {RUN_BENCHMARKS_ENV}=1 {UPDATE_BASELINE_ENV}=1 and commit it"
+            )
+
+    async def test_find_regressions(self):
+        spec = StageSpec().to_dict()
+        baseline = {
+            "tolerance": 0.5,
+            "min_slack": 0.1,
+            "benchmarks": {
+                "a": {"spec": spec, "duration": 2.0, "phases": {"convert": {"duration": 1.0}}},
+                "b": {"spec": {**spec, "meshes": 1}, "duration": 0.1, "phases": {}},
+            },
+        }
+        results = {
+            "a": {"spec": spec, "duration": 3.05, "phases": {"convert": {"duration": 1.7}}},
+            "b": {"spec": spec, "duration": 0.1, "phases": {}},
+            "new": {"spec": spec, "duration": 0.1, "phases": {}},
+        }
+        self.assertEqual(find_regressions(results, baseline), ["a convert: 1.700s, baseline 1.000s"])
+        # Benchmarks that can't be compared are reported rather than passed.
+        self.assertEqual(
+            find_unchecked(results, baseline),
+            ["b: changed since its baseline was recorded", "new: not in the baseline"],
+        )
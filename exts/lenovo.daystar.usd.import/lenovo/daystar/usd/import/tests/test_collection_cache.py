@@ -0,0 +1,117 @@
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+import omni.kit.test
+from omni.kit.asset_converter import AssetConverterContext
+from pxr import Sdf, Usd, UsdGeom, UsdShade
+
+from ..exporter import Exporter
+from ..collection_cache import CollectionCache
+
+
+class TestCollectionCache(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._folder = tempfile.mkdtemp()
+        self._cache = CollectionCache(os.path.join(self._folder, "cache"), 1024 * 1024)
+        self._texture = self._write("shared/textures/albedo.png", b"png" * 100)
+        self._write("source/materials/Custom.mdl", b"mdl 1.6; import Helper::*;")
+        self._write("source/materials/Helper.mdl", b"mdl 1.6;")
+
+        prop = Usd.Stage.CreateNew(self._path("source/props/prop.usda"))
+        UsdGeom.Cube.Define(prop, "/Prop")
+        prop.SetDefaultPrim(prop.GetPrimAtPath("/Prop"))
+        prop.Save()
+
+        stage = Usd.Stage.CreateNew(self._path("source/scene.usda"))
+        stage.DefinePrim("/World/Prop").GetReferences().AddReference("./props/prop.usda")
+        shader = UsdShade.Shader.Define(stage, "/World/Looks/Material/Shader")
+        shader.SetSourceAsset("./materials/Custom.mdl", "mdl")
+        # An absolute path outside of the stage folder is made relative in the collected layer.
+        shader.CreateInput("albedo", Sdf.ValueTypeNames.Asset).Set(self._texture.replace("\\", "/"))
+        stage.Save()
+        self._usd_path = self._path("source/scene.usda").replace("\\", "/")
+
+    async def tearDown(self):
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def _path(self, relative_path):
+        return os.path.join(self._folder, relative_path)
+
+    def _write(self, relative_path, data):
+        path = self._path(relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    async def test_incremental_collect(self):
+        collected_file = await self._cache.collect_async(self._usd_path)
+        self.assertEqual(self._cache.stats["files"], 5)
+        self.assertEqual(self._cache.stats["copied"], 5)
+
+        stage = Usd.Stage.Open(collected_file)
+        self.assertTrue(stage.GetPrimAtPath("/World/Prop").IsA(UsdGeom.Cube))
+        shader = UsdShade.Shader(stage.GetPrimAtPath("/World/Looks/Material/Shader"))
+        albedo = shader.GetInput("albedo").Get()
+        self.assertTrue(albedo.path.startswith("./"))
+        self.assertTrue(albedo.resolvedPath.replace("\\", "/").startswith(self._cache.workspace_path(self._usd_path)))
+        workspace_mdl = os.path.join(os.path.dirname(shader.GetSourceAsset("mdl").resolvedPath), "Helper.mdl")
+        self.assertTrue(os.path.isfile(workspace_mdl))
+
+        await self._cache.collect_async(self._usd_path)
+        self.assertEqual(self._cache.stats["copied"], 0)
+
+        # A changed source and an edited copy are both collected again.
+        time.sleep(0.01)
+        self._write("shared/textures/albedo.png", b"png" * 200)
+        stage.GetRootLayer().customLayerData = {"baked": True}
+        stage.Save()
+        await self._cache.collect_async(self._usd_path)
+        self.assertEqual(self._cache.stats["copied"], 2)
+        self.assertNotIn("baked", Usd.Stage.Open(collected_file).GetRootLayer().customLayerData)
+
+    async def test_evict_least_recently_used(self):
+        other_path = self._path("source/other.usda").replace("\\", "/")
+        Usd.Stage.CreateNew(other_path).Save()
+        self._cache.max_size = 1
+
+        await self._cache.collect_async(self._usd_path)
+        await self._cache.collect_async(other_path)
+
+        self.assertFalse(os.path.exists(self._cache.workspace_path(self._usd_path)))
+        self.assertTrue(os.path.exists(self._cache.workspace_path(other_path)))
+
+    async def test_dirty_layer_is_snapshot(self):
+        await self._cache.collect_async(self._usd_path)
+        layer = Sdf.Layer.FindOrOpen(self._usd_path)
+        layer.customLayerData = {"edited": True}
+
+        collected_file = await self._cache.collect_async(self._usd_path)
+        # The unsaved edit is collected, the source is left as it is.
+        self.assertEqual(self._cache.stats["copied"], 1)
+        collected_stage = Usd.Stage.Open(collected_file)
+        self.assertTrue(collected_stage.GetRootLayer().customLayerData["edited"])
+        self.assertTrue(layer.dirty)
+        layer.Reload(True)
+
+    async def test_failed_bake_fails_export(self):
+        exporter = Exporter()
+        exporter.on_startup(headless=True)
+        exporter._collection_cache = self._cache
+        exporter._enable_extension = lambda extension_id: None
+
+        async def bake_materials_async(stage, asset_converter_context):
+            raise RuntimeError("distill failed")
+
+        exporter._bake_materials_async = bake_materials_async
+        context = AssetConverterContext()
+        context.bake_mdl_material = True
+        output_path = os.path.join(self._folder, "scene.glb")
+        finished = asyncio.get_event_loop().create_future()
+        exporter.create_usd_export_task(Usd.Stage.Open(self._usd_path), output_path, context, finished.set_result)
+
+        # The export reports its failure instead of never finishing.
+        self.assertFalse(await asyncio.wait_for(finished, 10))
+        self.assertFalse(os.path.exists(output_path))
@@ -0,0 +1,44 @@
+import os
+import random
+import tempfile
+import omni.kit.test
+
+from ..content_chunker import ContentChunker
+
+
+class TestContentChunker(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._data = random.Random(0).randbytes(3 * 1024 * 1024)
+
+    async def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _write(self, name, data):
+        path = os.path.join(self._tmp_dir.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    async def test_boundaries(self):
+        path = self._write("a.bin", self._data)
+        chunker = ContentChunker(min_size=16 * 1024, avg_size=64 * 1024, max_size=128 * 1024)
+        boundaries = chunker.boundaries(path)
+        self.assertEqual(boundaries[-1], len(self._data))
+        sizes = [end - start for start, end in zip([0] + boundaries, boundaries)]
+        self.assertTrue(all(16 * 1024 <= size <= 128 * 1024 for size in sizes[:-1]))
+        # The boundaries don't depend on how the file is read.
+        chunker.block_size = 100000
+        self.assertEqual(chunker.boundaries(path), boundaries)
+        self.assertEqual(ContentChunker().boundaries(self._write("empty.bin", b"")), [])
+
+    async def test_edit_only_changes_nearby_chunks(self):
+        chunker = ContentChunker(min_size=16 * 1024, avg_size=64 * 1024, max_size=256 * 1024)
+        before = chunker.manifest(self._write("a.bin", self._data))
+        edited = self._data[:1000000] + b"edit" * 100 + self._data[1000400:]
+        after = chunker.manifest(self._write("b.bin", edited))
+
+        self.assertEqual(after["size"], len(edited))
+        known = {chunk_hash for chunk_hash, _ in before["chunks"]}
+        new_bytes = sum(size for chunk_hash, size in after["chunks"] if chunk_hash not in known)
+        self.assertLess(new_bytes, 512 * 1024)
@@ -0,0 +1,60 @@
+import os
+import time
+import tempfile
+import omni.kit.test
+from omni.kit.asset_converter import AssetConverterContext
+from pxr import Usd, UsdGeom
+
+from ..convert_cache import ConvertCache
+
+
+class TestConvertCache(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._cache = ConvertCache(os.path.join(self._tmp_dir.name, "cache"), 250)
+
+    async def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _write(self, name, size):
+        path = os.path.join(self._tmp_dir.name, name)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        return path
+
+    async def test_store_fetch_and_evict_least_recently_used(self):
+        output_path = os.path.join(self._tmp_dir.name, "out.glb")
+        for key in ("a", "b"):
+            self._cache.store(key, self._write("out.glb", 100))
+            time.sleep(0.01)
+        self.assertTrue(self._cache.fetch("a", output_path))
+        self.assertFalse(self._cache.fetch("c", output_path))
+
+        time.sleep(0.01)
+        self._cache.store("c", self._write("out.glb", 100))
+
+        # "b" is the least recently used entry since "a" was just fetched.
+        self.assertFalse(self._cache.fetch("b", output_path))
+        self.assertTrue(self._cache.fetch("a", output_path))
+        self.assertTrue(self._cache.fetch("c", output_path))
+
+    async def test_unreadable_entry_is_a_miss(self):
+        output_path = os.path.join(self._tmp_dir.name, "out.glb")
+        os.makedirs(self._cache._cached_path("a", output_path))
+        # An entry that can't be copied is a miss rather than a failed export.
+        self.assertFalse(self._cache.fetch("a", output_path))
+        self.assertFalse(os.path.exists(output_path))
+
+    async def test_key_follows_stage_edits_and_settings(self):
+        stage = Usd.Stage.CreateInMemory()
+        UsdGeom.Cube.Define(stage, "/cube")
+        context = AssetConverterContext()
+        key = self._cache.make_stage_key(stage, context, "out.glb")
+        self.assertEqual(key, self._cache.make_stage_key(stage, context, "out.glb"))
+
+        context.embed_textures = not context.embed_textures
+        self.assertNotEqual(key, self._cache.make_stage_key(stage, context, "out.glb"))
+        context.embed_textures = not context.embed_textures
+
+        UsdGeom.Cube.Define(stage, "/cube2")
+        self.assertNotEqual(key, self._cache.make_stage_key(stage, context, "out.glb"))
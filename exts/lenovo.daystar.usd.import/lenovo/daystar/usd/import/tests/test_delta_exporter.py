@@ -0,0 +1,106 @@
+import os
+import json
+import tempfile
+import omni.kit.test
+from pxr import Gf, Sdf, Usd, UsdGeom, UsdShade
+
+from ..dwtool import DWTool
+from ..delta_exporter import DeltaExporter
+from ..export_job import StagingWorkspace, CleanupPolicy
+from .dw_stand_in_server import DWStandInServer
+
+
+class _FlattenExporter:
+    """Stands in for Exporter, "converts" a stage by flattening it."""
+
+    def __init__(self):
+        self.converted = []
+        self.failures = set()
+
+    def needs_collect(self, asset_converter_context):
+        return False
+
+    async def export_stage_async(self, stage, output_path, asset_converter_context, progress_fn=None):
+        part = str(stage.GetPopulationMask().GetPaths()[0])
+        self.converted.append(part)
+        if part in self.failures:
+            return False
+        with open(output_path, "w") as f:
+            f.write(stage.Flatten().ExportToString())
+        return True
+
+
+class TestDeltaExporter(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._server = DWStandInServer()
+        self._server.start()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        DWTool._instance = None
+        self._tool = DWTool()
+        self.assertTrue(await self._tool.loginToDW(self._server.url, "user", "pwd"))
+        workspace = StagingWorkspace(os.path.join(self._tmp_dir.name, "staging"), CleanupPolicy.ON_SUCCESS)
+        self._exporter = _FlattenExporter()
+        self._delta = DeltaExporter(self._exporter, self._tool, workspace, os.path.join(self._tmp_dir.name, "delta"))
+
+        self._stage = Usd.Stage.CreateInMemory()
+        world = UsdGeom.Xform.Define(self._stage, "/World")
+        self._stage.SetDefaultPrim(world.GetPrim())
+        for name in ("A", "B", "C"):
+            UsdGeom.Xform.Define(self._stage, f"/World/{name}")
+            UsdGeom.Cube.Define(self._stage, f"/World/{name}/Cube")
+        material = UsdShade.Material.Define(self._stage, "/World/Looks/Red")
+        UsdShade.MaterialBindingAPI.Apply(self._stage.GetPrimAtPath("/World/B/Cube")).Bind(material)
+
+    async def tearDown(self):
+        self._delta.stop_tracking()
+        self._tool.close()
+        self._server.stop()
+        self._tmp_dir.cleanup()
+        DWTool._instance = None
+
+    async def _publish(self):
+        self._exporter.converted = []
+        return await self._delta.publish_async(self._stage, "layout", None)
+
+    async def test_publish_only_changed_parts(self):
+        report = await self._publish()
+        self.assertEqual(sorted(self._exporter.converted), ["/World/A", "/World/B", "/World/C"])
+        self.assertEqual(report["uploaded"], 3)
+        manifest = json.loads(self._server.assets["[ov]-layout_assembly"]["data"])
+        self.assertEqual([part["path"] for part in manifest["parts"]], ["/World/A", "/World/B", "/World/C"])
+        self.assertEqual(manifest["parts"][1]["asset"], "layout_B")
+
+        # Nothing changed, nothing to convert or upload.
+        report = await self._publish()
+        self.assertEqual(self._exporter.converted, [])
+        self.assertEqual(report["version"], 1)
+
+        UsdGeom.XformCommonAPI(self._stage.GetPrimAtPath("/World/A")).SetTranslate(Gf.Vec3d(1, 0, 0))
+        report = await self._publish()
+        self.assertEqual(self._exporter.converted, ["/World/A"])
+        self.assertEqual(report["uploaded"], 1)
+        self.assertEqual(report["version"], 2)
+
+        # A material edit republishes the parts bound to it.
+        UsdShade.Material(self._stage.GetPrimAtPath("/World/Looks/Red")).CreateInput("roughness", Sdf.ValueTypeNames.Float).Set(0.5)
+        await self._publish()
+        self.assertEqual(self._exporter.converted, ["/World/B"])
+
+        self._stage.RemovePrim("/World/C")
+        report = await self._publish()
+        self.assertEqual(self._exporter.converted, [])
+        self.assertEqual(report["removed"], 1)
+        manifest = json.loads(self._server.assets["[ov]-layout_assembly"]["data"])
+        self.assertEqual([part["path"] for part in manifest["parts"]], ["/World/A", "/World/B"])
+
+    async def test_failed_part_stays_dirty(self):
+        await self._publish()
+        UsdGeom.XformCommonAPI(self._stage.GetPrimAtPath("/World/A")).SetTranslate(Gf.Vec3d(1, 0, 0))
+        self._exporter.failures.add("/World/A")
+        report = await self._publish()
+        self.assertEqual(report["failed"], 1)
+
+        self._exporter.failures.clear()
+        report = await self._publish()
+        self.assertEqual(self._exporter.converted, ["/World/A"])
+        self.assertEqual(report["uploaded"], 1)
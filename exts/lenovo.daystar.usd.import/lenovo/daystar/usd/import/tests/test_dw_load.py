@@ -0,0 +1,74 @@
+import time
+import tempfile
+import omni.kit.test
+
+from ..dwtool import DWTool
+from .dw_stand_in_server import DWStandInServer
+from .load_driver import run_publishers_async, percentile
+
+
+class TestDWLoad(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._server = DWStandInServer()
+        self._server.start()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        DWTool._instance = None
+        self._tool = DWTool()
+        self._tool.backoff_base = 0.01
+        self.assertTrue(await self._tool.loginToDW(self._server.url, "user", "pwd"))
+
+    async def tearDown(self):
+        self._tool.close()
+        self._server.stop()
+        self._tmp_dir.cleanup()
+        DWTool._instance = None
+
+    async def test_percentile(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual(percentile(values, 0.5), 3)
+        self.assertEqual(percentile(values, 0.99), 5)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    async def test_concurrent_publishers(self):
+        self._tool.set_max_concurrency(3)
+        self._server.latency = 0.01
+        report = await run_publishers_async(
+            self._tool, self._server, self._tmp_dir.name, publishers=6, assets_per_publisher=4, asset_size=64 * 1024
+        )
+
+        self.assertEqual(report["uploads"], 24)
+        self.assertEqual(report["failed"], 0, report["failures"])
+        self.assertGreater(report["uploads_per_second"], 0)
+        self.assertGreaterEqual(report["latency"]["p99"], report["latency"]["p50"])
+        # The publishers share the pool of the DWTool, so its size bounds the connections.
+        self.assertLessEqual(report["max_in_flight"], 3)
+        self.assertLessEqual(report["connections"], 3)
+        self.assertTrue(all(len(asset["data"]) == 64 * 1024 for asset in self._server.assets.values()))
+
+    async def test_latency_and_bandwidth(self):
+        self._server.latency = 0.05
+        self._server.bandwidth = 1024 * 1024
+        report = await run_publishers_async(
+            self._tool, self._server, self._tmp_dir.name, publishers=2, assets_per_publisher=2, asset_size=256 * 1024
+        )
+
+        self.assertEqual(report["failed"], 0, report["failures"])
+        # Both publishers share the 1 MB/s link: 1 MB takes at least a second whatever the concurrency.
+        self.assertGreaterEqual(report["duration"], 1.0)
+        self.assertLessEqual(report["bytes_per_second"], 1024 * 1024 * 1.05)
+        # 256 KB through a 1 MB/s link, plus the latency.
+        self.assertGreaterEqual(report["latency"]["p50"], 0.3)
+
+    async def test_random_errors_are_retried(self):
+        self._server.error_rate = 0.3
+        # Enough retries that no request fails every attempt, whatever the order of the random errors.
+        self._tool.max_retries = 8
+        start = time.perf_counter()
+        report = await run_publishers_async(
+            self._tool, self._server, self._tmp_dir.name, publishers=4, assets_per_publisher=10, asset_size=4 * 1024
+        )
+
+        self.assertGreater(report["errors_injected"], 0)
+        self.assertEqual(report["failed"], 0, report["failures"])
+        self.assertGreater(report["requests"], report["uploads"])
+        self.assertLess(time.perf_counter() - start, 30.0)
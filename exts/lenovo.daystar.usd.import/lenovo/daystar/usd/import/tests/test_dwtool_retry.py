@@ -0,0 +1,97 @@
+import os
+import time
+import asyncio
+import tempfile
+import omni.kit.test
+
+from ..dwtool import DWTool
+from .dw_stand_in_server import DWStandInServer
+
+
+class TestDWToolRetry(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._server = DWStandInServer()
+        self._server.start()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._tmp_dir.name, "asset.glb")
+        with open(self._path, "wb") as f:
+            f.write(os.urandom(1024))
+        DWTool._instance = None
+        self._tool = DWTool()
+        self._tool.backoff_base = 0.01
+        self.assertTrue(await self._tool.loginToDW(self._server.url, "user", "pwd"))
+
+    async def tearDown(self):
+        self._tool.close()
+        self._server.stop()
+        self._tmp_dir.cleanup()
+        DWTool._instance = None
+
+    def _count(self, path):
+        return self._server.requests.count(("POST", "/platform/api/v1/asset/contents" + path))
+
+    async def test_rate_limited_upload_honors_retry_after(self):
+        self._server.inject_fault("/add", 429, count=2, retry_after=0.2)
+        start_time = time.time()
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", self._path))
+
+        self.assertGreaterEqual(time.time() - start_time, 0.4)
+        self.assertEqual(self._count("/add"), 3)
+        self.assertEqual(len(self._server.assets["[ov]-asset"]["data"]), 1024)
+
+    async def test_unavailable_listing_and_login_are_retried(self):
+        self._server.inject_fault("/auth/login", 503, count=2)
+        self._server.inject_fault("/asset/contents/page", 502, count=3)
+        self.assertTrue(await self._tool.loginToDW(self._server.url, "user", "pwd"))
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", self._path))
+
+    async def test_expired_token_is_refreshed(self):
+        self._server.expire_token()
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", self._path))
+
+        self.assertEqual(self._server.logins, 2)
+        self.assertIn("[ov]-asset", self._server.assets)
+
+    async def test_client_errors_are_not_retried(self):
+        self._server.inject_fault("/add", 400, count=5)
+        self.assertFalse(await self._tool.uploadAssetToDW("asset", self._path))
+
+        self.assertEqual(self._count("/add"), 1)
+
+    async def test_retries_give_up_after_max_retries(self):
+        self._tool.max_retries = 2
+        self._server.inject_fault("/add", 503, count=5)
+        self.assertFalse(await self._tool.uploadAssetToDW("asset", self._path))
+
+        self.assertEqual(self._count("/add"), 3)
+
+    async def test_add_is_not_resent_once_handled(self):
+        self._server.inject_fault_after_handling("/add", 502)
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", self._path))
+
+        # The asset was found after the failed add and updated instead of added twice.
+        self.assertEqual((self._count("/add"), self._count("/update")), (1, 1))
+        self.assertEqual(self._server.next_id, 1)
+        self.assertEqual(len(self._server.assets["[ov]-asset"]["data"]), 1024)
+
+    async def test_add_is_resent_when_refused(self):
+        self._server.inject_fault("/add", 503, count=1, retry_after=0)
+        self._server.inject_fault("/add", 500, count=1)
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", self._path))
+
+        self.assertEqual((self._count("/add"), self._count("/update")), (3, 0))
+        self.assertEqual(self._server.next_id, 1)
+
+    async def test_in_flight_requests_are_capped_per_host(self):
+        self._tool.max_requests_per_host = 2
+        self._tool.set_max_concurrency(8)
+        paths = []
+        for i in range(8):
+            path = os.path.join(self._tmp_dir.name, f"asset{i}.glb")
+            with open(path, "wb") as f:
+                f.write(os.urandom(64 * 1024))
+            paths.append(path)
+        results = await asyncio.gather(*[self._tool.uploadAssetToDW(f"asset{i}", p) for i, p in enumerate(paths)])
+
+        self.assertTrue(all(results))
+        self.assertLessEqual(self._server.max_in_flight, 2)
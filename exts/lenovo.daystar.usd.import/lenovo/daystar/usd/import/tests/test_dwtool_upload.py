@@ -0,0 +1,144 @@
+import os
+import asyncio
+import tempfile
+import omni.kit.test
+
+from ..dwtool import DWTool
+from .dw_stand_in_server import DWStandInServer
+
+
+class TestDWToolUpload(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._server = DWStandInServer()
+        self._server.start()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        DWTool._instance = None
+        self._tool = DWTool()
+        self._tool.chunk_size = 64 * 1024
+        self.assertTrue(await self._tool.loginToDW(self._server.url, "user", "pwd"))
+
+    async def tearDown(self):
+        self._tool.close()
+        self._server.stop()
+        self._tmp_dir.cleanup()
+        DWTool._instance = None
+
+    def _make_file(self, size):
+        path = os.path.join(self._tmp_dir.name, "asset.glb")
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        return path
+
+    async def test_small_file_is_streamed_in_one_request(self):
+        path = self._make_file(10 * 1024)
+        progress = []
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", path, lambda sent, total: progress.append((sent, total))))
+
+        with open(path, "rb") as f:
+            self.assertEqual(self._server.assets["[ov]-asset"]["data"], f.read())
+        self.assertEqual(progress[-1], (10 * 1024, 10 * 1024))
+        self.assertNotIn(("POST", "/platform/api/v1/asset/contents/chunk"), self._server.requests)
+
+    async def test_large_file_resumes_after_dropped_chunk(self):
+        path = self._make_file(300 * 1024)
+        self._server.drop_chunks = 1
+        progress = []
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", path, lambda sent, total: progress.append(sent)))
+
+        with open(path, "rb") as f:
+            self.assertEqual(self._server.assets["[ov]-asset"]["data"], f.read())
+        self.assertEqual(progress[-1], 300 * 1024)
+        chunk_posts = [r for r in self._server.requests if r == ("POST", "/platform/api/v1/asset/contents/chunk")]
+        # 5 chunks of 64KB and one resent after the dropped connection.
+        self.assertEqual(len(chunk_posts), 6)
+
+    async def test_unparsable_offset(self):
+        path = self._make_file(300 * 1024)
+        self._server.inject_fault("/asset/contents/chunk", 200, html=True)
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", path))
+
+        # The offset is unknown, the file goes in a single request.
+        with open(path, "rb") as f:
+            self.assertEqual(self._server.assets["[ov]-asset"]["data"], f.read())
+        self.assertNotIn(("POST", "/platform/api/v1/asset/contents/chunk"), self._server.requests)
+
+    async def test_resume_keeps_offset_when_unknown(self):
+        path = self._make_file(300 * 1024)
+        self._server.drop_chunks = 1
+
+        def progress_fn(sent, total):
+            # Injected once the first chunk is on its way, so the offset asked for after the drop is an HTML page.
+            if not self._server._faults and self._server.drop_chunks:
+                self._server.inject_fault("/asset/contents/chunk", 200, html=True)
+
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", path, progress_fn))
+
+        with open(path, "rb") as f:
+            self.assertEqual(self._server.assets["[ov]-asset"]["data"], f.read())
+        chunk_gets = [r for r in self._server.requests if r == ("GET", "/platform/api/v1/asset/contents/chunk")]
+        self.assertEqual(len(chunk_gets), 2)
+
+    async def test_upload_without_progress_stops(self):
+        path = self._make_file(300 * 1024)
+        self._server.stall_chunks = 100
+        with self.assertRaises(IOError):
+            await self._tool.uploadAssetToDW("asset", path)
+        chunk_posts = [r for r in self._server.requests if r == ("POST", "/platform/api/v1/asset/contents/chunk")]
+        self.assertEqual(len(chunk_posts), 1)
+
+    async def test_update_existing_asset_without_chunk_endpoint(self):
+        asset_id = self._server.add_asset("[ov]-asset", b"old")
+        self._server.chunk_upload = False
+        path = self._make_file(200 * 1024)
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", path))
+
+        self.assertEqual(self._server.assets["[ov]-asset"]["id"], asset_id)
+        self.assertEqual(len(self._server.assets["[ov]-asset"]["data"]), 200 * 1024)
+        self.assertEqual(await self._tool.getAssetByName("[ov]-asset"), asset_id)
+
+    async def test_requests_share_pooled_connections(self):
+        for i in range(20):
+            self._server.add_asset(f"[ov]-asset{i}")
+        self._tool.asset_index.page_size = 5
+        ids = await asyncio.gather(*[self._tool.getAssetByName(f"[ov]-asset{i}") for i in range(20)])
+
+        self.assertTrue(all(ids))
+        self.assertLessEqual(self._server.connections, self._tool.max_concurrency)
+
+    async def test_republish_only_sends_changed_chunks(self):
+        path = self._make_file(4 * 1024 * 1024)
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", path))
+        asset_id = self._server.assets["[ov]-asset"]["id"]
+
+        # Bytes inserted in the middle only change the chunk around them.
+        with open(path, "rb") as f:
+            data = f.read()
+        data = data[: 2 * 1024 * 1024] + os.urandom(100) + data[2 * 1024 * 1024 :]
+        with open(path, "wb") as f:
+            f.write(data)
+        received = self._server.bytes_received
+        progress = []
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", path, lambda sent, total: progress.append((sent, total))))
+
+        self.assertEqual(self._server.assets["[ov]-asset"], {"id": asset_id, "data": data})
+        self.assertLess(self._server.bytes_received - received, len(data) // 4)
+        self.assertEqual(progress[-1], (len(data), len(data)))
+
+    async def test_delta_upload_falls_back_without_chunk_store(self):
+        self._server.delta_upload = False
+        path = self._make_file(2 * 1024 * 1024)
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", path))
+
+        with open(path, "rb") as f:
+            self.assertEqual(self._server.assets["[ov]-asset"]["data"], f.read())
+        self.assertEqual(self._server.blobs, {})
+        self.assertIn(("POST", "/platform/api/v1/asset/contents/chunk"), self._server.requests)
+
+    async def test_delta_upload_falls_back_on_unreadable_answer(self):
+        self._server.inject_fault("/asset/contents/blobs/missing", 200, html=True)
+        path = self._make_file(2 * 1024 * 1024)
+        self.assertTrue(await self._tool.uploadAssetToDW("asset", path))
+
+        with open(path, "rb") as f:
+            self.assertEqual(self._server.assets["[ov]-asset"]["data"], f.read())
+        self.assertEqual(self._server.blobs, {})
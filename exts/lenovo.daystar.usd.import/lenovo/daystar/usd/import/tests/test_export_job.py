@@ -0,0 +1,37 @@
+import os
+import tempfile
+import omni.kit.test
+
+from ..export_job import StagingWorkspace, CleanupPolicy
+
+
+class TestExportJob(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+
+    async def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    async def test_jobs_get_unique_output_paths(self):
+        workspace = StagingWorkspace(self._tmp_dir.name)
+        jobs = [workspace.create_job("scene") for _ in range(10)]
+
+        self.assertEqual(len(set(job.output_path for job in jobs)), 10)
+        self.assertTrue(all(job.output_path.endswith("/scene.glb") for job in jobs))
+        self.assertEqual(len(workspace.active_jobs()), 10)
+
+    async def test_cleanup_policies(self):
+        for policy, removed_on_success, removed_on_failure in (
+            (CleanupPolicy.ALWAYS, True, True),
+            (CleanupPolicy.ON_SUCCESS, True, False),
+            (CleanupPolicy.NEVER, False, False),
+        ):
+            workspace = StagingWorkspace(os.path.join(self._tmp_dir.name, policy), policy)
+            succeeded = workspace.create_job("a")
+            failed = workspace.create_job("b")
+            workspace.finish_job(succeeded, True)
+            workspace.finish_job(failed, False)
+
+            self.assertEqual(not os.path.exists(succeeded.job_folder), removed_on_success)
+            self.assertEqual(not os.path.exists(failed.job_folder), removed_on_failure)
+            self.assertEqual(workspace.active_jobs(), [])
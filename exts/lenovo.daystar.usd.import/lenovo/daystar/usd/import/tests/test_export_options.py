@@ -0,0 +1,36 @@
+import carb
+import omni.kit.test
+from omni.kit.asset_converter import AssetConverterContext
+
+from ..exporter import EXPORT_OPTION_SETTINGS, export_option
+
+
+class TestExportOptions(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._settings = carb.settings.get_settings()
+        self._saved = {name: self._settings.get_as_bool(key) for name, key in EXPORT_OPTION_SETTINGS.items()}
+
+    async def tearDown(self):
+        for name, value in self._saved.items():
+            self._settings.set_bool(EXPORT_OPTION_SETTINGS[name], value)
+
+    async def test_context_overrides_setting(self):
+        for name, key in EXPORT_OPTION_SETTINGS.items():
+            self._settings.set_bool(key, True)
+            disabled = AssetConverterContext()
+            setattr(disabled, name, False)
+            # An export started with the option off keeps it off whatever the setting says later.
+            self.assertFalse(export_option(disabled, name), name)
+            self._settings.set_bool(key, False)
+            enabled = AssetConverterContext()
+            setattr(enabled, name, True)
+            self.assertTrue(export_option(enabled, name), name)
+            self.assertFalse(export_option(disabled, name), name)
+
+    async def test_setting_is_the_default(self):
+        for name, key in EXPORT_OPTION_SETTINGS.items():
+            self._settings.set_bool(key, True)
+            self.assertTrue(export_option(AssetConverterContext(), name), name)
+            self.assertTrue(export_option(None, name), name)
+            self._settings.set_bool(key, False)
+            self.assertFalse(export_option(AssetConverterContext(), name), name)
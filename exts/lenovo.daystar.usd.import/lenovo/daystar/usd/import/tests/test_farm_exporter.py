@@ -0,0 +1,146 @@
+import os
+import json
+import asyncio
+import tempfile
+import omni.kit.test
+from pxr import Gf, Sdf, Usd, UsdGeom
+
+from ..dwtool import DWTool
+from ..farm_exporter import FarmExporter, FarmQueueClient, FarmTaskStatus
+from ..shard_exporter import ShardExporter, ShardMode
+from ..export_job import StagingWorkspace, CleanupPolicy
+from ..progress_tracker import ProgressTracker, JobStatus
+from .dw_stand_in_server import DWStandInServer
+from .farm_stand_in import FarmStandIn
+
+
+def _flatten(task_args):
+    """Stands in for the convert-asset job of a farm node, "converts" by flattening the stage."""
+    stage = Usd.Stage.Open(task_args["import_path"])
+    os.makedirs(os.path.dirname(task_args["output_path"]), exist_ok=True)
+    with open(task_args["output_path"], "w") as f:
+        f.write(stage.Flatten().ExportToString())
+
+
+def _cubes(data):
+    layer = Sdf.Layer.CreateAnonymous(".usda")
+    layer.ImportFromString(data.decode("utf-8"))
+    stage = Usd.Stage.Open(layer)
+    return sorted(prim.GetName() for prim in stage.Traverse() if prim.IsA(UsdGeom.Cube))
+
+
+class TestFarmExporter(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._server = DWStandInServer()
+        self._server.start()
+        self._farm = FarmStandIn(_flatten, nodes=3)
+        self._farm.start()
+        DWTool._instance = None
+        self._tool = DWTool()
+        self.assertTrue(await self._tool.loginToDW(self._server.url, "user", "pwd"))
+        self._workspace = StagingWorkspace(os.path.join(self._tmp_dir.name, "staging"), CleanupPolicy.ON_SUCCESS)
+        self._progress = ProgressTracker()
+
+    async def tearDown(self):
+        self._tool.close()
+        self._farm.stop()
+        self._server.stop()
+        self._tmp_dir.cleanup()
+        DWTool._instance = None
+
+    def _farm_exporter(self):
+        shard_exporter = ShardExporter(None, self._tool, self._workspace, ShardMode.GRID, grid_size=2)
+        return FarmExporter(
+            FarmQueueClient(self._farm.url), self._tool, self._workspace, os.path.join(self._tmp_dir.name, "farm"),
+            shard_exporter, self._progress, poll_interval=0.02, timeout=30.0,
+        )
+
+    async def test_sharded_stage(self):
+        # 4 x 4 machines, each shard of a 2 x 2 grid gets 4 of them.
+        path = os.path.join(self._tmp_dir.name, "factory.usda")
+        stage = Usd.Stage.CreateNew(path)
+        stage.SetDefaultPrim(UsdGeom.Xform.Define(stage, "/World").GetPrim())
+        for x in range(4):
+            for z in range(4):
+                machine = UsdGeom.Cube.Define(stage, f"/World/Machine_{x}_{z}")
+                UsdGeom.XformCommonAPI(machine).SetTranslate(Gf.Vec3d(x * 10 + 1, 0, z * 10 + 1))
+        stage.Save()
+
+        report = await self._farm_exporter().export_stage_async(stage, "factory", None)
+
+        self.assertEqual((report["tasks"], report["finished"], report["uploaded"]), (4, 4, 4))
+        self.assertTrue(report["index_uploaded"])
+        # The tasks were spread over the farm nodes.
+        self.assertGreater(len({task["node"] for task in self._farm.tasks.values()}), 1)
+        index = json.loads(self._server.assets["[ov]-factory_shards"]["data"])
+        machines = []
+        for shard in index["shards"]:
+            cubes = _cubes(self._server.assets[f"[ov]-{shard['asset']}"]["data"])
+            # Every node only converted the prims of its shard.
+            self.assertEqual(cubes, sorted(os.path.basename(prim) for prim in shard["prims"]))
+            machines += cubes
+        self.assertEqual(len(set(machines)), 16)
+        self.assertEqual([job.status for job in self._progress.jobs], [JobStatus.SUCCEEDED] * 4)
+        self.assertEqual(self._workspace.active_jobs(), [])
+
+    async def test_sharded_stage_with_failed_task(self):
+        path = os.path.join(self._tmp_dir.name, "factory.usda")
+        stage = Usd.Stage.CreateNew(path)
+        stage.SetDefaultPrim(UsdGeom.Xform.Define(stage, "/World").GetPrim())
+        for x in range(4):
+            machine = UsdGeom.Cube.Define(stage, f"/World/Machine_{x}")
+            UsdGeom.XformCommonAPI(machine).SetTranslate(Gf.Vec3d(x * 10 + 1, 0, 1))
+        stage.Save()
+        self._farm.fail_imports = ("factory_shard_0.usda",)
+
+        report = await self._farm_exporter().export_stage_async(stage, "factory", None)
+
+        self.assertEqual((report["tasks"], report["finished"], report["uploaded"]), (2, 1, 0))
+        self.assertIsNone(report["index_uploaded"])
+        # The shard that converted isn't published without the others.
+        self.assertEqual(self._server.assets, {})
+        self.assertEqual([job.status for job in self._progress.jobs], [JobStatus.FAILED] * 2)
+
+    async def test_folder_with_failed_task(self):
+        source_dir = os.path.join(self._tmp_dir.name, "library")
+        os.makedirs(os.path.join(source_dir, "sub"))
+        for name in ("a.usda", "sub/b.usda"):
+            stage = Usd.Stage.CreateNew(os.path.join(source_dir, name))
+            UsdGeom.Cube.Define(stage, "/Cube")
+            stage.Save()
+        with open(os.path.join(source_dir, "readme.txt"), "w") as f:
+            f.write("not a stage")
+        self._farm.fail_imports = ("b.usda",)
+
+        report = await self._farm_exporter().export_folder_async(source_dir, None)
+
+        statuses = {job["target_name"]: job["status"] for job in report["jobs"]}
+        self.assertEqual(statuses, {"a": FarmTaskStatus.FINISHED, "sub_b": FarmTaskStatus.FAILED})
+        self.assertEqual((report["uploaded"], report["failed"]), (1, 1))
+        self.assertEqual(sorted(self._server.assets), ["[ov]-a"])
+        # The staging folder of the failed task is kept to look into it.
+        self.assertEqual(len(os.listdir(self._workspace.root)), 1)
+
+    async def test_cancel(self):
+        source_dir = os.path.join(self._tmp_dir.name, "library")
+        os.makedirs(source_dir)
+        for name in ("a.usda", "b.usda"):
+            Usd.Stage.CreateNew(os.path.join(source_dir, name)).Save()
+        self._farm.task_duration = 5.0
+        farm_exporter = self._farm_exporter()
+
+        async def cancel_once_running():
+            while not any(task["status"] == FarmTaskStatus.RUNNING for task in self._farm.tasks.values()):
+                await asyncio.sleep(0.01)
+            farm_exporter.cancel()
+
+        cancel = asyncio.ensure_future(cancel_once_running())
+        report = await farm_exporter.export_folder_async(source_dir, None)
+        await cancel
+
+        self.assertEqual([job["status"] for job in report["jobs"]], [FarmTaskStatus.CANCELLED] * 2)
+        self.assertEqual(report["uploaded"], 0)
+        self.assertEqual(self._server.assets, {})
+        self.assertEqual([job.status for job in self._progress.jobs], [JobStatus.CANCELLED] * 2)
+        self.assertLess(report["duration"], 5.0)
@@ -0,0 +1,129 @@
+import numpy as np
+import omni.kit.test
+
+from ..glb_optimizer import GlbOptimizer, read_glb, write_glb, FLOAT, UNSIGNED_SHORT
+
+
+def _make_grid_glb(size=20):
+    """A size x size grid of quads written as unindexed triangles, plus an unused accessor."""
+    positions, normals, uvs = [], [], []
+    for x in range(size):
+        for y in range(size):
+            corners = [(x, y), (x + 1, y), (x + 1, y + 1), (x, y), (x + 1, y + 1), (x, y + 1)]
+            for cx, cy in corners:
+                positions.append((cx * 0.5, cy * 0.5, 0.0))
+                normals.append((0.0, 0.0, 1.0))
+                uvs.append((cx / size, cy / size))
+    arrays = [np.array(a, dtype=np.float32) for a in (positions, normals, uvs)]
+    arrays.append(np.zeros((100, 4), dtype=np.float32))
+    binary = b""
+    views, accessors = [], []
+    for array in arrays:
+        views.append({"buffer": 0, "byteOffset": len(binary), "byteLength": array.nbytes, "target": 34962})
+        accessors.append({
+            "bufferView": len(views) - 1, "componentType": FLOAT, "count": len(array),
+            "type": {2: "VEC2", 3: "VEC3", 4: "VEC4"}[array.shape[1]],
+        })
+        binary += array.tobytes()
+    accessors[0]["min"] = [float(v) for v in arrays[0].min(axis=0)]
+    accessors[0]["max"] = [float(v) for v in arrays[0].max(axis=0)]
+    gltf = {
+        "asset": {"version": "2.0"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"name": "grid", "mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0, "NORMAL": 1, "TEXCOORD_0": 2}}]}],
+        "accessors": accessors,
+        "bufferViews": views,
+        "buffers": [{"byteLength": len(binary)}],
+    }
+    return write_glb(gltf, binary), arrays[0]
+
+
+def _read(gltf, binary, accessor_index):
+    accessor = gltf["accessors"][accessor_index]
+    view = gltf["bufferViews"][accessor["bufferView"]]
+    dtype = {5120: np.int8, 5121: np.uint8, 5122: np.int16, 5123: np.uint16, 5125: np.uint32, 5126: np.float32}[
+        accessor["componentType"]
+    ]
+    components = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4}[accessor["type"]]
+    stride = view.get("byteStride", np.dtype(dtype).itemsize * components)
+    return np.ndarray(
+        (accessor["count"], components), dtype, binary, view.get("byteOffset", 0), (stride, np.dtype(dtype).itemsize)
+    )
+
+
+class TestGlbOptimizer(omni.kit.test.AsyncTestCase):
+    async def test_dedup_reorder_and_quantize(self):
+        data, original_positions = _make_grid_glb()
+        optimized, stats = GlbOptimizer().optimize(data)
+        gltf, binary = read_glb(optimized)
+
+        self.assertIsNone(stats["skipped"])
+        self.assertEqual(stats["vertices_before"], 20 * 20 * 6)
+        self.assertEqual(stats["vertices_after"], 21 * 21)
+        self.assertEqual(stats["accessors_after"], 4)
+        self.assertLess(stats["size_after"], stats["size_before"] / 3)
+        self.assertIn("KHR_mesh_quantization", gltf["extensionsRequired"])
+
+        primitive = gltf["meshes"][0]["primitives"][0]
+        position_accessor = gltf["accessors"][primitive["attributes"]["POSITION"]]
+        self.assertEqual(position_accessor["componentType"], UNSIGNED_SHORT)
+        # The mesh moved to a child node carrying the dequantization transform.
+        node = gltf["nodes"][0]
+        self.assertNotIn("mesh", node)
+        child = gltf["nodes"][node["children"][0]]
+        self.assertEqual(child["mesh"], 0)
+
+        indices = _read(gltf, binary, primitive["indices"]).ravel()
+        positions = _read(gltf, binary, primitive["attributes"]["POSITION"]).astype(np.float64)
+        positions = positions * child["scale"][0] + child["translation"]
+        triangles = np.sort(np.round(positions[indices].reshape(-1, 9), 3), axis=0)
+        expected = np.sort(np.round(original_positions.astype(np.float64).reshape(-1, 9), 3), axis=0)
+        np.testing.assert_allclose(triangles, expected, atol=1e-3)
+        # Vertices are numbered in first-use order.
+        _, first_use = np.unique(indices, return_index=True)
+        self.assertTrue(np.all(np.diff(first_use) > 0))
+
+    async def test_without_quantization_keeps_float_attributes(self):
+        data, _ = _make_grid_glb(4)
+        optimized, stats = GlbOptimizer(quantize=False).optimize(data)
+        gltf, _ = read_glb(optimized)
+
+        self.assertNotIn("extensionsUsed", gltf)
+        self.assertEqual(stats["vertices_after"], 25)
+        self.assertTrue(all(a["componentType"] in (FLOAT, UNSIGNED_SHORT) for a in gltf["accessors"]))
+        self.assertEqual(gltf["nodes"][0]["mesh"], 0)
+
+    async def test_instancing_accessors_are_remapped(self):
+        data, _ = _make_grid_glb(4)
+        gltf, binary = read_glb(data)
+        translations = np.array([(0, 0, 0), (5, 0, 0), (0, 5, 0)], dtype=np.float32)
+        gltf["bufferViews"].append({"buffer": 0, "byteOffset": len(binary), "byteLength": translations.nbytes})
+        gltf["accessors"].append(
+            {"bufferView": len(gltf["bufferViews"]) - 1, "componentType": FLOAT, "count": 3, "type": "VEC3"}
+        )
+        binary += translations.tobytes()
+        gltf["buffers"][0]["byteLength"] = len(binary)
+        gltf["nodes"][0]["extensions"] = {
+            "EXT_mesh_gpu_instancing": {"attributes": {"TRANSLATION": len(gltf["accessors"]) - 1}}
+        }
+        gltf["extensionsUsed"] = ["EXT_mesh_gpu_instancing"]
+
+        optimized, stats = GlbOptimizer().optimize(write_glb(gltf, binary))
+        gltf, binary = read_glb(optimized)
+
+        self.assertIsNone(stats["skipped"])
+        # The unused accessor before it was dropped, the reference follows the renumbering.
+        instancing = gltf["nodes"][0]["extensions"]["EXT_mesh_gpu_instancing"]
+        np.testing.assert_array_equal(_read(gltf, binary, instancing["attributes"]["TRANSLATION"]), translations)
+
+    async def test_unknown_extension_is_skipped(self):
+        data, _ = _make_grid_glb(4)
+        gltf, binary = read_glb(data)
+        gltf["extensionsUsed"] = ["EXT_accessor_user"]
+        data = write_glb(gltf, binary)
+
+        optimized, stats = GlbOptimizer().optimize(data)
+        self.assertEqual(stats["skipped"], "uses EXT_accessor_user")
+        self.assertEqual(optimized, data)
@@ -0,0 +1,84 @@
+import os
+import json
+import tempfile
+import omni.kit.test
+
+from ..dwtool import DWTool
+from ..headless import HeadlessRunner, make_converter_context, load_manifest, DOMAIN_ENV, USER_ENV, PASSWORD_ENV
+from ..export_job import StagingWorkspace, CleanupPolicy
+from .dw_stand_in_server import DWStandInServer
+from .test_batch_exporter import _CopyExporter
+
+
+class TestHeadless(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._server = DWStandInServer()
+        self._server.start()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._source_dir = os.path.join(self._tmp_dir.name, "library")
+        os.makedirs(os.path.join(self._source_dir, "props"))
+        for path in ("factory.usd", "robot.usda", "props/crate.usd"):
+            with open(os.path.join(self._source_dir, path), "w") as f:
+                f.write(path)
+        self._environ = dict(os.environ)
+        os.environ.update({DOMAIN_ENV: self._server.url, USER_ENV: "user", PASSWORD_ENV: "pwd"})
+        DWTool._instance = None
+        self._tool = DWTool()
+        self._workspace = StagingWorkspace(os.path.join(self._tmp_dir.name, "staging"), CleanupPolicy.ON_SUCCESS)
+
+    async def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self._environ)
+        self._tool.close()
+        self._server.stop()
+        self._tmp_dir.cleanup()
+        DWTool._instance = None
+
+    def _write_manifest(self, manifest):
+        path = os.path.join(self._tmp_dir.name, "jobs.json")
+        with open(path, "w") as f:
+            json.dump(manifest, f)
+        return path
+
+    async def test_converter_context(self):
+        context = make_converter_context({"embed_textures": True})
+        self.assertTrue(context.embed_textures)
+        self.assertTrue(context.ignore_light)
+        self.assertFalse(context.ignore_materials)
+        with self.assertRaises(ValueError):
+            make_converter_context({"embed_texture": True})
+
+    async def test_invalid_manifests(self):
+        for manifest in ({}, {"inputs": []}, {"inputs": [{"name": "a"}]}, {"inputs": ["a.usd"], "converter": {"x": 1}}):
+            with self.assertRaises(ValueError):
+                load_manifest(self._write_manifest(manifest))
+
+    async def test_runs_manifest(self):
+        report_path = os.path.join(self._tmp_dir.name, "reports", "jobs_report.json")
+        manifest_path = self._write_manifest({
+            "inputs": [
+                os.path.join(self._source_dir, "factory.usd"),
+                {"path": os.path.join(self._source_dir, "robot.usda"), "name": "robot_v2"},
+                {"folder": os.path.join(self._source_dir, "props")},
+            ],
+            "converter": {"ignore_light": False},
+            "max_workers": 2,
+            "report": report_path,
+        })
+        exporter = _CopyExporter()
+        report = await HeadlessRunner(exporter, self._tool, self._workspace).run_async(manifest_path)
+
+        self.assertEqual(report["total"], 3)
+        self.assertEqual(report["succeeded"], 3)
+        self.assertEqual(sorted(job["target_name"] for job in report["jobs"]), ["crate", "factory", "robot_v2"])
+        self.assertEqual(self._server.assets["[ov]-robot_v2"]["data"], b"robot.usda")
+        self.assertEqual(self._server.assets["[ov]-crate"]["data"], b"props/crate.usd")
+        with open(report_path, "r") as f:
+            self.assertEqual(json.load(f)["succeeded"], 3)
+
+    async def test_credentials_from_environment(self):
+        del os.environ[PASSWORD_ENV]
+        manifest_path = self._write_manifest({"inputs": [os.path.join(self._source_dir, "factory.usd")]})
+        with self.assertRaises(RuntimeError):
+            await HeadlessRunner(_CopyExporter(), self._tool, self._workspace).run_async(manifest_path)
+        self.assertEqual(self._server.assets, {})
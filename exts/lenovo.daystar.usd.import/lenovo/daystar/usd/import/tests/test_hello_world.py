@@ -1,13 +1,15 @@
 # NOTE:
 #   omni.kit.test - std python's unittest module with additional wrapping to add suport for async/await tests
 #   For most things refer to unittest docs: https://docs.python.org/3/library/unittest.html
+import importlib
 import omni.kit.test
 
 # Extnsion for writing UI tests (simulate UI interaction)
 import omni.kit.ui_test as ui_test
 
-# Import extension python module we are testing with absolute import path, as if we are external user (other extension)
-import lenovo.dw.usdexporter as exporter
+# Import extension python module we are testing with absolute import path, as if we are external user (other extension).
+# "import" is a python keyword, so the module can only be imported by name.
+extension = importlib.import_module("lenovo.daystar.usd.import")
 
 
 # Having a test class dervived from omni.kit.test.AsyncTestCase declared on the root of module will make it auto-discoverable by omni.kit.test
@@ -21,5 +23,5 @@ class Test(omni.kit.test.AsyncTestCase):
         pass
 
     # Actual test, notice it is "async" function, so "await" can be used if needed
-    async def test_hello_public_function(self):
-        self.assertEqual(256, 256)
+    async def test_extension_started(self):
+        self.assertIsInstance(extension.get_instance(), extension.AssetImporterExtension)
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import numpy as np
+import omni.kit.test
+
+from ..glb_optimizer import read_glb, write_glb, read_accessor, FLOAT, UNSIGNED_SHORT
+from ..lod_generator import LodGenerator, LodMode, simplify, find_lod_assets
+
+
+def _make_terrain(size=30):
+    """An indexed size x size height field, with positions and texture coordinates."""
+    x, y = np.meshgrid(np.arange(size + 1), np.arange(size + 1), indexing="ij")
+    z = np.sin(x * 0.3) * np.cos(y * 0.2) * 2.0
+    positions = np.stack([x, y, z], axis=-1).reshape(-1, 3).astype(np.float32)
+    uvs = np.stack([x, y], axis=-1).reshape(-1, 2).astype(np.float32) / size
+    quads = (x[:-1, :-1] * (size + 1) + y[:-1, :-1]).ravel()
+    triangles = np.concatenate([
+        np.stack([quads, quads + size + 1, quads + size + 2], axis=1),
+        np.stack([quads, quads + size + 2, quads + 1], axis=1),
+    ])
+    return positions, uvs, triangles
+
+
+def _make_terrain_glb(size=30):
+    positions, uvs, triangles = _make_terrain(size)
+    indices = triangles.astype(np.uint16).ravel()
+    binary = b""
+    views, accessors = [], []
+    for array, accessor_type, target in ((positions, "VEC3", 34962), (uvs, "VEC2", 34962), (indices, "SCALAR", 34963)):
+        views.append({"buffer": 0, "byteOffset": len(binary), "byteLength": array.nbytes, "target": target})
+        accessors.append({
+            "bufferView": len(views) - 1, "componentType": FLOAT if array.dtype == np.float32 else UNSIGNED_SHORT,
+            "count": len(array), "type": accessor_type,
+        })
+        binary += array.tobytes()
+    gltf = {
+        "asset": {"version": "2.0"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"name": "terrain", "mesh": 0}],
+        "meshes": [{"name": "terrain", "primitives": [{"attributes": {"POSITION": 0, "TEXCOORD_0": 1}, "indices": 2}]}],
+        "accessors": accessors,
+        "bufferViews": views,
+        "buffers": [{"byteLength": len(binary)}],
+    }
+    return write_glb(gltf, binary), len(triangles)
+
+
+class TestLodGenerator(omni.kit.test.AsyncTestCase):
+    async def test_simplify(self):
+        positions, _, triangles = _make_terrain()
+        simplified = simplify(positions, triangles, len(triangles) // 2)
+        self.assertLessEqual(len(simplified), len(triangles) // 2 * 1.01 + 2)
+        self.assertGreater(len(simplified), len(triangles) // 4)
+        # Border vertices are locked, so the outline of the terrain is unchanged.
+        border = np.flatnonzero(
+            (positions[:, 0] == 0) | (positions[:, 0] == 30) | (positions[:, 1] == 0) | (positions[:, 1] == 30)
+        )
+        self.assertTrue(np.isin(border, simplified).all())
+        corners = positions[simplified].astype(np.float64)
+        normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        self.assertTrue((normals[:, 2] > 0).all())
+
+    async def test_msft_lod(self):
+        data, triangle_count = _make_terrain_glb()
+        generated, level_files, stats = LodGenerator([1.0, 0.5, 0.2, 0.05]).generate(data)
+        gltf, binary = read_glb(generated)
+
+        self.assertEqual(level_files, [])
+        self.assertIsNone(stats["skipped"])
+        self.assertEqual(stats["triangles"], triangle_count)
+        self.assertEqual([level["ratio"] for level in stats["levels"]], [0.5, 0.2, 0.05])
+        counts = [level["triangles"] for level in stats["levels"]]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertLess(counts[-1], triangle_count * 0.2)
+
+        self.assertIn("MSFT_lod", gltf["extensionsUsed"])
+        node = gltf["nodes"][0]
+        ids = node["extensions"]["MSFT_lod"]["ids"]
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(node["extras"]["MSFT_screencoverage"], [0.5, 0.25, 0.125, 0.0])
+        for level, node_index in enumerate(ids):
+            primitive = gltf["meshes"][gltf["nodes"][node_index]["mesh"]]["primitives"][0]
+            # The levels share the vertex buffers of the full mesh.
+            self.assertEqual(primitive["attributes"], {"POSITION": 0, "TEXCOORD_0": 1})
+            self.assertEqual(len(read_accessor(gltf, binary, primitive["indices"])), counts[level] * 3)
+
+    async def test_assets_mode(self):
+        data, triangle_count = _make_terrain_glb()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "terrain.glb")
+            with open(path, "wb") as f:
+                f.write(data)
+            stats = LodGenerator([0.5, 0.2], LodMode.ASSETS).generate_file(path)
+
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), data)
+            assets = find_lod_assets(path)
+            self.assertEqual([level for level, _ in assets], [1, 2])
+            self.assertEqual(os.path.basename(assets[0][1]), "terrain_lod1.glb")
+            for (level, asset_path), level_stats in zip(assets, stats["levels"]):
+                with open(asset_path, "rb") as f:
+                    gltf, binary = read_glb(f.read())
+                self.assertNotIn("MSFT_lod", gltf.get("extensionsUsed", []))
+                primitive = gltf["meshes"][0]["primitives"][0]
+                self.assertEqual(len(read_accessor(gltf, binary, primitive["indices"])), level_stats["triangles"] * 3)
+                # Only the vertices the level uses are kept.
+                self.assertLess(gltf["accessors"][primitive["attributes"]["POSITION"]]["count"], 31 * 31)
+
+    async def test_small_primitives_are_kept(self):
+        data, _ = _make_terrain_glb(size=4)
+        generated, _, stats = LodGenerator([0.5], min_triangles=64).generate(data)
+        gltf, _ = read_glb(generated)
+        self.assertEqual(stats["levels"][0]["triangles"], 32)
+        self.assertNotIn("extensions", gltf["nodes"][0])
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import threading
+import omni.kit.test
+from pxr import Sdf, Usd, UsdShade
+
+from ..material_baker import MaterialBaker, MaterialBakeCache
+
+
+class FakeDistiller:
+    """Replaces the MDL shader of a material by a UsdPreviewSurface with a baked texture, like MdlDistillAndBake."""
+
+    def __init__(self):
+        self.baked = []
+        self.threads = set()
+
+    def __call__(self, material_prim):
+        self.baked.append(material_prim.GetPath())
+        self.threads.add(threading.current_thread())
+        stage = material_prim.GetStage()
+        material = UsdShade.Material(material_prim)
+        tint = UsdShade.Shader(material_prim.GetChild("Shader")).GetInput("tint").Get()
+        folder = os.path.dirname(stage.GetRootLayer().realPath)
+        texture_name = f"baked_{material_prim.GetName()}.png"
+        with open(os.path.join(folder, texture_name), "wb") as f:
+            f.write(repr(tint).encode("utf-8"))
+
+        stage.RemovePrim(material_prim.GetPath().AppendChild("Shader"))
+        texture = UsdShade.Shader.Define(stage, material_prim.GetPath().AppendChild("BakedTexture"))
+        texture.CreateIdAttr("UsdUVTexture")
+        texture.CreateInput("file", Sdf.ValueTypeNames.Asset).Set("./" + texture_name)
+        texture.CreateOutput("rgb", Sdf.ValueTypeNames.Float3)
+        surface = UsdShade.Shader.Define(stage, material_prim.GetPath().AppendChild("PreviewSurface"))
+        surface.CreateIdAttr("UsdPreviewSurface")
+        surface.CreateInput("diffuseColor", Sdf.ValueTypeNames.Color3f).ConnectToSource(texture.ConnectableAPI(), "rgb")
+        material.CreateSurfaceOutput().ConnectToSource(surface.ConnectableAPI(), "surface")
+
+
+class TestMaterialBaker(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._folder = tempfile.mkdtemp()
+        self._cache = MaterialBakeCache(os.path.join(self._folder, "cache"), 1024 * 1024)
+
+    async def tearDown(self):
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def _make_stage(self, name):
+        stage_folder = os.path.join(self._folder, name)
+        os.makedirs(stage_folder)
+        with open(os.path.join(stage_folder, "OmniPBR.mdl"), "w") as f:
+            f.write("mdl 1.6;")
+        stage = Usd.Stage.CreateNew(os.path.join(stage_folder, "scene.usda"))
+        for material_name, tint in (("Red", (1, 0, 0)), ("RedCopy", (1, 0, 0)), ("Blue", (0, 0, 1))):
+            material = UsdShade.Material.Define(stage, f"/World/Looks/{material_name}")
+            shader = UsdShade.Shader.Define(stage, f"/World/Looks/{material_name}/Shader")
+            shader.SetSourceAsset("./OmniPBR.mdl", "mdl")
+            shader.CreateInput("tint", Sdf.ValueTypeNames.Color3f).Set(tint)
+            material.CreateSurfaceOutput("mdl").ConnectToSource(shader.ConnectableAPI(), "out")
+        stage.Save()
+        return stage
+
+    def _check_baked(self, stage, material_name):
+        material = UsdShade.Material(stage.GetPrimAtPath(f"/World/Looks/{material_name}"))
+        source, _, _ = material.GetSurfaceOutput().GetConnectedSource()
+        self.assertEqual(source.GetPath().name, "PreviewSurface")
+        texture = UsdShade.Shader(stage.GetPrimAtPath(f"/World/Looks/{material_name}/BakedTexture"))
+        self.assertTrue(os.path.isfile(texture.GetInput("file").Get().resolvedPath))
+
+    async def test_bake_dedup_and_cache(self):
+        distiller = FakeDistiller()
+        stage = self._make_stage("first")
+        stats = await MaterialBaker(distiller, self._cache).bake_stage_async(stage)
+
+        self.assertEqual(stats["materials"], 3)
+        self.assertEqual(stats["unique"], 2)
+        self.assertEqual(stats["baked"], 2)
+        self.assertEqual(len(distiller.baked), 2)
+        # The distiller isn't known to be thread safe.
+        self.assertEqual(distiller.threads, {threading.current_thread()})
+        for material_name in ("Red", "RedCopy", "Blue"):
+            self._check_baked(stage, material_name)
+
+        # The same networks in another stage come from the cache.
+        distiller = FakeDistiller()
+        stage = self._make_stage("second")
+        stats = await MaterialBaker(distiller, self._cache).bake_stage_async(stage)
+        self.assertEqual(stats["cached"], 2)
+        self.assertEqual(distiller.baked, [])
+        for material_name in ("Red", "RedCopy", "Blue"):
+            self._check_baked(stage, material_name)
+
+    async def test_external_connection_bakes_in_place(self):
+        distiller = FakeDistiller()
+        stage = self._make_stage("external")
+        shared = UsdShade.Shader.Define(stage, "/World/Shared")
+        shared.CreateOutput("out", Sdf.ValueTypeNames.Color3f)
+        shader = UsdShade.Shader(stage.GetPrimAtPath("/World/Looks/Blue/Shader"))
+        shader.CreateInput("base", Sdf.ValueTypeNames.Color3f).ConnectToSource(shared.ConnectableAPI(), "out")
+
+        stats = await MaterialBaker(distiller).bake_stage_async(stage)
+
+        self.assertEqual(stats["in_place"], 1)
+        self.assertIn(Sdf.Path("/World/Looks/Blue"), distiller.baked)
+        self._check_baked(stage, "Blue")
@@ -0,0 +1,59 @@
+import time
+import asyncio
+import omni.kit.test
+
+from ..pipeline import ExportPipeline
+
+
+class TestExportPipeline(omni.kit.test.AsyncTestCase):
+    async def test_upload_overlaps_next_conversion(self):
+        events = []
+
+        async def convert(job):
+            events.append(("convert", job))
+            await asyncio.sleep(0.05)
+            return job != 3
+
+        async def upload(job):
+            events.append(("upload", job))
+            await asyncio.sleep(0.05)
+            return True
+
+        pipeline = ExportPipeline(convert, upload, convert_workers=1, upload_workers=1, queue_size=1)
+        start_time = time.time()
+        metrics = await pipeline.run_async(range(6))
+        duration = time.time() - start_time
+
+        # Sequential convert + upload would take 6 * 0.1s.
+        self.assertLess(duration, 0.5)
+        self.assertEqual(metrics["convert"]["items"], 5)
+        self.assertEqual(metrics["convert"]["failures"], 1)
+        self.assertEqual(metrics["upload"]["items"], 5)
+        self.assertNotIn(("upload", 3), events)
+        self.assertLess(events.index(("upload", 0)), events.index(("convert", 2)))
+
+    async def test_slow_uploads_hold_conversions_back(self):
+        in_queue = []
+
+        async def convert(job):
+            in_queue.append(job)
+            return True
+
+        async def upload(job):
+            await asyncio.sleep(0.02)
+            in_queue.remove(job)
+            return True
+
+        max_waiting = []
+
+        async def jobs():
+            for job in range(10):
+                max_waiting.append(len(in_queue))
+                yield job
+
+        pipeline = ExportPipeline(convert, upload, convert_workers=1, upload_workers=1, queue_size=2)
+        metrics = await pipeline.run_async(jobs())
+
+        self.assertEqual(metrics["upload"]["items"], 10)
+        self.assertLessEqual(max(max_waiting), 4)
+        self.assertGreater(metrics["convert"]["blocked_time"], 0.0)
@@ -0,0 +1,171 @@
+import os
+import asyncio
+import tempfile
+import omni.kit.test
+
+from ..dwtool import DWTool
+from ..batch_exporter import BatchExporter, BatchJobStatus
+from ..export_job import StagingWorkspace
+from ..progress_tracker import ProgressTracker, JobStatus
+from ..tracing import Phase
+from ..upload_stream import UploadCancelled
+from .dw_stand_in_server import DWStandInServer
+from .test_batch_exporter import _CopyExporter
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgressTracker(omni.kit.test.AsyncTestCase):
+    async def test_updates_are_coalesced(self):
+        tracker = ProgressTracker()
+        flushes = []
+        tracker.subscribe(lambda changed: flushes.append(dict(changed)))
+        tracker.add_job("/staging/a/a.glb", "a")
+        tracker.add_job("/staging/b/b.glb", "b")
+        tracker.set_phase("/staging/a/a.glb", Phase.CONVERT)
+        for step in range(1, 101):
+            tracker.set_progress("/staging/a/a.glb", step / 100.0)
+        # Nobody tracks this export, it's ignored.
+        tracker.set_progress("/staging/c/c.glb", 0.5)
+
+        tracker.flush()
+        tracker.flush()
+        self.assertEqual(len(flushes), 1)
+        self.assertEqual(sorted(flushes[0]), ["/staging/a/a.glb", "/staging/b/b.glb"])
+        self.assertEqual(flushes[0]["/staging/a/a.glb"].fraction, 1.0)
+
+        tracker.finish("/staging/a/a.glb", True)
+        tracker.remove_finished()
+        tracker.flush()
+        self.assertEqual(flushes[1], {"/staging/a/a.glb": None})
+        self.assertEqual([job.name for job in tracker.jobs], ["b"])
+
+    async def test_throughput_and_eta(self):
+        clock = _Clock()
+        tracker = ProgressTracker(clock=clock)
+        job = tracker.add_job("/staging/a/a.glb", "a")
+        tracker.set_phase(job.key, Phase.CONVERT)
+        self.assertIsNone(job.eta)
+        clock.now += 1.0
+        tracker.set_progress(job.key, 0.25)
+        self.assertAlmostEqual(job.eta, 3.0)
+        self.assertEqual(job.throughput, 0.0)
+
+        tracker.set_phase(job.key, Phase.UPLOAD, total=1000)
+        clock.now += 2.0
+        tracker.set_progress(job.key, done=500)
+        self.assertEqual(job.fraction, 0.5)
+        self.assertAlmostEqual(job.throughput, 250.0)
+        self.assertAlmostEqual(job.eta, 2.0)
+        self.assertAlmostEqual(job.elapsed, 3.0)
+
+        tracker.finish(job.key, True)
+        self.assertIsNone(job.eta)
+        self.assertEqual(job.to_dict()["status"], JobStatus.SUCCEEDED)
+
+    async def test_cancel(self):
+        tracker = ProgressTracker()
+        job = tracker.add_job("/staging/a/a.glb", "a")
+        cancelled = []
+        tracker.add_cancel_fn(job.key, lambda: cancelled.append("convert"))
+        tracker.add_cancel_fn(job.key, lambda: cancelled.append("upload"))
+        tracker.cancel(job.key)
+        tracker.cancel(job.key)
+        self.assertEqual(cancelled, ["convert", "upload"])
+        # A phase starting after the cancel is cancelled right away.
+        tracker.add_cancel_fn(job.key, lambda: cancelled.append("post_process"))
+        self.assertEqual(cancelled[-1], "post_process")
+        tracker.finish(job.key, False)
+        self.assertEqual(job.status, JobStatus.CANCELLED)
+
+    async def test_finished_jobs_are_pruned_without_listeners(self):
+        tracker = ProgressTracker(max_finished=2)
+        for i in range(5):
+            tracker.add_job(f"/staging/{i}/{i}.glb", str(i))
+            tracker.finish(f"/staging/{i}/{i}.glb", True)
+        running = tracker.add_job("/staging/r/r.glb", "r")
+        # A headless run keeps the last finished jobs only, never the running ones.
+        self.assertEqual([job.name for job in tracker.jobs], ["3", "4", "r"])
+        tracker.finish(running.key, False)
+        self.assertEqual([job.name for job in tracker.jobs], ["4", "r"])
+
+        # The dashboard lists every finished job until it removes them.
+        tracker.subscribe(lambda changed: None)
+        for i in range(5, 8):
+            tracker.add_job(f"/staging/{i}/{i}.glb", str(i))
+            tracker.finish(f"/staging/{i}/{i}.glb", True)
+        self.assertEqual(len(tracker.jobs), 5)
+
+
+class TestProgressCancel(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._server = DWStandInServer()
+        self._server.start()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        DWTool._instance = None
+        self._tool = DWTool()
+        self.assertTrue(await self._tool.loginToDW(self._server.url, "user", "pwd"))
+
+    async def tearDown(self):
+        self._tool.close()
+        self._server.stop()
+        self._tmp_dir.cleanup()
+        DWTool._instance = None
+
+    async def test_cancel_upload(self):
+        path = os.path.join(self._tmp_dir.name, "big.glb")
+        with open(path, "wb") as f:
+            # Random, zeros would be deduplicated by the delta upload down to a single chunk.
+            f.write(os.urandom(32 * 1024 * 1024))
+        # Slow enough that the socket buffers fill up long before the end of the file.
+        self._server.bandwidth = 4 * 1024 * 1024
+        self._tool.chunk_size = 64 * 1024 * 1024
+        tracker = ProgressTracker()
+        job = tracker.add_job(path, "big")
+
+        def cancel_once_started(changed):
+            if job.done:
+                tracker.cancel(job.key)
+
+        tracker.subscribe(cancel_once_started)
+        upload = asyncio.ensure_future(tracker.upload_async(job.key, self._tool, [("big", path)]))
+        while not upload.done():
+            tracker.flush()
+            await asyncio.sleep(0.01)
+
+        with self.assertRaises(UploadCancelled):
+            upload.result()
+        tracker.finish(job.key, False)
+        self.assertEqual(job.status, JobStatus.CANCELLED)
+        self.assertEqual(job.phase, Phase.UPLOAD)
+        self.assertLess(job.done, job.total)
+        self.assertNotIn("[ov]-big", self._server.assets)
+
+    async def test_cancel_batch_job(self):
+        source_dir = os.path.join(self._tmp_dir.name, "library")
+        os.makedirs(source_dir)
+        for name in ("a.usd", "b.usd"):
+            with open(os.path.join(source_dir, name), "w") as f:
+                f.write(name)
+        tracker = ProgressTracker()
+
+        def on_status(job):
+            if job.status == BatchJobStatus.CONVERTED and job.target_name == "a":
+                tracker.cancel(job.output_path)
+
+        workspace = StagingWorkspace(os.path.join(self._tmp_dir.name, "staging"))
+        batch = BatchExporter(_CopyExporter(), self._tool, workspace, status_fn=on_status, progress_tracker=tracker)
+        report = await batch.run_async(source_dir, None)
+
+        statuses = {job["target_name"]: job["status"] for job in report["jobs"]}
+        self.assertEqual(statuses, {"a": BatchJobStatus.CANCELLED, "b": BatchJobStatus.SUCCEEDED})
+        self.assertEqual(sorted(self._server.assets), ["[ov]-b"])
+        self.assertEqual(sorted(job.status for job in tracker.jobs), [JobStatus.CANCELLED, JobStatus.SUCCEEDED])
+        uploaded = [job for job in tracker.jobs if job.status == JobStatus.SUCCEEDED][0]
+        self.assertEqual((uploaded.phase, uploaded.done, uploaded.total), (Phase.UPLOAD, 5, 5))
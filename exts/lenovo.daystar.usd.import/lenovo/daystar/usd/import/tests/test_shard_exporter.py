@@ -0,0 +1,113 @@
+import os
+import json
+import tempfile
+import omni.kit.test
+from pxr import Gf, Usd, UsdGeom
+
+from ..dwtool import DWTool
+from ..shard_exporter import ShardExporter, ShardMode
+from ..export_job import StagingWorkspace, CleanupPolicy
+from .dw_stand_in_server import DWStandInServer
+
+
+class _FlattenExporter:
+    """Stands in for Exporter, "converts" a stage by flattening it, fails the stages masked to fail_path."""
+
+    def __init__(self, fail_path=None):
+        self.masks = []
+        self._fail_path = fail_path
+
+    def needs_collect(self, asset_converter_context):
+        return False
+
+    async def export_stage_async(self, stage, output_path, asset_converter_context, progress_fn=None):
+        self.masks.append(sorted(str(path) for path in stage.GetPopulationMask().GetPaths()))
+        if self._fail_path in self.masks[-1]:
+            return False
+        with open(output_path, "w") as f:
+            f.write(stage.Flatten().ExportToString())
+        return True
+
+
+class TestShardExporter(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._workspace = StagingWorkspace(os.path.join(self._tmp_dir.name, "staging"), CleanupPolicy.ON_SUCCESS)
+
+        # A factory of 4 x 4 machines in one top-level group, plus a small office next to it.
+        self._stage = Usd.Stage.CreateInMemory()
+        world = UsdGeom.Xform.Define(self._stage, "/World")
+        self._stage.SetDefaultPrim(world.GetPrim())
+        UsdGeom.Xform.Define(self._stage, "/World/Factory")
+        for x in range(4):
+            for z in range(4):
+                machine = UsdGeom.Cube.Define(self._stage, f"/World/Factory/Machine_{x}_{z}")
+                UsdGeom.XformCommonAPI(machine).SetTranslate(Gf.Vec3d(x * 10 + 1, 0, z * 10 + 1))
+        office = UsdGeom.Cube.Define(self._stage, "/World/Office")
+        UsdGeom.XformCommonAPI(office).SetTranslate(Gf.Vec3d(38, 0, 38))
+
+    async def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    async def test_plan_shards(self):
+        exporter = ShardExporter(None, None, self._workspace, ShardMode.PRIMS)
+        shards = exporter.plan_shards(self._stage)
+        self.assertEqual([[str(path) for path in shard.paths] for shard in shards], [["/World/Factory"], ["/World/Office"]])
+
+        exporter = ShardExporter(None, None, self._workspace, ShardMode.GRID, grid_size=2)
+        shards = exporter.plan_shards(self._stage)
+        self.assertEqual(len(shards), 4)
+        # The factory group is larger than a cell, so its machines are sharded.
+        self.assertEqual(sorted(len(shard.paths) for shard in shards), [4, 4, 4, 5])
+        for shard in shards:
+            for path in shard.paths:
+                bounds = UsdGeom.BBoxCache(Usd.TimeCode.Default(), ["default"]).ComputeWorldBound(
+                    self._stage.GetPrimAtPath(path)
+                ).ComputeAlignedRange()
+                self.assertTrue(shard.bounds.Contains(bounds))
+
+    async def test_export_uploads_shards_and_index(self):
+        server = DWStandInServer()
+        server.start()
+        DWTool._instance = None
+        tool = DWTool()
+        try:
+            self.assertTrue(await tool.loginToDW(server.url, "user", "pwd"))
+            exporter = _FlattenExporter()
+            shard_exporter = ShardExporter(exporter, tool, self._workspace, ShardMode.GRID, grid_size=2, max_workers=3)
+            report = await shard_exporter.export_async(self._stage, "factory", None)
+
+            self.assertEqual(report["shards"], 4)
+            self.assertEqual(report["uploaded"], 4)
+            self.assertTrue(report["index_uploaded"])
+            index = json.loads(server.assets["[ov]-factory_shards"]["data"])
+            self.assertEqual([shard["asset"] for shard in index["shards"]], [f"factory_shard_{i}" for i in range(4)])
+            self.assertEqual(index["bounds"]["max"], [39.0, 1.0, 39.0])
+            for shard in index["shards"]:
+                self.assertIn(f"[ov]-{shard['asset']}", server.assets)
+            # Each conversion only populated the prims of its shard.
+            self.assertTrue(all(len(mask) <= 5 for mask in exporter.masks))
+        finally:
+            tool.close()
+            server.stop()
+            DWTool._instance = None
+
+    async def test_failed_shard_skips_index(self):
+        server = DWStandInServer()
+        server.start()
+        DWTool._instance = None
+        tool = DWTool()
+        try:
+            self.assertTrue(await tool.loginToDW(server.url, "user", "pwd"))
+            exporter = _FlattenExporter(fail_path="/World/Office")
+            shard_exporter = ShardExporter(exporter, tool, self._workspace, ShardMode.PRIMS)
+            report = await shard_exporter.export_async(self._stage, "factory", None)
+
+            self.assertEqual(report["uploaded"], 1)
+            self.assertEqual(report["failed"], 1)
+            self.assertFalse(report["index_uploaded"])
+            self.assertNotIn("[ov]-factory_shards", server.assets)
+        finally:
+            tool.close()
+            server.stop()
+            DWTool._instance = None
@@ -0,0 +1,114 @@
+import os
+import asyncio
+import tempfile
+import omni.kit.test
+from pxr import Sdf, Usd, UsdGeom, UsdShade, UsdUtils
+
+from ..utils import Utils
+from ..progress_tracker import ProgressTracker
+from ..stage_loading import cached_stage_id, find_material_paths, open_material_stage
+
+
+class TestStageLoading(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+
+    async def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _create_payload_stage(self):
+        """Creates a stage with its geometry and materials in payloads, one material using a shared node graph."""
+        root = self._tmp_dir.name
+        shared = Usd.Stage.CreateNew(os.path.join(root, "shared.usda"))
+        UsdShade.NodeGraph.Define(shared, "/Looks/Shared").CreateOutput("color", Sdf.ValueTypeNames.Color3f)
+        shared.Save()
+
+        for name in ("chair", "table"):
+            part = Usd.Stage.CreateNew(os.path.join(root, f"{name}.usda"))
+            part.SetDefaultPrim(UsdGeom.Xform.Define(part, "/Part").GetPrim())
+            UsdGeom.Mesh.Define(part, "/Part/Mesh").CreatePointsAttr([(0, 0, 0)] * 3)
+            material = UsdShade.Material.Define(part, "/Part/Looks/Wood")
+            shader = UsdShade.Shader.Define(part, "/Part/Looks/Wood/Shader")
+            material.CreateSurfaceOutput().ConnectToSource(shader.ConnectableAPI(), "out")
+            part.Save()
+
+        stage = Usd.Stage.CreateNew(os.path.join(root, "room.usda"))
+        UsdGeom.Xform.Define(stage, "/Room")
+        for name in ("chair", "table"):
+            prim = UsdGeom.Xform.Define(stage, f"/Room/{name}").GetPrim()
+            prim.GetPayloads().AddPayload(f"./{name}.usda")
+        stage.DefinePrim("/Room/Looks").GetReferences().AddReference("./shared.usda", "/Looks")
+        material = UsdShade.Material.Define(stage, "/Room/Materials/Painted")
+        shader = UsdShade.Shader.Define(stage, "/Room/Materials/Painted/Shader")
+        shader.CreateInput("color", Sdf.ValueTypeNames.Color3f).ConnectToSource(
+            UsdShade.NodeGraph.Get(stage, "/Room/Looks/Shared").GetOutput("color")
+        )
+        material.CreateSurfaceOutput().ConnectToSource(shader.ConnectableAPI(), "out")
+        stage.Save()
+        return stage.GetRootLayer().realPath
+
+    async def test_material_stage(self):
+        path = self._create_payload_stage()
+
+        self.assertEqual(
+            [str(p) for p in find_material_paths(path)],
+            ["/Room/Looks/Shared", "/Room/Materials/Painted", "/Room/chair/Looks/Wood", "/Room/table/Looks/Wood"],
+        )
+        stage = open_material_stage(path)
+        materials = sorted(str(prim.GetPath()) for prim in stage.Traverse() if prim.IsA(UsdShade.Material))
+        self.assertEqual(materials, ["/Room/Materials/Painted", "/Room/chair/Looks/Wood", "/Room/table/Looks/Wood"])
+        self.assertTrue(stage.GetPrimAtPath("/Room/table/Looks/Wood/Shader"))
+        self.assertTrue(stage.GetPrimAtPath("/Room/Looks/Shared"))
+        # The geometry was never populated.
+        self.assertFalse([prim for prim in stage.Traverse() if prim.IsA(UsdGeom.Mesh)])
+
+        # Edits go to the root layer, as with a full open.
+        UsdShade.Shader.Get(stage, "/Room/table/Looks/Wood/Shader").CreateInput(
+            "roughness", Sdf.ValueTypeNames.Float
+        ).Set(0.5)
+        stage.Save()
+        full_stage = Usd.Stage.Open(path)
+        shader = UsdShade.Shader.Get(full_stage, "/Room/table/Looks/Wood/Shader")
+        self.assertEqual(shader.GetInput("roughness").Get(), 0.5)
+        self.assertTrue(full_stage.GetPrimAtPath("/Room/table/Mesh"))
+
+    async def test_cached_stage_id(self):
+        stage_cache = UsdUtils.StageCache.Get()
+        stage = Usd.Stage.CreateInMemory()
+        with cached_stage_id(stage) as stage_id:
+            self.assertEqual(stage_cache.Find(Usd.StageCache.Id.FromString(stage_id)), stage)
+        # The entry inserted for the export is erased with it, which expires a stage opened from Python.
+        self.assertFalse(stage_cache.Find(Usd.StageCache.Id.FromString(stage_id)))
+        self.assertTrue(stage.expired)
+
+        stage = Usd.Stage.CreateInMemory()
+        with self.assertRaises(RuntimeError):
+            with cached_stage_id(stage) as stage_id:
+                raise RuntimeError("conversion failed")
+        self.assertFalse(stage_cache.Find(Usd.StageCache.Id.FromString(stage_id)))
+
+        # A stage cached by its owner, e.g. the editor, stays cached.
+        stage = Usd.Stage.CreateInMemory()
+        cached_id = stage_cache.Insert(stage)
+        try:
+            with cached_stage_id(stage) as stage_id:
+                self.assertEqual(stage_id, cached_id.ToString())
+            self.assertTrue(stage_cache.Contains(stage))
+        finally:
+            stage_cache.Erase(cached_id)
+
+    async def test_peak_rss(self):
+        self.assertGreater(Utils.current_rss(), 0)
+        self.assertGreater(Utils.peak_rss(), 0)
+
+        tracker = ProgressTracker(memory_interval=0.01)
+        job = tracker.add_job("/staging/a/a.glb", "a")
+        before = job.peak_rss
+        self.assertGreater(before, 0)
+        # Written, so the pages are resident, and only freed once the job finished.
+        data = b"\x01" * (64 * 1024 * 1024)
+        await asyncio.sleep(0.1)
+        tracker.finish("/staging/a/a.glb", True)
+        del data
+        self.assertGreater(job.peak_rss, before + 32 * 1024 * 1024)
+        self.assertEqual(job.to_dict()["peak_rss"], job.peak_rss)
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import threading
+import omni.kit.test
+from PIL import Image
+from pxr import Sdf, Usd, UsdShade
+
+from .. import texture_processor
+from ..texture_processor import TextureProcessor
+
+
+class TestTextureProcessor(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._folder = tempfile.mkdtemp()
+        self._output_folder = os.path.join(self._folder, "processed")
+
+    async def tearDown(self):
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def _make_texture(self, name, size, color, mode="RGB"):
+        path = os.path.join(self._folder, name)
+        Image.new(mode, size, color).save(path)
+        return path
+
+    async def test_downscale_and_dedup(self):
+        large = self._make_texture("large.png", (1024, 512), (255, 0, 0))
+        copy = os.path.join(self._folder, "copy.png")
+        shutil.copyfile(large, copy)
+        small = self._make_texture("small.png", (64, 64), (0, 255, 0))
+
+        processor = TextureProcessor(max_resolution=256, max_workers=2)
+        results = processor.process_files([large, copy, small], self._output_folder)
+
+        self.assertEqual(results[large], results[copy])
+        self.assertEqual(processor.stats["textures"], 3)
+        self.assertEqual(processor.stats["unique"], 2)
+        self.assertEqual(processor.stats["processed"], 2)
+        with Image.open(results[large]) as image:
+            self.assertEqual(image.size, (256, 128))
+        with Image.open(results[small]) as image:
+            self.assertEqual(image.size, (64, 64))
+
+    async def test_reencode(self):
+        opaque = self._make_texture("opaque.png", (128, 128), (10, 20, 30))
+        transparent = self._make_texture("transparent.png", (128, 128), (10, 20, 30, 128), mode="RGBA")
+        broken = os.path.join(self._folder, "broken.png")
+        with open(broken, "wb") as f:
+            f.write(b"not an image")
+
+        processor = TextureProcessor(image_format="jpeg", use_processes=False)
+        results = processor.process_files([opaque, transparent, broken], self._output_folder)
+
+        self.assertTrue(results[opaque].endswith(".jpg"))
+        # JPEG has no alpha, so the transparent texture stays a PNG.
+        self.assertTrue(results[transparent].endswith(".png"))
+        self.assertNotIn(broken, results)
+
+    async def test_process_stage(self):
+        texture = self._make_texture("albedo.png", (512, 512), (200, 100, 50))
+        stage_path = os.path.join(self._folder, "scene.usda")
+        stage = Usd.Stage.CreateNew(stage_path)
+        for name in ("a", "b"):
+            shader = UsdShade.Shader.Define(stage, f"/Looks/{name}/Texture")
+            shader.CreateIdAttr("UsdUVTexture")
+            shader.CreateInput("file", Sdf.ValueTypeNames.Asset).Set("./albedo.png")
+        stage.Save()
+
+        install_threads = []
+        install_pillow = texture_processor._install_pillow
+        texture_processor._install_pillow = lambda: install_threads.append(threading.current_thread())
+        try:
+            processor = TextureProcessor(max_resolution=128)
+            await processor.process_stage_async(stage, self._output_folder)
+        finally:
+            texture_processor._install_pillow = install_pillow
+        # pip runs with the textures, off the event loop thread.
+        self.assertEqual(len(install_threads), 1)
+        self.assertIsNot(install_threads[0], threading.current_thread())
+
+        paths = set()
+        for name in ("a", "b"):
+            shader = UsdShade.Shader(stage.GetPrimAtPath(f"/Looks/{name}/Texture"))
+            paths.add(shader.GetInput("file").Get().resolvedPath)
+        self.assertEqual(len(paths), 1)
+        processed = paths.pop().replace("\\", "/")
+        self.assertTrue(processed.startswith(self._output_folder.replace("\\", "/")))
+        self.assertNotEqual(os.path.normpath(processed), os.path.normpath(texture))
+        with Image.open(processed) as image:
+            self.assertEqual(image.size, (128, 128))
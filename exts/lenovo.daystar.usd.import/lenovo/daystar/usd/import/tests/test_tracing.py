@@ -0,0 +1,102 @@
+import os
+import json
+import asyncio
+import tempfile
+import omni.kit.test
+
+from ..dwtool import DWTool
+from ..batch_exporter import BatchExporter
+from ..export_job import StagingWorkspace, ExportJob
+from ..tracing import Tracer, Phase, get_tracer
+from .dw_stand_in_server import DWStandInServer
+from .test_batch_exporter import _CopyExporter
+
+
+class TestTracing(omni.kit.test.AsyncTestCase):
+    async def test_spans_and_job_summary(self):
+        tracer = Tracer(enabled=True)
+        job = ExportJob("/staging/job_1", "crate")
+        with tracer.span(Phase.LISTING, folder="/library") as span:
+            span.set(entries=3)
+
+        async def upload():
+            with tracer.span(Phase.UPLOAD, bytes_out=100):
+                await asyncio.sleep(0)
+
+        with tracer.job(job):
+            with tracer.span(Phase.CONVERT, prims=12) as span:
+                span.add(bytes_out=40)
+                span.add(bytes_out=2)
+            # Tasks started in the block belong to the job too.
+            await asyncio.gather(asyncio.ensure_future(upload()), asyncio.ensure_future(upload()))
+            with self.assertRaises(RuntimeError):
+                with tracer.span(Phase.UPLOAD):
+                    raise RuntimeError("connection reset")
+
+        summary = tracer.job_summary(job.job_id)
+        self.assertEqual(summary[Phase.CONVERT]["prims"], 12)
+        self.assertEqual(summary[Phase.CONVERT]["bytes_out"], 42)
+        self.assertEqual(summary[Phase.UPLOAD]["count"], 3)
+        self.assertEqual(summary[Phase.UPLOAD]["bytes_out"], 200)
+        self.assertNotIn(Phase.LISTING, summary)
+
+        trace = tracer.to_chrome_trace()
+        names = {event["args"]["name"]: event["tid"] for event in trace["traceEvents"] if event["ph"] == "M"}
+        self.assertEqual(names, {"pipeline": 0, "crate": 1})
+        spans = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+        self.assertEqual([event["name"] for event in spans if event["tid"] == 0], [Phase.LISTING])
+        self.assertEqual(spans[0]["args"], {"folder": "/library", "entries": 3})
+        self.assertEqual(spans[-1]["args"]["error"], "connection reset")
+        self.assertTrue(all(event["dur"] >= 0 for event in spans))
+
+        since = tracer.now()
+        with tracer.span(Phase.LOGIN):
+            pass
+        events = tracer.to_chrome_trace(since)["traceEvents"]
+        self.assertEqual([event["name"] for event in events if event["ph"] == "X"], [Phase.LOGIN])
+
+    async def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer()
+        with tracer.job(ExportJob("/staging/job_1", "crate")):
+            with tracer.span(Phase.CONVERT) as span:
+                span.set(prims=1)
+        self.assertEqual(tracer.to_chrome_trace()["traceEvents"], [])
+        self.assertEqual(tracer.job_summary("job_1"), {})
+
+    async def test_batch_export_phases(self):
+        server = DWStandInServer()
+        server.start()
+        tracer = get_tracer()
+        tracer.enabled = True
+        DWTool._instance = None
+        tool = DWTool()
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                source_dir = os.path.join(tmp_dir, "library")
+                os.makedirs(source_dir)
+                for name in ("a.usd", "b.usd"):
+                    with open(os.path.join(source_dir, name), "w") as f:
+                        f.write(name * 10)
+                self.assertTrue(await tool.loginToDW(server.url, "user", "pwd"))
+                workspace = StagingWorkspace(os.path.join(tmp_dir, "staging"))
+                report = await BatchExporter(_CopyExporter(), tool, workspace).run_async(source_dir, None)
+
+                self.assertEqual(report["succeeded"], 2)
+                for job in report["jobs"]:
+                    # The uploads and lookups run on DWTool threads and still count for their job.
+                    self.assertEqual(job["phases"][Phase.UPLOAD]["count"], 1)
+                    self.assertEqual(job["phases"][Phase.UPLOAD]["bytes_out"], 50)
+                    self.assertEqual(job["phases"][Phase.ASSET_LOOKUP]["count"], 1)
+                with open(report["trace"], "r") as f:
+                    trace = json.load(f)
+                spans = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+                self.assertIn(Phase.LISTING, {event["name"] for event in spans if event["tid"] == 0})
+                # The login happened before the batch started, so it isn't in its trace.
+                self.assertNotIn(Phase.LOGIN, {event["name"] for event in spans})
+                self.assertEqual(len({event["tid"] for event in spans if event["name"] == Phase.UPLOAD}), 2)
+        finally:
+            tracer.enabled = False
+            tracer.clear()
+            tool.close()
+            server.stop()
+            DWTool._instance = None
@@ -0,0 +1,38 @@
+import os
+import tempfile
+import omni.kit.test
+
+from ..utils import Utils
+
+
+class TestUtils(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._root = os.path.join(self._tmp_dir.name, "root").replace("\\", "/")
+        for i in range(5):
+            for j in range(4):
+                folder = os.path.join(self._root, f"f{i}", f"g{j}")
+                os.makedirs(folder)
+                for name in ("a.usd", "b.usda", "c.png"):
+                    open(os.path.join(folder, name), "w").close()
+        os.makedirs(os.path.join(self._root, ".thumbs"))
+        open(os.path.join(self._root, ".thumbs", "x.usd"), "w").close()
+
+    async def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    async def test_walk_folder_filters_while_walking(self):
+        exclude_fn = lambda path: os.path.basename(path.rstrip("/")) == ".thumbs"
+        found = [entry async for entry in Utils.walk_folder_async(self._root, Utils.is_usd, exclude_fn, max_concurrency=4)]
+
+        self.assertEqual(len(found), 5 * 4 * 2)
+        relative_paths = set(relative_path for _, relative_path in found)
+        self.assertIn("root/f3/g2/b.usda", relative_paths)
+        self.assertFalse(any(".thumbs" in path or path.endswith(".png") for path in relative_paths))
+
+    async def test_list_folder_returns_everything(self):
+        absolute_paths, relative_paths = await Utils.list_folder_async(self._root)
+
+        self.assertEqual(len(absolute_paths), 5 * 4 * 3 + 1)
+        self.assertEqual(len(relative_paths), len(absolute_paths))
+        self.assertIn("root/.thumbs/x.usd", relative_paths)
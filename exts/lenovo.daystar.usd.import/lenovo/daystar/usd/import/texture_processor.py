@@ -0,0 +1,179 @@
+import os
+import sys
+import site
+import asyncio
+import threading
+import importlib.util
+import multiprocessing
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+import carb
+from pxr import Sdf, UsdShade
+from .utils import Utils
+
+TEXTURE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tga", ".bmp", ".tif", ".tiff")
+# The pool processes import the worker as a top level module from this folder.
+WORKER_FOLDER = os.path.dirname(os.path.abspath(__file__))
+WORKER_MODULE = "texture_worker"
+
+
+_pillow_installed = False
+_pillow_lock = threading.Lock()
+
+
+def _install_pillow():
+    """Installs Pillow with pip on first use, so enabling the extension doesn't wait for it.
+
+    pip blocks, it's called from the thread processing the textures, never the event loop.
+    """
+    global _pillow_installed
+    with _pillow_lock:
+        if not _pillow_installed:
+            import omni.kit.pipapi
+
+            omni.kit.pipapi.install(package="Pillow", module="PIL")
+            _pillow_installed = True
+
+
+def _load_worker():
+    module = sys.modules.get(WORKER_MODULE)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(WORKER_MODULE, os.path.join(WORKER_FOLDER, "texture_worker.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[WORKER_MODULE] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+class TextureProcessor:
+    """Downscales, deduplicates and re-encodes textures before they get embedded in the GLB.
+
+    Textures with identical content are processed once and share one output file. The others
+    are processed in a pool of processes, so large images decode and resize in parallel. A
+    texture that can't be processed keeps its original path.
+
+    Args:
+        max_resolution (int): Maximum width and height of the textures, 0 keeps the resolution.
+        image_format (str): "png", "jpeg" or "keep" to keep png and jpeg textures in their format.
+        quality (int): JPEG quality.
+        max_workers (int): Number of pool processes, 0 uses one per CPU.
+        use_processes (bool): Use a process pool, otherwise the textures are processed in threads.
+    """
+
+    def __init__(self, max_resolution=2048, image_format="keep", quality=85, max_workers=0, use_processes=True):
+        self.max_resolution = max(0, max_resolution)
+        self.image_format = image_format if image_format in ("png", "jpeg") else "keep"
+        self.quality = min(max(quality, 1), 95)
+        self.max_workers = max_workers if max_workers > 0 else (os.cpu_count() or 1)
+        self.use_processes = use_processes
+        self.stats = {}
+
+    def process_files(self, paths, output_folder):
+        """Processes the texture files into output_folder and returns a dict of source path -> processed path."""
+        os.makedirs(output_folder, exist_ok=True)
+        paths = sorted(set(paths))
+        with concurrent.futures.ThreadPoolExecutor(min(len(paths), 8) or 1) as executor:
+            hashes = dict(zip(paths, executor.map(self._hash_or_none, paths)))
+        unique = {}
+        for path in paths:
+            if hashes[path]:
+                unique.setdefault(hashes[path], path)
+
+        _install_pillow()
+        processed = self._run(unique, output_folder)
+        results = {}
+        for path in paths:
+            if hashes[path] in processed:
+                results[path] = processed[hashes[path]]
+
+        self.stats = {
+            "textures": len(paths),
+            "unique": len(unique),
+            "processed": len(processed),
+            "size_before": sum(os.path.getsize(path) for path in unique.values()),
+            "size_after": sum(os.path.getsize(path) for path in processed.values()),
+        }
+        return results
+
+    def find_stage_textures(self, stage):
+        """Returns a list of (attribute, resolved texture path) of the shader inputs of stage."""
+        textures = []
+        for prim in stage.Traverse():
+            if not prim.IsA(UsdShade.Shader):
+                continue
+            for attr in prim.GetAttributes():
+                if attr.GetTypeName() != Sdf.ValueTypeNames.Asset:
+                    continue
+                value = attr.Get()
+                if not value or not value.resolvedPath:
+                    continue
+                if os.path.splitext(value.resolvedPath)[1].lower() in TEXTURE_EXTENSIONS:
+                    textures.append((attr, value.resolvedPath))
+        return textures
+
+    async def process_stage_async(self, stage, output_folder):
+        """Processes the textures of stage and points its shader inputs to the processed files.
+
+        The stage is only read and edited on the calling thread, the textures are processed in the background.
+        """
+        textures = self.find_stage_textures(stage)
+        if not textures:
+            return {}
+        loop = asyncio.get_event_loop()
+        results = await loop.run_in_executor(
+            None, self.process_files, [path for _, path in textures], output_folder
+        )
+        with Sdf.ChangeBlock():
+            for attr, path in textures:
+                if path in results:
+                    attr.Set(Sdf.AssetPath(results[path].replace("\\", "/")))
+        carb.log_info(
+            f"Processed {self.stats['textures']} texture(s), {self.stats['unique']} unique: "
+            f"{self.stats['size_before']} -> {self.stats['size_after']} bytes"
+        )
+        return results
+
+    def _hash_or_none(self, path):
+        try:
+            return Utils.hash_file(path)
+        except OSError as e:
+            carb.log_warn(f"Failed to read texture {path}: {e}")
+            return None
+
+    def _run(self, unique, output_folder):
+        worker = _load_worker()
+        args = [
+            (path, output_folder, digest[:16], self.max_resolution, self.image_format, self.quality)
+            for digest, path in unique.items()
+        ]
+        processed = {}
+        pending = dict(zip(unique.keys(), args))
+        if self.use_processes and len(pending) > 1:
+            try:
+                context = multiprocessing.get_context("spawn")
+                with concurrent.futures.ProcessPoolExecutor(
+                    min(self.max_workers, len(pending)),
+                    mp_context=context,
+                    initializer=site.addsitedir,
+                    initargs=(WORKER_FOLDER,),
+                ) as executor:
+                    self._collect(executor, worker, pending, processed)
+            except (OSError, BrokenProcessPool) as e:
+                carb.log_warn(f"Texture process pool failed, processing the textures in threads: {e}")
+        if pending:
+            with concurrent.futures.ThreadPoolExecutor(min(self.max_workers, len(pending))) as executor:
+                self._collect(executor, worker, pending, processed)
+        return processed
+
+    def _collect(self, executor, worker, pending, processed):
+        futures = {executor.submit(worker.process_texture, *args): digest for digest, args in pending.items()}
+        for future in concurrent.futures.as_completed(futures):
+            digest = futures[future]
+            try:
+                dst_path, _, _ = future.result()
+                processed[digest] = dst_path
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                carb.log_warn(f"Failed to process texture {pending[digest][0]}, keeping it as is: {e}")
+            pending.pop(digest)
@@ -0,0 +1,67 @@
+"""Texture work done in the pool processes of TextureProcessor.
+
+The pool processes load this module by file name, outside of Kit, so it may only import
+the standard library and Pillow.
+"""
+import os
+import shutil
+from PIL import Image
+
+# Image formats the glTF core spec accepts, format name -> (Pillow format, file extension).
+FORMATS = {"png": ("PNG", ".png"), "jpeg": ("JPEG", ".jpg")}
+PNG_MODES = ("1", "L", "LA", "I", "I;16", "P", "RGB", "RGBA")
+
+
+def _has_alpha(image):
+    if image.mode in ("LA", "RGBA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        alpha = image.convert("RGBA").getchannel("A")
+        return alpha.getextrema()[0] < 255
+    return False
+
+
+def process_texture(src_path, dst_folder, name, max_resolution, image_format, quality):
+    """Downscales src_path to max_resolution and encodes it as image_format in dst_folder.
+
+    Args:
+        src_path (str): Source texture.
+        dst_folder (str): Folder of the processed texture.
+        name (str): File name of the processed texture without extension.
+        max_resolution (int): Maximum width and height, 0 keeps the resolution.
+        image_format (str): "png", "jpeg" or "keep" to keep the source format when it's png or jpeg.
+        quality (int): JPEG quality.
+
+    Returns (dst_path, width, height). A texture that needs neither resizing nor re-encoding is copied as is.
+    """
+    _, ext = os.path.splitext(src_path)
+    ext = ext.lower()
+    with Image.open(src_path) as image:
+        source_format = (image.format or "").lower()
+        resize = max_resolution > 0 and max(image.size) > max_resolution
+        if image_format == "keep":
+            target_format = source_format if source_format in FORMATS else "png"
+        else:
+            target_format = image_format
+        if target_format == "jpeg" and _has_alpha(image):
+            # JPEG has no alpha channel, keep the transparency.
+            target_format = "png"
+        pil_format, target_ext = FORMATS[target_format]
+
+        if not resize and target_format == source_format:
+            dst_path = os.path.join(dst_folder, name + ext)
+            shutil.copyfile(src_path, dst_path)
+            return dst_path, image.size[0], image.size[1]
+
+        image.load()
+        if resize:
+            image.thumbnail((max_resolution, max_resolution), Image.LANCZOS)
+        if target_format == "jpeg" and image.mode not in ("L", "RGB"):
+            image = image.convert("RGB")
+        elif target_format == "png" and image.mode not in PNG_MODES:
+            image = image.convert("RGBA")
+
+        dst_path = os.path.join(dst_folder, name + target_ext)
+        if target_format == "jpeg":
+            image.save(dst_path, pil_format, quality=quality, optimize=True)
+        else:
+            image.save(dst_path, pil_format, optimize=True)
+        return dst_path, image.size[0], image.size[1]
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import threading
+import contextlib
+import contextvars
+import carb
+
+
+TRACING_SETTINGS = "/exts/lenovo.daystar.usd.import/tracing"
+
+
+class Phase:
+    LISTING = "listing"
+    COLLECT = "collect"
+    BAKE = "bake"
+    TEXTURES = "textures"
+    CONVERT = "convert"
+    POST_PROCESS = "post_process"
+    LOGIN = "login"
+    ASSET_LOOKUP = "asset_lookup"
+    UPLOAD = "upload"
+
+
+# Counters summed per phase in the job summaries, any other span argument only goes to the trace.
+COUNTERS = ("bytes_in", "bytes_out", "prims", "materials")
+
+# Job the spans of the current task belong to. asyncio tasks inherit it, and DWTool hands it to its threads.
+_current_job = contextvars.ContextVar("lenovo_daystar_trace_job", default=None)
+
+
+class Span:
+    """A phase being timed, see Tracer.span. Counters set on it go to the trace event and the job summary."""
+
+    def __init__(self, tracer, name, job_id, args):
+        self._tracer = tracer
+        self.name = name
+        self.job_id = job_id
+        self.args = dict(args)
+        self.start = None
+        self.duration = None
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def add(self, **counters):
+        for name, value in counters.items():
+            self.args[name] = self.args.get(name, 0) + value
+
+    def begin(self):
+        """Starts the span, for phases that end in a callback instead of at the end of a with block."""
+        self.start = time.perf_counter()
+        return self
+
+    def end(self, error=None):
+        self.duration = time.perf_counter() - self.start
+        if error:
+            self.args["error"] = error
+        self._tracer._record(self)
+
+    def __enter__(self):
+        return self.begin()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end(None if exc_type is None else str(exc_value) or exc_type.__name__)
+        return False
+
+
+class _NullSpan:
+    def set(self, **args):
+        pass
+
+    def add(self, **counters):
+        pass
+
+    def begin(self):
+        return self
+
+    def end(self, error=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Records how long each export phase takes, written as Chrome trace JSON.
+
+    Spans are opened with `with tracer.span(Phase.CONVERT, bytes_in=size) as span:` and can
+    take counters (bytes in and out, prim and material counts) while they run. Spans opened in
+    a `tracer.job(job)` block belong to that job: they are drawn on its own row when the trace
+    is loaded in chrome://tracing or Perfetto, and summed by phase in job_summary. A disabled
+    tracer hands out spans that record nothing.
+
+    Args:
+        enabled (bool): Whether spans are recorded.
+        max_events (int): Number of trace events kept, the oldest are dropped first.
+    """
+
+    def __init__(self, enabled=False, max_events=200000):
+        self.enabled = enabled
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._events = []
+            self._lanes = {}
+            self._summaries = {}
+
+    def now(self):
+        """Microseconds since the tracer was created, the time base of the trace events."""
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, _current_job.get(), args)
+
+    @contextlib.contextmanager
+    def job(self, job):
+        """Attributes the spans opened in this block, also in the tasks and DWTool calls it starts, to job.
+
+        Args:
+            job (ExportJob): The job, anything without a job_id leaves the spans unattributed.
+        """
+        job_id = getattr(job, "job_id", None)
+        if self.enabled and job_id is not None:
+            with self._lock:
+                if job_id not in self._lanes:
+                    self._lanes[job_id] = (len(self._lanes) + 1, getattr(job, "target_name", None) or job_id)
+        token = _current_job.set(job_id)
+        try:
+            yield
+        finally:
+            _current_job.reset(token)
+
+    def job_summary(self, job_id):
+        """Returns {phase: {"count", "duration", counters...}} of the spans of job_id."""
+        with self._lock:
+            summary = self._summaries.get(job_id, {})
+            return {
+                phase: {name: round(value, 3) if isinstance(value, float) else value for name, value in totals.items()}
+                for phase, totals in summary.items()
+            }
+
+    def to_chrome_trace(self, since=None):
+        """Returns the trace of the spans that started after `since` (see now), or all of them."""
+        with self._lock:
+            events = [event for event in self._events if since is None or event["ts"] >= since]
+            lanes = dict(self._lanes)
+        used = {event["tid"] for event in events}
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+            for tid, name in [(0, "pipeline")] + list(lanes.values())
+            if tid in used
+        ]
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def write(self, path, since=None):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(since), f)
+        carb.log_info(f"Export trace written to {path}")
+
+    def _record(self, span):
+        with self._lock:
+            tid = self._lanes[span.job_id][0] if span.job_id in self._lanes else 0
+            self._events.append({
+                "name": span.name,
+                "cat": "export",
+                "ph": "X",
+                "ts": round((span.start - self._origin) * 1e6, 1),
+                "dur": round(span.duration * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": span.args,
+            })
+            if len(self._events) > self.max_events:
+                del self._events[: len(self._events) - self.max_events]
+            if span.job_id is None:
+                return
+            totals = self._summaries.setdefault(span.job_id, {}).setdefault(span.name, {"count": 0, "duration": 0.0})
+            totals["count"] += 1
+            totals["duration"] += span.duration
+            for name in COUNTERS:
+                if isinstance(span.args.get(name), (int, float)):
+                    totals[name] = totals.get(name, 0) + span.args[name]
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    """Returns the tracer shared by the exporter, the DWTool and the batch exports."""
+    return _tracer
@@ -0,0 +1,89 @@
+import os
+import uuid
+
+
+class UploadCancelled(Exception):
+    """Raised while streaming a body whose cancel_event was set."""
+
+
+class MultipartFileEncoder:
+    """Streams a multipart/form-data body with one file part without loading the file in memory.
+
+    The instance is an iterable of bytes with a known length, so `requests` sends it with a
+    Content-Length header while reading the file `chunk_size` bytes at a time. Only the byte
+    range [offset, offset + length) of the file is sent, which is what resumable uploads use
+    to send a single chunk.
+
+    Args:
+        fields (dict): Plain form fields sent before the file part.
+        file_field (str): Name of the file form field.
+        file_path (str): Path of the file to send.
+        file_name (str): File name reported in the part header. Defaults to the base name of `file_path`.
+        offset (int): First byte of the file to send.
+        length (int): Number of bytes to send. Defaults to the rest of the file.
+        chunk_size (int): Size of the reads from the file.
+        progress_fn (function): Called as progress_fn(bytes_sent, total_bytes) after each file read.
+        cancel_event (threading.Event): Aborts the request with UploadCancelled before the next read once set.
+    """
+
+    def __init__(
+        self, fields, file_field, file_path, file_name=None, offset=0, length=None,
+        chunk_size=1024 * 1024, progress_fn=None, cancel_event=None
+    ):
+        self._file_path = file_path
+        self._offset = offset
+        file_size = os.path.getsize(file_path)
+        if length is None or offset + length > file_size:
+            length = max(file_size - offset, 0)
+        self._length = length
+        self._chunk_size = chunk_size
+        self._progress_fn = progress_fn
+        self._cancel_event = cancel_event
+        self.boundary = uuid.uuid4().hex
+        self.bytes_sent = 0
+
+        file_name = file_name or os.path.basename(file_path)
+        preamble = b""
+        for name, value in (fields or {}).items():
+            preamble += self._part_header(f'name="{name}"') + str(value).encode("utf-8") + b"\r\n"
+        preamble += self._part_header(
+            f'name="{file_field}"; filename="{file_name}"', "application/octet-stream"
+        )
+        self._preamble = preamble
+        self._epilogue = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    @property
+    def file_length(self):
+        return self._length
+
+    def __len__(self):
+        return len(self._preamble) + self._length + len(self._epilogue)
+
+    def __iter__(self):
+        self.bytes_sent = 0
+        yield self._preamble
+        with open(self._file_path, "rb") as f:
+            f.seek(self._offset)
+            remaining = self._length
+            while remaining > 0:
+                if self._cancel_event and self._cancel_event.is_set():
+                    raise UploadCancelled(f"upload of {self._file_path} cancelled")
+                data = f.read(min(self._chunk_size, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                self.bytes_sent += len(data)
+                yield data
+                if self._progress_fn:
+                    self._progress_fn(self.bytes_sent, self._length)
+        yield self._epilogue
+
+    def _part_header(self, disposition, content_type=None):
+        header = f"--{self.boundary}\r\nContent-Disposition: form-data; {disposition}\r\n"
+        if content_type:
+            header += f"Content-Type: {content_type}\r\n"
+        return (header + "\r\n").encode("utf-8")
@@ -1,9 +1,44 @@
 import os
 import re
+import sys
+import asyncio
+import hashlib
 import carb
 import omni
 import omni.client
 import omni.client.utils as clientutils
+from .tracing import get_tracer, Phase
+
+
+def _windows_memory_counters():
+    """Returns the PROCESS_MEMORY_COUNTERS of the current process, on Windows."""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    kernel32 = ctypes.WinDLL("kernel32")
+    psapi = ctypes.WinDLL("psapi")
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+    psapi.GetProcessMemoryInfo.restype = wintypes.BOOL
+    if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        raise OSError(ctypes.get_last_error(), "GetProcessMemoryInfo failed")
+    return counters
 
 
 class Utils:
@@ -43,9 +78,25 @@ class Utils:
         return result == omni.client.Result.OK and entry.flags & omni.client.ItemFlags.CAN_HAVE_CHILDREN
 
     @staticmethod
-    async def list_folder_async(folder_path):
+    async def list_folder_async(folder_path, include_fn=None, exclude_fn=None):
         absolute_paths = []
         relative_paths = []
+        async for absolute_path, relative_path in Utils.walk_folder_async(folder_path, include_fn, exclude_fn):
+            absolute_paths.append(absolute_path)
+            if len(relative_path) > 0:
+                relative_paths.append(relative_path)
+
+        return absolute_paths, relative_paths
+
+    @staticmethod
+    async def walk_folder_async(folder_path, include_fn=None, exclude_fn=None, max_concurrency=8):
+        """Yields (absolute_path, relative_path) of all files under folder_path as they are listed.
+
+        Up to `max_concurrency` folders are listed at the same time. Files are yielded only if
+        include_fn(path) is true, and files or folders for which exclude_fn(path) is true are
+        skipped, so excluded folders are never listed. Relative paths start with the name of
+        folder_path itself.
+        """
         result, entry = await omni.client.stat_async(folder_path)
         if result == omni.client.Result.OK and entry.flags & omni.client.ItemFlags.CAN_HAVE_CHILDREN:
             is_folder = True
@@ -54,34 +105,107 @@ class Utils:
 
         folder_path = clientutils.make_file_url_if_possible(folder_path)
         if not is_folder:
-            absolute_paths = [folder_path]
-            relative_paths = [os.path.basename(folder_path)]
-        else:
-            if not folder_path.endswith("/"):
-                folder_path += "/"
-
-            folder_queue = [folder_path]
-            while len(folder_queue) > 0:
-                folder = folder_queue.pop(0)
-                carb.log_info(f"Listing folder {folder}...")
-                (result, entries) = await omni.client.list_async(folder)
-                if result != omni.client.Result.OK:
+            if (not include_fn or include_fn(folder_path)) and not (exclude_fn and exclude_fn(folder_path)):
+                yield folder_path, os.path.basename(folder_path)
+            return
+
+        if not folder_path.endswith("/"):
+            folder_path += "/"
+        base_path = os.path.dirname(folder_path[:-1])
+
+        folder_queue = asyncio.Queue()
+        # Bounded so a slow consumer holds the walk back instead of buffering the whole tree.
+        file_queue = asyncio.Queue(maxsize=1024)
+        walk_done = object()
+        folder_queue.put_nowait(folder_path)
+
+        async def list_worker():
+            while True:
+                folder = await folder_queue.get()
+                try:
+                    carb.log_info(f"Listing folder {folder}...")
+                    with get_tracer().span(Phase.LISTING, folder=folder) as span:
+                        (result, entries) = await omni.client.list_async(folder)
+                        span.set(entries=len(entries or []))
+                    if result != omni.client.Result.OK:
+                        carb.log_warn(f"Failed to list folder {folder}: {result}")
+                        continue
+                    for e in entries:
+                        absolute_path = Utils.compute_absolute_path(folder, True, e.relative_path, False)
+                        if exclude_fn and exclude_fn(absolute_path):
+                            continue
+                        if e.flags & omni.client.ItemFlags.CAN_HAVE_CHILDREN:
+                            folder_queue.put_nowait(absolute_path)
+                        elif not include_fn or include_fn(absolute_path):
+                            await file_queue.put(absolute_path)
+                except Exception as exc:
+                    carb.log_warn(f"Failed to list folder {folder}: {exc}")
+                finally:
+                    folder_queue.task_done()
+
+        async def wait_walk_done():
+            await folder_queue.join()
+            await file_queue.put(walk_done)
+
+        tasks = [asyncio.ensure_future(list_worker()) for _ in range(max(1, max_concurrency))]
+        tasks.append(asyncio.ensure_future(wait_walk_done()))
+        try:
+            while True:
+                absolute_path = await file_queue.get()
+                if absolute_path is walk_done:
                     break
-                folders = set((e.relative_path for e in entries if e.flags & omni.client.ItemFlags.CAN_HAVE_CHILDREN))
-                for f in folders:
-                    folder_queue.append(Utils.compute_absolute_path(folder, True, f, False))
-                files = set((e.relative_path for e in entries if not e.flags & omni.client.ItemFlags.CAN_HAVE_CHILDREN))
-                for file in files:
-                    absolute_path = Utils.compute_absolute_path(folder, True, file, False)
-                    absolute_paths.append(absolute_path)
-                    relative_path = Utils.remove_prefix(absolute_path, os.path.dirname(folder_path[:-1]))
-                    relative_path = relative_path.replace("\\", "/")
-                    if relative_path != "/" and relative_path.startswith("/"):
-                        relative_path = relative_path[1:]
-                    if len(relative_path) > 0:
-                        relative_paths.append(relative_path)
+                relative_path = Utils.remove_prefix(absolute_path, base_path)
+                relative_path = relative_path.replace("\\", "/")
+                if relative_path != "/" and relative_path.startswith("/"):
+                    relative_path = relative_path[1:]
+                yield absolute_path, relative_path
+        finally:
+            for task in tasks:
+                task.cancel()
 
-        return absolute_paths, relative_paths
+    @staticmethod
+    def file_size(path):
+        """Returns the size of a local file, or 0 if it isn't one."""
+        try:
+            return os.path.getsize(path)
+        except (OSError, TypeError):
+            return 0
+
+    @staticmethod
+    def current_rss():
+        """Returns the resident set size of the process in bytes, or 0 if it can't be read."""
+        try:
+            if sys.platform == "win32":
+                return _windows_memory_counters().WorkingSetSize
+            if sys.platform.startswith("linux"):
+                with open("/proc/self/statm") as f:
+                    return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError, AttributeError):
+            return 0
+        # No cheap way to read the current size on macOS, the peak is the closest.
+        return Utils.peak_rss()
+
+    @staticmethod
+    def peak_rss():
+        """Returns the peak resident set size of the process in bytes, or 0 if it can't be read."""
+        try:
+            if sys.platform == "win32":
+                return _windows_memory_counters().PeakWorkingSetSize
+            import resource
+
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        except (OSError, ImportError, AttributeError):
+            return 0
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    @staticmethod
+    def hash_file(path, chunk_size=1024 * 1024):
+        hasher = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
 
     @staticmethod
     def make_valid_identifier(identifier):